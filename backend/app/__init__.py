@@ -4,6 +4,12 @@ from config.config import config
 from .routes.auth_routes import auth_bp
 from .routes.event_routes import events_bp
 from .routes.user_routes import users_bp
+from .routes.job_routes import jobs_bp
+from .routes.health_routes import health_bp
+from .services.firebase_service import FirebaseService
+from .utils.json_provider import create_json_provider
+from .utils.content_negotiation import init_content_negotiation
+from .utils.compression import init_compression
 
 def create_app(config_name='default'):
     app = Flask(__name__)
@@ -12,16 +18,21 @@ def create_app(config_name='default'):
     CORS(app, 
          resources={r"/api/*": {"origins": ["http://localhost:3000", "http://localhost:5173"]}},
          supports_credentials=True,
-         allow_headers=["Content-Type", "Authorization"],
+         allow_headers=["Content-Type", "Authorization", "If-None-Match", "If-Match", "Last-Event-ID"],
+         expose_headers=["ETag", "X-Next-Page-Token", "X-Next-Cursor", "X-Cleanup-Job"],
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
     
     # Load config
     app.config.from_object(config[config_name])
+    app.json = create_json_provider(app, app.config['JSON_PROVIDER'])
+    init_content_negotiation(app)
     
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(events_bp, url_prefix='/api/events')
     app.register_blueprint(users_bp, url_prefix='/api/users')
+    app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+    app.register_blueprint(health_bp)
     
     # Global OPTIONS handler for all routes
     @app.route('/api/<path:path>', methods=['OPTIONS'])
@@ -33,9 +44,16 @@ def create_app(config_name='default'):
         origin = request.headers.get('Origin')
         if origin in ['http://localhost:3000', 'http://localhost:5173']:
             response.headers.add('Access-Control-Allow-Origin', origin)
-            response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+            response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,If-None-Match,If-Match,Last-Event-ID')
             response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
             response.headers.add('Access-Control-Allow-Credentials', 'true')
+            response.headers.add('Access-Control-Expose-Headers', 'ETag,X-Next-Page-Token,X-Next-Cursor,X-Cleanup-Job')
         return response
+
+    init_compression(app)
+
+    # Initialize Firebase while the server starts listening instead of on import
+    if app.config['FIREBASE_INIT'] == 'background':
+        FirebaseService.initialize_in_background()
     
     return app
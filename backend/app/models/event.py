@@ -1,13 +1,40 @@
 from datetime import datetime
 
 class Event:
-    def __init__(self, title, description, date, required_workers, id=None, registered_workers=None):
+    # Fields of the API representation, selectable with ?fields=
+    FIELDS = ('id', 'title', 'description', 'date', 'required_workers', 'registered_workers',
+              'registered_count', 'open_slots', 'registration_layout', 'created_at')
+
+    # How each API field is read, so to_json only computes the requested ones
+    _JSON_VALUES = {
+        'id': lambda event: event.id,
+        'title': lambda event: event.title,
+        'description': lambda event: event.description,
+        'date': lambda event: event.date,
+        'required_workers': lambda event: event.required_workers,
+        'registered_workers': lambda event: event.registered_workers,
+        'registered_count': lambda event: event.registration_count(),
+        'open_slots': lambda event: event.open_slots(),
+        'registration_layout': lambda event: event.registration_layout,
+        'created_at': lambda event: event.created_at
+    }
+
+    def __init__(self, title, description, date, required_workers, id=None, registered_workers=None,
+                 registration_layout='embedded', registered_count=None):
         self.id = id
         self.title = title
         self.description = description
         self.date = date
         self.required_workers = required_workers
         self.registered_workers = registered_workers or []
+        # 'embedded' keeps registrations on the event, 'sharded' in the registrations collection
+        self.registration_layout = registration_layout
+        # Stored count, set when registered_workers was not loaded
+        self.registered_count = registered_count
+        # Fields to serialize, None for all
+        self.fields = None
+        # Registered workers' User profiles, set when ?include=workers was requested
+        self.workers = None
         self.created_at = datetime.utcnow().isoformat()
     
     def to_dict(self):
@@ -17,9 +44,22 @@ class Event:
             'date': self.date,
             'required_workers': self.required_workers,
             'registered_workers': self.registered_workers,
+            'registered_count': self.registration_count(),
+            'open_slots': self.open_slots(),
+            'registration_layout': self.registration_layout,
             'created_at': self.created_at
         }
     
+    def to_json(self):
+        """API representation, serialized by the app's JSON provider"""
+        data = {
+            field: value(self) for field, value in self._JSON_VALUES.items()
+            if self.fields is None or field in self.fields
+        }
+        if self.workers is not None:
+            data['workers'] = self.workers
+        return data
+
     @staticmethod
     def from_dict(data, id=None):
         """Create an Event instance from a dictionary"""
@@ -29,7 +69,8 @@ class Event:
             date=data.get('date'),
             required_workers=data.get('required_workers'),
             id=id or data.get('id'),
-            registered_workers=data.get('registered_workers', [])
+            registered_workers=data.get('registered_workers', []),
+            registration_layout=data.get('registration_layout', 'embedded')
         )
         event.created_at = data.get('created_at', datetime.utcnow().isoformat())
         return event
@@ -37,9 +78,19 @@ class Event:
     def is_full(self):
         return len(self.registered_workers) >= self.required_workers
 
+    def registration_count(self):
+        """Number of registered workers, available even when registered_workers was not loaded"""
+        if self.registered_count is not None:
+            return self.registered_count
+        return len(self.registered_workers)
+
+    def open_slots(self):
+        """Number of workers still needed, as persisted in the open_slots field"""
+        return (self.required_workers or 0) - self.registration_count()
+
     def needs_workers(self):
         """Check if the event still needs workers"""
-        return len(self.registered_workers) < self.required_workers
+        return self.registration_count() < self.required_workers
 
     def is_user_registered(self, user_id):
         return user_id in self.registered_workers
@@ -2,6 +2,9 @@ from datetime import datetime
 from typing import Optional, List
 
 class User:
+    # Fields of the API representation, selectable with ?fields=
+    FIELDS = ('id', 'email', 'name', 'role', 'created_at', 'last_login', 'registered_events')
+
     def __init__(self, id: str, email: str, name: str, role: str = 'worker',
                  created_at: Optional[datetime] = None, last_login: Optional[datetime] = None,
                  registered_events: Optional[List[str]] = None):
@@ -12,6 +15,8 @@ class User:
         self.created_at = created_at or datetime.utcnow()
         self.last_login = last_login
         self.registered_events = registered_events or []
+        # Fields to serialize, None for all
+        self.fields = None
 
     def to_dict(self):
         return {
@@ -24,6 +29,21 @@ class User:
             'registered_events': self.registered_events
         }
 
+    def to_json(self):
+        """API representation; datetimes are left to the app's JSON provider"""
+        data = {
+            'id': self.id,
+            'email': self.email,
+            'name': self.name,
+            'role': self.role,
+            'created_at': self.created_at,
+            'last_login': self.last_login,
+            'registered_events': self.registered_events
+        }
+        if self.fields is not None:
+            return {field: value for field, value in data.items() if field in self.fields}
+        return data
+
     @staticmethod
     def from_dict(data: dict, id: str = None):
         return User(
@@ -49,3 +69,38 @@ class User:
     def unregister_event(self, event_id: str):
         if event_id in self.registered_events:
             self.registered_events.remove(event_id)
+
+
+class LazyUser:
+    """
+    Stand-in for a User built from verified token claims. ``id`` and ``role``
+    are available immediately; the full profile is only loaded the first
+    time any other attribute is accessed.
+    """
+
+    def __init__(self, id: str, role: str, loader):
+        self.id = id
+        self.role = role
+        self._loader = loader
+        self._user = None
+
+    def _load(self) -> User:
+        if self._user is None:
+            self._user = self._loader()
+        return self._user
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._user is not None
+
+    def __getattr__(self, name):
+        # Only called for attributes not set in __init__
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def is_worker(self):
+        return self.role == 'worker'
@@ -1,9 +1,10 @@
 from flask import Blueprint, request, jsonify
-from ..services.firebase_service import FirebaseService, firebase_token_required
+from ..services.firebase_service import LazyFirebaseService, firebase_token_required
 from ..models.user import User
+from ..utils.http_cache import conditional_json
 
 auth_bp = Blueprint('auth', __name__)
-firebase_service = FirebaseService()
+firebase_service = LazyFirebaseService()
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -88,11 +89,11 @@ def get_current_user():
         firebase_user = request.firebase_user
         
         # Get the user from Firestore
-        user = firebase_service.get_user_by_id(firebase_user['uid'])
+        user = firebase_service.get_cached_user(firebase_user['uid'])
         if not user:
             return jsonify({'message': 'User not found'}), 404
             
-        return jsonify(user.to_dict()), 200
+        return conditional_json(user)
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
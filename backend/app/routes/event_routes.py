@@ -1,33 +1,187 @@
-from flask import Blueprint, request, jsonify, g
-from ..services.firebase_service import FirebaseService
-from ..services.auth_service import token_required, admin_required
+import time
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, Response, request, jsonify, g, stream_with_context
+from ..services.firebase_service import (
+    LazyFirebaseService, EventNotFoundError, RegistrationError, PreconditionFailedError
+)
+from ..services.transactions import TransactionContentionError
+from ..services.auth_service import token_required, admin_required, stream_token_required
+from ..services.pagination import InvalidCursorError, encode_cursor, decode_cursor
+from ..services.registration_shards import LAYOUTS
+from ..services.event_stream import stream_messages
+from ..utils.http_cache import conditional_json, hashed_etag, is_not_modified, not_modified, projection_etag
+from ..utils.fields import requested_fields, requested_includes
+from ..utils.streaming import stream_json, wants_stream
+from ..utils.bulk import bulk_response, bulk_validation_error, read_bulk_items
 from ..models.event import Event
+from config.config import Config
 
 events_bp = Blueprint('events', __name__)
-firebase_service = FirebaseService()
+firebase_service = LazyFirebaseService()
+
+MAX_PAGE_SIZE = 500
+
+# Relationships that can be embedded with ?include=
+EVENT_INCLUDES = ('workers',)
+
+# Fields an update may change
+UPDATABLE_FIELDS = ('title', 'description', 'date', 'required_workers')
+
+def check_required_workers(value):
+    """
+    :raises ValueError: If required_workers is not a non-negative integer
+    """
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError('required_workers must be a non-negative integer')
+
+def event_from_request_data(data):
+    """
+    Validate the body of an event creation
+    :param data: Request data for one event
+    :return: Event object
+    :raises ValueError: If a required field is missing or invalid
+    """
+    if not isinstance(data, dict) or not all(k in data for k in ['title', 'description', 'date', 'required_workers']):
+        raise ValueError('Missing required fields')
+
+    check_required_workers(data['required_workers'])
+    registration_layout = data.get('registration_layout', Config.REGISTRATION_LAYOUT)
+    if registration_layout not in LAYOUTS:
+        raise ValueError('Invalid registration_layout')
+
+    return Event(
+        title=data['title'],
+        description=data['description'],
+        date=data['date'],
+        required_workers=data['required_workers'],
+        registration_layout=registration_layout
+    )
+
+def decode_watermark(value):
+    """
+    Decode and check a ?since= watermark issued by /changes
+    :param value: Watermark string received from a client
+    :return: Mapping with issued_at and the events/tombstones positions
+    :raises InvalidCursorError: If the watermark is malformed
+    """
+    since = decode_cursor(value)
+    issued_at = since.get('issued_at')
+    if isinstance(issued_at, bool) or not isinstance(issued_at, (int, float)) or not 0 <= issued_at <= time.time() + 60:
+        raise InvalidCursorError('Invalid watermark')
+    for key in ('events', 'tombstones'):
+        position = since.get(key)
+        if position is not None and not (
+            isinstance(position, list) and len(position) == 2
+            and isinstance(position[0], datetime) and isinstance(position[1], str)
+        ):
+            raise InvalidCursorError('Invalid watermark')
+    return since
+
+def projection_args():
+    """
+    Read ?fields= and ?include= for an events response
+    :return: Tuple of (fields to serialize, fields to load, includes)
+    :raises ValueError: If an unknown field or include is requested
+    :raises PermissionError: If a non-admin asks for worker profiles
+    """
+    fields = requested_fields(Event.FIELDS)
+    includes = requested_includes(EVENT_INCLUDES)
+    if 'workers' in includes and not g.user.is_admin():
+        raise PermissionError('Only admins can include worker profiles')
+    load_fields = fields
+    if fields is not None and 'workers' in includes:
+        # Worker IDs are needed to resolve the profiles
+        load_fields = fields | {'registered_workers'}
+    return fields, load_fields, includes
+
+def events_page_response(**filters):
+    """Run a paginated events query from the limit/cursor/from/to/fields/include query parameters"""
+    limit = request.args.get('limit', type=int)
+    if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+        return jsonify({'message': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+    try:
+        fields, load_fields, includes = projection_args()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except PermissionError as e:
+        return jsonify({'message': str(e)}), 403
+
+    # When the collection version is known, a matching If-None-Match skips the query.
+    # Embedded profiles change independently of the events, so includes opt out.
+    etag = None
+    version = firebase_service.events_list_version()
+    if version and not includes:
+        etag = hashed_etag(version, request.full_path, sorted(filters.items()))
+        if is_not_modified(etag):
+            return not_modified(etag)
+
+    try:
+        events, next_cursor = firebase_service.get_events_page(
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            fields=load_fields,
+            **filters
+        )
+    except InvalidCursorError as e:
+        return jsonify({'message': str(e)}), 400
+    if events is None:
+        return jsonify({'message': 'Failed to get events'}), 500
+
+    if 'workers' in includes:
+        firebase_service.embed_workers(events, fields)
+
+    response = conditional_json(events, etag)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def registration_response(change, event_id, success_message, failure_message):
+    """Apply a registration change for the current user and map its outcome to a response"""
+    try:
+        success = change(event_id, g.user.id)
+    except EventNotFoundError:
+        return jsonify({'message': 'Event not found'}), 404
+    except RegistrationError as e:
+        return jsonify({'message': str(e)}), 400
+    except TransactionContentionError:
+        return jsonify({'message': 'Event is busy, please try again'}), 409
+
+    if not success:
+        return jsonify({'message': failure_message}), 500
+    return jsonify({'message': success_message})
 
 @events_bp.route('/', methods=['GET'])
 @token_required
 def get_events():
-    events = firebase_service.get_all_events()
-    return jsonify([{
-        'id': event.id,
-        **event.to_dict()
-    } for event in events])
+    needs_workers = request.args.get('needs_workers', '').lower() == 'true'
+    if wants_stream():
+        try:
+            fields, load_fields, includes = projection_args()
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        except PermissionError as e:
+            return jsonify({'message': str(e)}), 403
+        # Exports: every matching event, serialized as it is read
+        events = firebase_service.iter_events(
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            needs_workers=needs_workers,
+            fields=load_fields
+        )
+        if 'workers' in includes:
+            events = firebase_service.iter_embedding_workers(events, fields)
+        return stream_json(events)
+    return events_page_response(needs_workers=needs_workers)
 
 @events_bp.route('/', methods=['POST'])
 @admin_required
 def create_event():
-    data = request.json
-    if not all(k in data for k in ['title', 'description', 'date', 'required_workers']):
-        return jsonify({'message': 'Missing required fields'}), 400
-    
-    event = Event(
-        title=data['title'],
-        description=data['description'],
-        date=data['date'],
-        required_workers=data['required_workers']
-    )
+    try:
+        event = event_from_request_data(request.json)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     
     event_id = firebase_service.create_event(event)
     if not event_id:
@@ -38,26 +192,138 @@ def create_event():
         'event_id': event_id
     }), 201
 
+@events_bp.route('/bulk', methods=['POST'])
+@admin_required
+def create_events_bulk():
+    try:
+        items = read_bulk_items(Config.BULK_MAX_ITEMS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    events = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            events.append(event_from_request_data(item))
+        except ValueError as e:
+            errors.append((index, str(e)))
+    if errors:
+        return bulk_validation_error(errors)
+
+    return bulk_response(firebase_service.create_events(events), ('created',))
+
+@events_bp.route('/bulk', methods=['PUT'])
+@admin_required
+def update_events_bulk():
+    try:
+        items = read_bulk_items(Config.BULK_MAX_ITEMS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    updates = []
+    errors = []
+    seen = set()
+    for index, item in enumerate(items):
+        event_id = item.get('id') if isinstance(item, dict) else None
+        if not isinstance(event_id, str) or not event_id:
+            errors.append((index, 'Missing id'))
+            continue
+        if event_id in seen:
+            errors.append((index, f'Duplicate id {event_id}'))
+            continue
+        seen.add(event_id)
+        update = {field: item[field] for field in UPDATABLE_FIELDS if field in item}
+        if not update:
+            errors.append((index, 'No fields to update'))
+            continue
+        if 'required_workers' in update:
+            try:
+                check_required_workers(update['required_workers'])
+            except ValueError as e:
+                errors.append((index, str(e)))
+                continue
+        updates.append((event_id, update))
+    if errors:
+        return bulk_validation_error(errors)
+
+    return bulk_response(firebase_service.update_events(updates), ('updated',))
+
+@events_bp.route('/bulk', methods=['DELETE'])
+@admin_required
+def delete_events_bulk():
+    try:
+        items = read_bulk_items(Config.BULK_MAX_ITEMS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    event_ids = []
+    errors = []
+    seen = set()
+    for index, item in enumerate(items):
+        # Items are IDs or objects with an id
+        event_id = item.get('id') if isinstance(item, dict) else item
+        if not isinstance(event_id, str) or not event_id:
+            errors.append((index, 'Missing id'))
+        elif event_id in seen:
+            errors.append((index, f'Duplicate id {event_id}'))
+        else:
+            seen.add(event_id)
+            event_ids.append(event_id)
+    if errors:
+        return bulk_validation_error(errors)
+
+    results, cleanup_job = firebase_service.delete_events(event_ids)
+    return bulk_response(results, ('deleted',), cleanup_job)
+
 @events_bp.route('/<event_id>', methods=['GET'])
 @token_required
 def get_event(event_id):
-    event = firebase_service.get_event(event_id)
+    try:
+        fields, load_fields, includes = projection_args()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except PermissionError as e:
+        return jsonify({'message': str(e)}), 403
+
+    version, covers_registrations, load_event = firebase_service.get_event_versioned(event_id, load_fields)
+    etag = None
+    if covers_registrations and not includes:
+        etag = projection_etag(version, fields)
+    if is_not_modified(etag):
+        return not_modified(etag)
+
+    event = load_event()
     if not event:
         return jsonify({'message': 'Event not found'}), 404
+    if 'workers' in includes:
+        firebase_service.embed_workers([event], fields)
     
-    return jsonify({
-        'id': event.id,
-        **event.to_dict()
-    })
+    # Sharded registrations and embedded profiles aren't covered by the version,
+    # so the body is hashed; the version still prefixes the ETag for If-Match
+    return conditional_json(event, etag, version=version)
 
 @events_bp.route('/<event_id>', methods=['PUT'])
 @admin_required
 def update_event(event_id):
-    data = request.json
-    if not any(k in data for k in ['title', 'description', 'date', 'required_workers']):
+    body = request.json
+    # Registrations and the counters derived from them only change through the registration transaction
+    data = {field: body[field] for field in UPDATABLE_FIELDS if field in body} if isinstance(body, dict) else {}
+    if not data:
         return jsonify({'message': 'No fields to update'}), 400
+    if 'required_workers' in data:
+        try:
+            check_required_workers(data['required_workers'])
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
     
-    success = firebase_service.update_event(event_id, data)
+    if_match = None
+    if request.if_match and not request.if_match.star_tag:
+        # Compressed GET responses carry the version as a weak ETag
+        if_match = next(iter(request.if_match.as_set(include_weak=True)), None)
+    try:
+        success = firebase_service.update_event(event_id, data, if_match=if_match)
+    except PreconditionFailedError as e:
+        return jsonify({'message': str(e)}), 412
     if not success:
         return jsonify({'message': 'Failed to update event'}), 500
         
@@ -66,63 +332,98 @@ def update_event(event_id):
 @events_bp.route('/<event_id>', methods=['DELETE'])
 @admin_required
 def delete_event(event_id):
-    success = firebase_service.delete_event(event_id)
-    if not success:
+    cleanup_job = firebase_service.delete_event(event_id)
+    if not cleanup_job:
         return jsonify({'message': 'Failed to delete event'}), 500
         
-    return jsonify({'message': 'Event deleted successfully'})
+    return jsonify({'message': 'Event deleted successfully', 'cleanup_job': cleanup_job})
 
 @events_bp.route('/<event_id>/register', methods=['POST'])
 @token_required
 def register_for_event(event_id):
-    event = firebase_service.get_event(event_id)
-    if not event:
-        return jsonify({'message': 'Event not found'}), 404
-    
-    if event.is_full():
-        return jsonify({'message': 'Event is at full capacity'}), 400
-        
-    if event.is_user_registered(g.user.id):
-        return jsonify({'message': 'Already registered for this event'}), 400
-    
-    success = firebase_service.register_worker(event_id, g.user.id)
-    if not success:
-        return jsonify({'message': 'Failed to register for event'}), 500
-        
-    return jsonify({'message': 'Successfully registered for event'})
+    return registration_response(
+        firebase_service.register_worker,
+        event_id,
+        'Successfully registered for event',
+        'Failed to register for event'
+    )
 
 @events_bp.route('/<event_id>/unregister', methods=['POST'])
 @token_required
 def unregister_from_event(event_id):
-    event = firebase_service.get_event(event_id)
-    if not event:
-        return jsonify({'message': 'Event not found'}), 404
-    
-    if not event.is_user_registered(g.user.id):
-        return jsonify({'message': 'Not registered for this event'}), 400
-    
-    success = firebase_service.unregister_worker(event_id, g.user.id)
-    if not success:
-        return jsonify({'message': 'Failed to unregister from event'}), 500
-        
-    return jsonify({'message': 'Successfully unregistered from event'})
+    return registration_response(
+        firebase_service.unregister_worker,
+        event_id,
+        'Successfully unregistered from event',
+        'Failed to unregister from event'
+    )
+
+@events_bp.route('/registration-stats', methods=['GET'])
+@admin_required
+def get_registration_stats():
+    """Contention metrics for registration transactions (admin only)"""
+    return jsonify(firebase_service.registration_stats.stats())
+
+@events_bp.route('/replica-stats', methods=['GET'])
+@admin_required
+def get_replica_stats():
+    """Readiness and lag of the in-memory events replica (admin only)"""
+    if firebase_service.event_replica is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **firebase_service.event_replica.stats()})
+
+@events_bp.route('/firestore-stats', methods=['GET'])
+@admin_required
+def get_firestore_stats():
+    """Warm-up state and utilization of the Firestore channel pool (admin only)"""
+    return jsonify(firebase_service.firestore_stats())
+
+@events_bp.route('/changes', methods=['GET'])
+@token_required
+def get_event_changes():
+    """Events created, updated or deleted since the watermark in ?since="""
+    limit = request.args.get('limit', type=int)
+    if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+        return jsonify({'message': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+
+    since = None
+    if request.args.get('since'):
+        try:
+            since = decode_watermark(request.args['since'])
+        except InvalidCursorError as e:
+            return jsonify({'message': str(e)}), 400
+        issued_at = datetime.fromtimestamp(since['issued_at'], timezone.utc)
+        if datetime.now(timezone.utc) - issued_at > timedelta(days=Config.TOMBSTONE_RETENTION_DAYS):
+            # Tombstones older than this may be gone, so deletes could be missed
+            return jsonify({'message': 'Watermark expired, full resync required'}), 410
+
+    events, deleted, watermark, has_more = firebase_service.get_event_changes(since=since, limit=limit)
+    if events is None:
+        return jsonify({'message': 'Failed to get event changes'}), 500
+    watermark['issued_at'] = since['issued_at'] if since and has_more else time.time()
+    return jsonify({
+        'events': events,
+        'deleted': deleted,
+        'since': encode_cursor(watermark),
+        'has_more': has_more
+    })
+
+@events_bp.route('/stream', methods=['GET'])
+@stream_token_required
+def stream_events():
+    """Server-Sent Events stream of event changes (id, open_slots, changed fields)"""
+    broadcaster = firebase_service.get_event_broadcaster()
+    client = broadcaster.subscribe(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    return Response(
+        stream_with_context(stream_messages(broadcaster, client, Config.EVENT_STREAM_HEARTBEAT)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @events_bp.route('/my-events', methods=['GET'])
 @token_required
 def get_my_events():
-    current_user = get_current_user()
-    
-    if current_user['role'] != 'worker':
+    if g.user.role != 'worker':
         return jsonify({'message': 'Only workers can view their registered events'}), 403
-    
-    events = firebase_service.get_all_events()
-    my_events = [
-        {
-            'id': event.id,
-            **event.to_dict()
-        }
-        for event in events
-        if event.is_user_registered(current_user['user_id'])
-    ]
-    
-    return jsonify(my_events)
+
+    return events_page_response(registered_worker=g.user.id)
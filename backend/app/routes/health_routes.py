@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify
+from ..services.firebase_service import FirebaseService
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the process is serving requests; never touches Firebase"""
+    return jsonify({'status': 'ok'})
+
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: Firebase is initialized and the Firestore channels are warm"""
+    # Starts initialization if nothing has yet, e.g. with FIREBASE_INIT=lazy
+    FirebaseService.initialize_in_background()
+    ready, checks = FirebaseService.readiness()
+    return jsonify({'status': 'ready' if ready else 'starting', **checks}), 200 if ready else 503
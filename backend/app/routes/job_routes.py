@@ -0,0 +1,15 @@
+from flask import Blueprint, jsonify
+from ..services.firebase_service import LazyFirebaseService
+from ..services.auth_service import admin_required
+
+jobs_bp = Blueprint('jobs', __name__)
+firebase_service = LazyFirebaseService()
+
+@jobs_bp.route('/cleanup/<job_id>', methods=['GET'])
+@admin_required
+def get_cleanup_job(job_id):
+    """Progress of the cleanup started by a user or event delete (admin only)"""
+    job = firebase_service.get_cleanup_job(job_id)
+    if not job:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify(job)
@@ -1,56 +1,134 @@
 from flask import Blueprint, request, jsonify, g
-from ..services.firebase_service import FirebaseService
+from ..services.firebase_service import LazyFirebaseService
 from ..services.auth_service import token_required, admin_required
+from ..utils.http_cache import conditional_json
+from ..utils.streaming import stream_json, wants_stream
+from ..utils.fields import requested_fields
+from ..utils.bulk import bulk_response, bulk_validation_error, read_bulk_items
+from ..services.user_import import validate_import_row
+from ..models.event import Event
+from ..models.user import User
 from datetime import datetime
+from config.config import Config
 
 users_bp = Blueprint('users', __name__)
-firebase_service = FirebaseService()
+firebase_service = LazyFirebaseService()
+
+MAX_PAGE_SIZE = 1000
 
 @users_bp.route('/me', methods=['GET'])
 @token_required
 def get_current_user():
     """Get the current user's profile"""
-    return jsonify({
-        'id': g.user.id,
-        **g.user.to_dict()
-    })
+    return conditional_json(g.user)
 
 @users_bp.route('/me/events', methods=['GET'])
 @token_required
 def get_my_events():
     """Get all events the current user is registered for"""
-    events = []
-    for event_id in g.user.registered_events:
-        event = firebase_service.get_event(event_id)
-        if event:
-            events.append({
-                'id': event.id,
-                **event.to_dict()
-            })
+    try:
+        fields = requested_fields(Event.FIELDS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    events = firebase_service.get_events_by_ids(g.user.registered_events, fields)
     return jsonify(events)
 
 @users_bp.route('/', methods=['GET'])
 @admin_required
 def get_all_users():
-    """Get all users (admin only)"""
-    users = firebase_service.get_all_users()
-    return jsonify([{
-        'id': user.id,
-        **user.to_dict()
-    } for user in users])
+    """Get all users (admin only), one page at a time when limit is given"""
+    try:
+        fields = requested_fields(User.FIELDS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    if wants_stream():
+        return stream_json(firebase_service.iter_users(fields))
+
+    limit = request.args.get('limit', type=int)
+    if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+        return jsonify({'message': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+
+    users, next_page_token = firebase_service.get_all_users(
+        limit=limit,
+        page_token=request.args.get('page_token'),
+        fields=fields
+    )
+    response = jsonify(users)
+    if next_page_token:
+        response.headers['X-Next-Page-Token'] = next_page_token
+    return response
+
+@users_bp.route('/bulk', methods=['POST'])
+@admin_required
+def import_users_bulk():
+    """Provision many users at once (admin only); safe to repeat after a partial failure"""
+    try:
+        items = read_bulk_items(Config.BULK_MAX_ITEMS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    rows = []
+    errors = []
+    seen = set()
+    for index, item in enumerate(items):
+        try:
+            row = validate_import_row(item)
+        except ValueError as e:
+            errors.append((index, str(e)))
+            continue
+        email = row['email'].lower()
+        if email in seen:
+            errors.append((index, 'Duplicate email'))
+        seen.add(email)
+        rows.append(row)
+    if errors:
+        return bulk_validation_error(errors)
+
+    return bulk_response(firebase_service.import_users(rows), ('created', 'exists'))
+
+@users_bp.route('/bulk', methods=['DELETE'])
+@admin_required
+def delete_users_bulk():
+    """Delete many users (admin only); their registrations are cleaned up in the background"""
+    try:
+        items = read_bulk_items(Config.BULK_MAX_ITEMS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    user_ids = []
+    errors = []
+    seen = set()
+    for index, item in enumerate(items):
+        # Items are IDs or objects with an id
+        user_id = item.get('id') if isinstance(item, dict) else item
+        if not isinstance(user_id, str) or not user_id:
+            errors.append((index, 'Missing id'))
+        elif user_id == g.user.id:
+            errors.append((index, 'Cannot delete your own account'))
+        elif user_id in seen:
+            errors.append((index, f'Duplicate id {user_id}'))
+        else:
+            seen.add(user_id)
+            user_ids.append(user_id)
+    if errors:
+        return bulk_validation_error(errors)
+
+    results, cleanup_job = firebase_service.delete_users(user_ids)
+    return bulk_response(results, ('deleted',), cleanup_job)
 
 @users_bp.route('/<user_id>', methods=['GET'])
 @admin_required
 def get_user(user_id):
     """Get a specific user's profile (admin only)"""
-    user = firebase_service.get_user_by_id(user_id)
+    try:
+        fields = requested_fields(User.FIELDS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    user = firebase_service.get_user_by_id(user_id, fields)
     if not user:
         return jsonify({'message': 'User not found'}), 404
     
-    return jsonify({
-        'id': user.id,
-        **user.to_dict()
-    })
+    return jsonify(user)
 
 @users_bp.route('/me', methods=['PUT'])
 @token_required
@@ -98,8 +176,8 @@ def delete_user(user_id):
     if user_id == g.user.id:
         return jsonify({'message': 'Cannot delete your own account'}), 400
     
-    success = firebase_service.delete_user(user_id)
-    if not success:
+    cleanup_job = firebase_service.delete_user(user_id)
+    if not cleanup_job:
         return jsonify({'message': 'Failed to delete user'}), 500
     
-    return jsonify({'message': 'User deleted successfully'})
+    return jsonify({'message': 'User deleted successfully', 'cleanup_job': cleanup_job})
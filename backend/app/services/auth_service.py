@@ -1,14 +1,43 @@
-import jwt
 import os
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, g
 from .firebase_service import FirebaseService
+from ..models.user import User, LazyUser
+from config.config import Config
 
 class AuthService:
     def __init__(self):
         self.firebase_service = FirebaseService()
 
+def resolve_user(firebase_service, decoded_token):
+    """
+    Build the request user for a verified token
+    :param firebase_service: The FirebaseService instance
+    :param decoded_token: Claims returned by verify_token
+    :return: LazyUser carrying the role from the claims, or a loaded User
+             when AUTH_ROLE_SOURCE is 'datastore' or the claims can't be trusted,
+             None if the user's profile is gone
+    """
+    uid = decoded_token['uid']
+    if Config.AUTH_ROLE_SOURCE != 'claims':
+        return firebase_service.get_cached_user(uid)
+
+    # Deleted users keep valid tokens until they expire
+    state = firebase_service.get_auth_state(uid)
+    if state is None:
+        return None
+
+    role = decoded_token.get('role')
+    changed_at = state['role_changed_at']
+    stale = role is None or (changed_at is not None and changed_at >= (decoded_token.get('iat') or 0))
+    if stale:
+        if Config.AUTH_CLAIMS_FALLBACK:
+            return firebase_service.get_cached_user(uid)
+        role = role or 'worker'
+
+    return LazyUser(uid, role, lambda: firebase_service.get_cached_user(uid))
+
 def get_current_user():
     """Get the current user from the Firebase token in the request header"""
     auth_header = request.headers.get('Authorization')
@@ -20,7 +49,7 @@ def get_current_user():
         firebase_service = FirebaseService()
         decoded_token = firebase_service.verify_token(token)
         if decoded_token:
-            return firebase_service.get_user_by_id(decoded_token['uid'])
+            return firebase_service.get_cached_user(decoded_token['uid'])
         return None
     except Exception as e:
         print(f"Error getting current user: {str(e)}")
@@ -28,21 +57,32 @@ def get_current_user():
 
 def token_required(f):
     """Decorator to verify Firebase token"""
+    return _require_token(f, allow_query_token=False)
+
+def stream_token_required(f):
+    """
+    Decorator to verify Firebase token, also accepted as ?access_token= since
+    a browser EventSource can't set the Authorization header
+    """
+    return _require_token(f, allow_query_token=True)
+
+def _require_token(f, allow_query_token):
     @wraps(f)
     def decorated(*args, **kwargs):
         auth_header = request.headers.get('Authorization')
-        if not auth_header:
+        query_token = request.args.get('access_token') if allow_query_token else None
+        if not auth_header and not query_token:
             return jsonify({'message': 'No token provided'}), 401
 
         try:
-            token = auth_header.split(" ")[1]
+            token = auth_header.split(" ")[1] if auth_header else query_token
             firebase_service = FirebaseService()
             decoded_token = firebase_service.verify_token(token)
             if not decoded_token:
                 return jsonify({'message': 'Invalid token'}), 401
             
             # Store user info in Flask's g object
-            g.user = firebase_service.get_user_by_id(decoded_token['uid'])
+            g.user = resolve_user(firebase_service, decoded_token)
             if not g.user:
                 return jsonify({'message': 'User not found'}), 401
                 
@@ -69,7 +109,7 @@ def admin_required(f):
                 return jsonify({'message': 'Invalid token'}), 401
             
             # Get user and check role
-            user = firebase_service.get_user_by_id(decoded_token['uid'])
+            user = resolve_user(firebase_service, decoded_token)
             if not user:
                 return jsonify({'message': 'User not found'}), 401
             
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def pack_batches(groups, batch_limit):
+    """
+    Pack groups of writes into batches without splitting a group, so writes
+    that belong together (an event and its counter shards) commit atomically
+    :param groups: List of (key, list of writes)
+    :param batch_limit: Maximum number of writes per batch
+    :return: List of batches, each a list of (key, list of writes)
+    """
+    batches = []
+    current = []
+    size = 0
+    for key, writes in groups:
+        if current and size + len(writes) > batch_limit:
+            batches.append(current)
+            current = []
+            size = 0
+        current.append((key, writes))
+        size += len(writes)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def commit_grouped_writes(db, groups, batch_limit, max_workers):
+    """
+    Commit many writes as Firestore batches, several batches at a time
+    :param db: Firestore client
+    :param groups: List of (key, list of writes); a write is a tuple of
+                   ('set' | 'update' | 'delete', document reference, data or None)
+    :param batch_limit: Maximum number of writes per batch
+    :param max_workers: Maximum number of batches committed concurrently
+    :return: Dictionary of key to None on success or the error message of its batch
+    """
+    def commit(batch_groups):
+        batch = db.batch()
+        for _, writes in batch_groups:
+            for operation, ref, data in writes:
+                if operation == 'delete':
+                    batch.delete(ref)
+                else:
+                    getattr(batch, operation)(ref, data)
+        try:
+            batch.commit()
+            error = None
+        except Exception as e:
+            print(f"Error committing bulk batch: {str(e)}")
+            error = str(e)
+        return {key: error for key, _ in batch_groups}
+
+    results = {}
+    batches = pack_batches(groups, batch_limit)
+    if not batches:
+        return results
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+        for batch_results in executor.map(commit, batches):
+            results.update(batch_results)
+    return results
@@ -0,0 +1,127 @@
+"""
+Background jobs that remove references to deleted users and events.
+
+Request handlers only delete the documents they can address by ID. A
+cleanup job then finds what still points at the deleted IDs through indexed
+queries (event rosters, users' registered_events, sharded registrations and
+counter shards) and fixes it in batches. Job state is kept in the
+``cleanup_jobs`` collection so any instance can report progress. Every step
+is idempotent, so an interrupted job can be run again with
+``scripts/run_cleanup_jobs.py``.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from ..utils.lazy_import import lazy_import
+
+firestore = lazy_import('firebase_admin.firestore')
+
+CLEANUP_JOBS = 'cleanup_jobs'
+
+# What a job cleans up after
+DELETED_USERS = 'users'
+DELETED_EVENTS = 'events'
+
+# Statuses of jobs that have not finished successfully
+UNFINISHED_STATUSES = ['queued', 'running', 'failed']
+
+# Statuses of jobs a worker may be executing right now
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Seconds between progress writes while a job runs
+PROGRESS_INTERVAL = 1.0
+
+
+def new_job(kind: str, ids: list, retention_days: int) -> dict:
+    """Initial state of a cleanup job document"""
+    return {
+        'kind': kind,
+        'ids': list(ids),
+        'status': 'queued',
+        'total': len(ids),
+        'processed': 0,
+        'counts': {},
+        'failed': [],
+        'created_at': firestore.SERVER_TIMESTAMP,
+        'updated_at': firestore.SERVER_TIMESTAMP,
+        'expire_at': datetime.now(timezone.utc) + timedelta(days=retention_days)
+    }
+
+
+def is_abandoned(job_data: dict, lease_seconds: float, now=None) -> bool:
+    """
+    Check whether an unfinished job may be resumed by another worker
+    :param job_data: The job document's data
+    :param lease_seconds: How long a queued or running job belongs to the
+                          worker that last saved it
+    :return: True for failed jobs and for active jobs not saved within the lease
+    """
+    if job_data.get('status') not in ACTIVE_STATUSES:
+        return True
+    updated_at = job_data.get('updated_at')
+    if not isinstance(updated_at, datetime):
+        return True
+    now = now or datetime.now(timezone.utc)
+    return now - updated_at > timedelta(seconds=lease_seconds)
+
+
+def run_job(job_ref, job_data: dict, cleanup) -> str:
+    """
+    Run a cleanup job, continuing after the IDs it already processed
+    :param job_ref: Reference to the job document
+    :param job_data: The job document's data
+    :param cleanup: Callable taking one ID and returning a dictionary of counts
+    :return: Final status, 'done' or 'failed'
+    """
+    ids = job_data['ids']
+    processed = job_data.get('processed', 0)
+    counts = dict(job_data.get('counts') or {})
+    # IDs that failed on an earlier run are retried first
+    pending = [(None, item['id']) for item in job_data.get('failed') or []]
+    pending.extend((index, ids[index]) for index in range(processed, len(ids)))
+    failed = []
+
+    def save(**extra):
+        try:
+            job_ref.update({
+                'processed': processed,
+                'counts': counts,
+                'failed': failed,
+                'updated_at': firestore.SERVER_TIMESTAMP,
+                **extra
+            })
+        except Exception as e:
+            print(f"Error saving cleanup job progress: {str(e)}")
+
+    save(status='running')
+    last_saved = time.monotonic()
+    for index, item_id in pending:
+        try:
+            for name, count in cleanup(item_id).items():
+                counts[name] = counts.get(name, 0) + count
+        except Exception as e:
+            print(f"Error cleaning up after {item_id}: {str(e)}")
+            failed.append({'id': item_id, 'message': str(e)})
+        if index is not None:
+            processed = index + 1
+        if time.monotonic() - last_saved >= PROGRESS_INTERVAL:
+            save()
+            last_saved = time.monotonic()
+
+    status = 'failed' if failed else 'done'
+    save(status=status, finished_at=firestore.SERVER_TIMESTAMP)
+    return status
+
+
+class CleanupJobRunner:
+    """Runs cleanup jobs on background threads, off the request path"""
+
+    def __init__(self, max_workers=1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cleanup-job')
+
+    def submit(self, job_ref, job_data, cleanup):
+        """
+        Queue a job for run_job
+        :return: Future resolving to the final status
+        """
+        return self._executor.submit(run_job, job_ref, job_data, cleanup)
@@ -0,0 +1,238 @@
+import bisect
+import threading
+import time
+import uuid
+from datetime import datetime
+
+
+def date_sort_key(value):
+    """Sort key for event dates that mirrors Firestore's ordering across value types"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, datetime):
+        return (2, value.timestamp())
+    return (3, str(value))
+
+
+class EventReplica:
+    """
+    In-process copy of the events collection kept current by a single
+    Firestore snapshot listener.
+
+    Documents are indexed by ID and by (date, ID) so list, detail and
+    date-range reads can be served from memory. Writes still go to
+    Firestore; the replica sees them when the listener delivers the change.
+    ``ready`` is only true once the initial snapshot has arrived, the
+    listener is alive, the last snapshot was delivered within ``max_lag``
+    seconds of its read time and the listener confirmed it is current in
+    the last ``max_idle`` seconds, so callers can fall back to Firestore
+    otherwise.
+    """
+
+    def __init__(self, collection_ref, max_lag=5.0, max_idle=300.0):
+        self._collection_ref = collection_ref
+        self.max_lag = max_lag
+        self.max_idle = max_idle
+        self._documents = {}
+        self._update_times = {}
+        self._date_index = []
+        self._sharded = set()
+        self.epoch = uuid.uuid4().hex[:8]
+        self._lock = threading.RLock()
+        self._loaded = threading.Event()
+        self._watch = None
+        self.lag = 0.0
+        self.changes_applied = 0
+        self.last_change_at = None
+        # Read time of the last snapshot and when the listener last confirmed
+        # the replica is current, both as Unix times
+        self.read_time = None
+        self.consistent_at = None
+        self._subscribers = []
+
+    def add_subscriber(self, callback):
+        """
+        Register a callback for changes after the initial load
+        :param callback: Called with a list of (event_id, old_data, new_data);
+                         old_data is None for additions, new_data None for removals
+        """
+        self._subscribers.append(callback)
+
+    def start(self):
+        """Attach the snapshot listener"""
+        if self._watch is None:
+            watch = self._collection_ref.on_snapshot(self._on_snapshot)
+            push = watch.push
+
+            def push_and_record(read_time, next_resume_token):
+                push(read_time, next_resume_token)
+                self._record_read_time(read_time)
+
+            # The listener only reports snapshots with changes. Hooking push also
+            # sees the empty ones Firestore sends to confirm an idle listener.
+            watch.push = push_and_record
+            self._watch = watch
+        return self
+
+    def stop(self):
+        """Detach the snapshot listener"""
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self._loaded.clear()
+
+    def wait_until_loaded(self, timeout=None):
+        return self._loaded.wait(timeout)
+
+    @property
+    def ready(self):
+        if not self._loaded.is_set() or self._watch is None:
+            return False
+        if not getattr(self._watch, 'is_active', True):
+            return False
+        return self.lag <= self.max_lag and self.staleness() <= self.max_idle
+
+    def staleness(self):
+        """Seconds since the listener last confirmed the replica is current"""
+        if self.consistent_at is None:
+            return float('inf')
+        return max(0.0, time.time() - self.consistent_at)
+
+    def _record_read_time(self, read_time):
+        """Note a consistent snapshot, with or without changes"""
+        if read_time is None:
+            return
+        received_at = time.time()
+        with self._lock:
+            self.read_time = read_time.timestamp()
+            if self._loaded.is_set():
+                # Delay between the snapshot being consistent and us applying it.
+                # Unlike document update times, this is not thrown off by
+                # changes redelivered after the listener reconnects.
+                self.lag = max(0.0, received_at - self.read_time)
+            self.consistent_at = received_at
+
+    def _on_snapshot(self, docs, changes, read_time):
+        received_at = time.time()
+        applied = []
+        with self._lock:
+            for change in changes:
+                document = change.document
+                old_data = self._remove(document.id)
+                new_data = None
+                if change.type.name != 'REMOVED':
+                    new_data = document.to_dict()
+                    self._insert(document.id, new_data, document.update_time)
+                applied.append((document.id, old_data, new_data))
+            self.changes_applied += len(changes)
+            if changes:
+                self.last_change_at = received_at
+            initial = not self._loaded.is_set()
+            if initial:
+                self.consistent_at = received_at
+        self._loaded.set()
+        if not initial:
+            self._record_read_time(read_time)
+
+        if initial or not applied:
+            return
+        for callback in self._subscribers:
+            try:
+                callback(applied)
+            except Exception as e:
+                print(f"Event replica subscriber failed: {str(e)}")
+
+    def _insert(self, event_id, event_data, update_time=None):
+        self._documents[event_id] = event_data
+        self._update_times[event_id] = update_time
+        if event_data.get('registration_layout') == 'sharded':
+            self._sharded.add(event_id)
+        bisect.insort(self._date_index, (date_sort_key(event_data.get('date')), event_id))
+
+    def _remove(self, event_id):
+        event_data = self._documents.pop(event_id, None)
+        if event_data is None:
+            return None
+        self._update_times.pop(event_id, None)
+        self._sharded.discard(event_id)
+        entry = (date_sort_key(event_data.get('date')), event_id)
+        index = bisect.bisect_left(self._date_index, entry)
+        if index < len(self._date_index) and self._date_index[index] == entry:
+            del self._date_index[index]
+        return event_data
+
+    def get(self, event_id):
+        """
+        Get one event's data
+        :return: Copy of the document data, or None if the event does not exist
+        """
+        with self._lock:
+            event_data = self._documents.get(event_id)
+            return dict(event_data) if event_data is not None else None
+
+    def get_with_update_time(self, event_id):
+        """
+        Get one event's data together with its document update time
+        :return: Tuple of (data copy or None, update time or None)
+        """
+        with self._lock:
+            event_data = self._documents.get(event_id)
+            if event_data is None:
+                return None, None
+            return dict(event_data), self._update_times.get(event_id)
+
+    @property
+    def version(self):
+        """
+        Identifies the current contents of the replica, None when sharded
+        events exist since their registrations change outside the replica
+        """
+        with self._lock:
+            if self._sharded:
+                return None
+            return f"{self.epoch}-{self.changes_applied}"
+
+    def scan(self, after=None, date_from=None, date_to=None, predicate=None, limit=None):
+        """
+        Iterate events in (date, id) order
+        :param after: Only events after this (date, id) position
+        :param date_from: Only events on or after this date
+        :param date_to: Only events on or before this date
+        :param predicate: Optional callable(event_id, event_data) filter
+        :param limit: Stop after this many matches
+        :return: List of (event_id, event_data) tuples, data copied
+        """
+        with self._lock:
+            if after is not None:
+                start = bisect.bisect_right(self._date_index, (date_sort_key(after[0]), after[1]))
+            elif date_from is not None:
+                start = bisect.bisect_left(self._date_index, (date_sort_key(date_from), ''))
+            else:
+                start = 0
+            upper = date_sort_key(date_to) if date_to is not None else None
+
+            results = []
+            for date_key, event_id in self._date_index[start:]:
+                if upper is not None and date_key > upper:
+                    break
+                if date_from is not None and date_key < date_sort_key(date_from):
+                    continue
+                event_data = self._documents[event_id]
+                if predicate is not None and not predicate(event_id, event_data):
+                    continue
+                results.append((event_id, dict(event_data)))
+                if limit and len(results) == limit:
+                    break
+            return results
+
+    def stats(self):
+        return {
+            'ready': self.ready,
+            'events': len(self._documents),
+            'lag_seconds': round(self.lag, 3),
+            'staleness_seconds': round(self.staleness(), 3) if self.consistent_at is not None else None,
+            'changes_applied': self.changes_applied,
+            'last_change_age_seconds': round(time.time() - self.last_change_at, 3) if self.last_change_at else None
+        }
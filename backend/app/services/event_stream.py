@@ -0,0 +1,196 @@
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+# Fields that change on every write and carry no information for clients
+_IGNORED_FIELDS = {'updated_at'}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def build_delta(event_id, old_data, new_data):
+    """
+    Describe one event change for stream clients
+    :param event_id: The event's ID
+    :param old_data: Document data before the change, None if it was created
+    :param new_data: Document data after the change, None if it was deleted
+    :return: Delta dictionary, or None if nothing clients care about changed
+    """
+    if new_data is None:
+        return {'id': event_id, 'type': 'removed'}
+    old_data = old_data or {}
+    changed = {
+        field: value for field, value in new_data.items()
+        if field not in _IGNORED_FIELDS and old_data.get(field) != value
+    }
+    if not changed and old_data:
+        return None
+    open_slots = new_data.get('open_slots')
+    if open_slots is None and 'required_workers' in new_data:
+        open_slots = new_data['required_workers'] - len(new_data.get('registered_workers') or [])
+    return {
+        'id': event_id,
+        'type': 'modified' if old_data else 'added',
+        'open_slots': open_slots,
+        'changed': changed
+    }
+
+
+class StreamClient:
+    """A connected client with a bounded queue of pending messages"""
+
+    def __init__(self, max_queue):
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def offer(self, message):
+        """Queue a message without blocking; a full queue marks the client as overflowed"""
+        if self.overflowed:
+            return
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            # Drop the backlog; the client is told to resync and disconnected
+            self.overflowed = True
+            while not self._queue.empty():
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    def next(self, timeout):
+        """
+        Wait for the next message
+        :return: Message string, or None if nothing arrived within timeout
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroadcaster:
+    """
+    Fans event deltas from the shared change listener out to SSE clients.
+
+    Message IDs are ``{epoch}-{sequence}`` where the epoch identifies this
+    process, so a ``Last-Event-ID`` from another process or one older than
+    the retained history results in a ``reset`` message telling the client
+    to reload instead of silently missing changes.
+    """
+
+    def __init__(self, max_queue=100, history_size=1000):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._max_queue = max_queue
+        self._history = deque(maxlen=history_size)
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self.published = 0
+        self.overflows = 0
+
+    def publish(self, changes):
+        """
+        Broadcast replica changes
+        :param changes: List of (event_id, old_data, new_data) from EventReplica
+        """
+        with self._lock:
+            for event_id, old_data, new_data in changes:
+                delta = build_delta(event_id, old_data, new_data)
+                if delta is None:
+                    continue
+                self._sequence += 1
+                message = format_message(
+                    f"{self.epoch}-{self._sequence}",
+                    'event',
+                    json.dumps(delta, default=_json_default)
+                )
+                self._history.append((self._sequence, message))
+                self.published += 1
+                for client in self._clients:
+                    was_overflowed = client.overflowed
+                    client.offer(message)
+                    if client.overflowed and not was_overflowed:
+                        self.overflows += 1
+
+    def subscribe(self, last_event_id=None):
+        """
+        Connect a client
+        :param last_event_id: The Last-Event-ID sent by a reconnecting client
+        :return: StreamClient with any missed messages already queued
+        """
+        client = StreamClient(self._max_queue)
+        with self._lock:
+            if last_event_id:
+                missed = self._missed_since(last_event_id)
+                if missed is None:
+                    client.offer(format_message(None, 'reset', '{}'))
+                else:
+                    for message in missed[-self._max_queue:]:
+                        client.offer(message)
+                    if len(missed) > self._max_queue:
+                        client.overflowed = True
+            self._clients.add(client)
+        return client
+
+    def _missed_since(self, last_event_id):
+        epoch, _, sequence = last_event_id.partition('-')
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        if sequence < self._sequence and (not self._history or self._history[0][0] > sequence + 1):
+            # Older than what we kept
+            return None
+        return [message for message_sequence, message in self._history if message_sequence > sequence]
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def stats(self):
+        return {
+            'clients': len(self._clients),
+            'published': self.published,
+            'overflows': self.overflows
+        }
+
+
+def format_message(message_id, event, data):
+    """Encode one Server-Sent Events message"""
+    lines = []
+    if message_id is not None:
+        lines.append(f"id: {message_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def stream_messages(broadcaster, client, heartbeat_interval, retry_ms=5000):
+    """
+    Generate the SSE body for one client
+    :param broadcaster: The EventBroadcaster the client is subscribed to
+    :param client: StreamClient returned by subscribe
+    :param heartbeat_interval: Seconds of silence before a heartbeat comment
+    :param retry_ms: Reconnect delay suggested to the browser
+    """
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        while True:
+            if client.overflowed:
+                yield format_message(None, 'reset', '{}')
+                return
+            message = client.next(timeout=heartbeat_interval)
+            if message is None:
+                yield f": heartbeat {int(time.time())}\n\n"
+            else:
+                yield message
+    finally:
+        broadcaster.unsubscribe(client)
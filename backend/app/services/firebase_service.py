@@ -1,36 +1,227 @@
 import os
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
-from datetime import datetime
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import json
 from ..models.user import User
 from ..models.event import Event
+from .cache import TTLCache
+from .pagination import encode_cursor, decode_cursor
+from .transactions import TransactionStats, TransactionContentionError, run_transaction
+from .event_replica import EventReplica, date_sort_key
+from ..utils.http_cache import version_etag, parse_version_etag
+from .event_stream import EventBroadcaster
+from .bulk_writes import commit_grouped_writes
+from .user_import import hash_password, provisioned_uid
+from .cleanup_jobs import (
+    CLEANUP_JOBS, DELETED_USERS, DELETED_EVENTS, UNFINISHED_STATUSES, CleanupJobRunner, is_abandoned, new_job, run_job
+)
+from .registration_shards import (
+    EMBEDDED, SHARDED, REGISTRATIONS, SHARDS, registration_id, shard_capacities
+)
+from ..utils.lazy_import import lazy_import
+from config.config import Config
 from functools import wraps
 from flask import request, jsonify
 
+# Imported on first use, not when the app is imported
+firebase_admin = lazy_import('firebase_admin')
+credentials = lazy_import('firebase_admin.credentials')
+firestore = lazy_import('firebase_admin.firestore')
+auth = lazy_import('firebase_admin.auth')
+exceptions = lazy_import('google.api_core.exceptions')
+
+# Field path Firestore uses to order and page by document ID
+DOCUMENT_ID = '__name__'
+
+# Maximum number of writes in one Firestore batch
+FIRESTORE_BATCH_LIMIT = 500
+
+# Deleted events, kept for delta sync clients
+TOMBSTONES = 'event_tombstones'
+
+# Maximum number of values in a Firestore 'in' filter
+FIRESTORE_IN_LIMIT = 30
+
+# auth.get_users accepts at most 100 identifiers per call
+AUTH_LOOKUP_BATCH_SIZE = 100
+
+# auth.import_users accepts at most 1000 users per call
+AUTH_IMPORT_BATCH_SIZE = 1000
+
+# Document read to open each Firestore channel at startup; it need not exist
+WARM_UP_DOCUMENT = ('events', '_warm_up')
+
+# Number of events hydrated at a time while streaming a listing
+STREAM_CHUNK_SIZE = 100
+
+# Document fields each API field of an event or user is built from, so
+# ?fields= can be pushed down to a Firestore projection
+EVENT_FIELD_SOURCES = {
+    'id': (),
+    'title': ('title',),
+    'description': ('description',),
+    'date': ('date',),
+    'required_workers': ('required_workers',),
+    'registered_workers': ('registered_workers',),
+    'registered_count': ('registered_count',),
+    'open_slots': ('required_workers', 'registered_count'),
+    'registration_layout': (),
+    'created_at': ('created_at',),
+}
+# Profile fields embedded in events with ?include=workers
+WORKER_PROFILE_FIELDS = frozenset({'id', 'name', 'email', 'role'})
+
+USER_FIELD_SOURCES = {
+    'id': (),
+    'email': (),
+    'name': ('name',),
+    'role': ('role',),
+    'created_at': ('created_at',),
+    'last_login': ('last_login',),
+    'registered_events': ('registered_events',),
+}
+
+class EventNotFoundError(LookupError):
+    """Raised when an operation targets an event that does not exist"""
+
+class PreconditionFailedError(Exception):
+    """Raised when an If-Match version no longer matches the stored event"""
+
+class RegistrationError(Exception):
+    """Raised when a registration change breaks the event's rules"""
+
 class FirebaseService:
     _instance = None
+    _instance_lock = threading.Lock()
+    _background_init = None
+    init_error = None
     
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(FirebaseService, cls).__new__(cls)
-            try:
-                firebase_admin.get_app()
-            except ValueError:
-                # Use the credentials file from the config directory
-                creds_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config', 'firebase-credentials.json')
-                if not os.path.exists(creds_path):
-                    raise FileNotFoundError(f"Firebase credentials file not found at: {creds_path}")
-                
-                print(f"Initializing Firebase with credentials from: {creds_path}")
-                cred = credentials.Certificate(creds_path)
-                firebase_admin.initialize_app(cred)
-            
-            # Initialize Firestore
-            cls._instance.db = firestore.client()
-                
+        if cls._instance is not None:
+            return cls._instance
+        with cls._instance_lock:
+            if cls._instance is None:
+                # Only publish a fully built instance, so a failed start can be retried
+                cls._instance = cls._create_instance()
         return cls._instance
 
+    @classmethod
+    def _create_instance(cls):
+        # Deferred: these pull in gRPC, google-cloud-firestore and the JWT stack
+        from .firestore_pool import get_firestore_client
+
+        instance = super(FirebaseService, cls).__new__(cls)
+        try:
+            firebase_admin.get_app()
+        except ValueError:
+            # Use the credentials file from the config directory
+            creds_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'config', 'firebase-credentials.json')
+            if not os.path.exists(creds_path):
+                raise FileNotFoundError(f"Firebase credentials file not found at: {creds_path}")
+            
+            print(f"Initializing Firebase with credentials from: {creds_path}")
+            cred = credentials.Certificate(creds_path)
+            firebase_admin.initialize_app(cred)
+        
+        # One Firestore client for the process, its RPCs spread over a pool of channels
+        instance.db = get_firestore_client(
+            firebase_admin.get_app(),
+            channels=Config.FIRESTORE_CHANNELS,
+            keepalive_time_ms=Config.FIRESTORE_KEEPALIVE_TIME_MS,
+            keepalive_timeout_ms=Config.FIRESTORE_KEEPALIVE_TIMEOUT_MS
+        )
+        instance.warmed_up = threading.Event()
+        instance.token_verifier = cls._create_token_verifier()
+        instance.user_cache = TTLCache(max_size=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL)
+        instance.auth_states = TTLCache(max_size=Config.USER_CACHE_SIZE, ttl=Config.AUTH_STATE_TTL)
+        instance.registration_stats = TransactionStats()
+        instance.event_replica = None
+        instance.event_broadcaster = None
+        instance._broadcaster_lock = threading.Lock()
+        instance.cleanup_runner = CleanupJobRunner(max_workers=Config.CLEANUP_JOB_WORKERS)
+        if Config.FIRESTORE_WARM_UP:
+            instance.start_warm_up()
+        else:
+            instance.warmed_up.set()
+        if Config.EVENT_REPLICA:
+            instance.start_event_replica()
+        return instance
+
+    @classmethod
+    def initialize_in_background(cls):
+        """
+        Create the service on a background thread, so the server can start
+        listening while Firebase initializes. Safe to call repeatedly; a
+        failed start is retried by the next call.
+        """
+        with cls._instance_lock:
+            thread = cls._background_init
+            if cls._instance is not None or (thread is not None and thread.is_alive()):
+                return
+
+            def initialize():
+                try:
+                    cls()
+                    cls.init_error = None
+                except Exception as e:
+                    print(f"Error initializing Firebase: {str(e)}")
+                    cls.init_error = str(e)
+
+            cls._background_init = threading.Thread(target=initialize, name='firebase-init', daemon=True)
+            cls._background_init.start()
+
+    @classmethod
+    def readiness(cls):
+        """
+        Whether the service is built and its Firestore channels are warm
+        :return: Tuple of (ready, dictionary describing each step)
+        """
+        instance = cls._instance
+        checks = {
+            'initialized': instance is not None,
+            'firestore_warmed_up': instance is not None and instance.warmed_up.is_set()
+        }
+        if Config.EVENT_REPLICA:
+            checks['event_replica'] = instance is not None and instance._replica_ready()
+        if cls.init_error and instance is None:
+            checks['last_error'] = cls.init_error
+        ready = checks['initialized'] and checks['firestore_warmed_up']
+        return ready, checks
+
+    def start_warm_up(self):
+        """Open every Firestore channel with a cheap read in the background, then set warmed_up"""
+        def warm_up():
+            collection, document = WARM_UP_DOCUMENT
+            warmed = self.db.warm_up(lambda db: db.collection(collection).document(document).get(field_paths=['date']))
+            print(f"Warmed up {warmed} Firestore channels")
+            self.warmed_up.set()
+
+        threading.Thread(target=warm_up, name='firestore-warm-up', daemon=True).start()
+
+    def firestore_stats(self):
+        """Utilization of the Firestore channel pool"""
+        return {'warmed_up': self.warmed_up.is_set(), **self.db.pool_stats()}
+
+    @staticmethod
+    def _create_token_verifier():
+        """
+        Build the local ID token verifier
+        :return: TokenVerifier, or None to fall back to auth.verify_id_token
+        """
+        if not Config.LOCAL_TOKEN_VERIFICATION:
+            return None
+        project_id = Config.FIREBASE_PROJECT_ID or firebase_admin.get_app().project_id
+        if not project_id:
+            print("No Firebase project ID available, using auth.verify_id_token")
+            return None
+        from .token_verifier import TokenVerifier, get_signing_key_cache
+
+        key_cache = get_signing_key_cache(refresh_margin=Config.TOKEN_KEY_REFRESH_MARGIN)
+        return TokenVerifier(project_id, key_cache=key_cache, cache_size=Config.TOKEN_CACHE_SIZE)
+
     def verify_token(self, id_token):
         """
         Verify the Firebase ID token
@@ -38,6 +229,8 @@ class FirebaseService:
         :return: The decoded token if valid, None otherwise
         """
         try:
+            if self.token_verifier is not None:
+                return self.token_verifier.verify(id_token)
             decoded_token = auth.verify_id_token(id_token)
             return decoded_token
         except Exception as e:
@@ -66,32 +259,282 @@ class FirebaseService:
             print(f"Error getting user by ID: {str(e)}")
             return None
 
+    def _replica_ready(self):
+        # The SSE broadcaster starts the listener too, but reads only use it when enabled
+        return Config.EVENT_REPLICA and self.event_replica is not None and self.event_replica.ready
+
+    def start_event_replica(self):
+        """
+        Start the in-memory events replica
+        :return: The EventReplica
+        """
+        if self.event_replica is None:
+            self.event_replica = EventReplica(
+                self.db.collection('events'),
+                max_lag=Config.EVENT_REPLICA_MAX_LAG,
+                max_idle=Config.EVENT_REPLICA_MAX_IDLE
+            ).start()
+        return self.event_replica
+
+    def get_event_broadcaster(self):
+        """
+        Get the broadcaster feeding /api/events/stream, starting the replica
+        listener it shares on first use. Reads are only served from that
+        replica when EVENT_REPLICA is on.
+        :return: EventBroadcaster
+        """
+        with self._broadcaster_lock:
+            if self.event_broadcaster is None:
+                broadcaster = EventBroadcaster(
+                    max_queue=Config.EVENT_STREAM_QUEUE_SIZE,
+                    history_size=Config.EVENT_STREAM_HISTORY_SIZE
+                )
+                self.start_event_replica().add_subscriber(broadcaster.publish)
+                self.event_broadcaster = broadcaster
+            return self.event_broadcaster
+
     def get_all_events(self):
         """
         Get all events from Firestore
         :return: List of Event objects
         """
         try:
+            if self._replica_ready():
+                events = [self._event_from_data(event_id, event_data) for event_id, event_data in self.event_replica.scan()]
+                return self._hydrate_registrations(events)
+
             events = []
             events_ref = self.db.collection('events').stream()
             
             for event_doc in events_ref:
-                event_data = event_doc.to_dict()
-                event = Event(
-                    id=event_doc.id,
-                    title=event_data.get('title'),
-                    description=event_data.get('description'),
-                    date=event_data.get('date'),
-                    required_workers=event_data.get('required_workers', 0),
-                    registered_workers=event_data.get('registered_workers', [])
-                )
-                events.append(event)
+                events.append(self._event_from_doc(event_doc))
             
-            return events
+            return self._hydrate_registrations(events)
         except Exception as e:
             print(f"Error getting all events: {str(e)}")
             return []
 
+    def get_events_page(self, limit=None, cursor=None, date_from=None, date_to=None, needs_workers=False,
+                        registered_worker=None, fields=None):
+        """
+        Get events ordered by date, filtered and paginated in Firestore
+        :param limit: Maximum number of events to return, all matches if None
+        :param cursor: Cursor returned with the previous page
+        :param date_from: Only events on or after this date
+        :param date_to: Only events on or before this date
+        :param needs_workers: Only events with open slots
+        :param registered_worker: Only events this user ID is registered for
+        :param fields: Set of API fields to load and serialize, None for all
+        :return: Tuple of (list of Event objects, next cursor or None), (None, None) if the query failed
+        :raises InvalidCursorError: If the cursor is malformed
+        """
+        position = decode_cursor(cursor) if cursor else None
+
+        try:
+            if self._replica_ready():
+                events = self._events_page_from_replica(
+                    limit, position, date_from, date_to, needs_workers, registered_worker, fields
+                )
+            else:
+                query = self.db.collection('events')
+                if registered_worker:
+                    query = query.where('registered_workers', 'array_contains', registered_worker)
+                if needs_workers:
+                    query = query.where('open_slots', '>', 0)
+                if date_from:
+                    query = query.where('date', '>=', date_from)
+                if date_to:
+                    query = query.where('date', '<=', date_to)
+                query = query.order_by('date').order_by(DOCUMENT_ID)
+                if fields is not None:
+                    query = query.select(self._event_field_paths(fields))
+                if position:
+                    query = query.start_after(position)
+                if limit:
+                    query = query.limit(limit)
+                events = [self._event_from_doc(event_doc, fields) for event_doc in query.stream()]
+
+            events = self._hydrate_registrations(events)
+            if registered_worker:
+                events = self._merge_sharded_registrations(
+                    events, registered_worker, limit, cursor, date_from, date_to, fields
+                )
+        except Exception as e:
+            print(f"Error getting events page: {str(e)}")
+            return None, None
+
+        next_cursor = None
+        if limit and len(events) == limit:
+            last = events[-1]
+            next_cursor = encode_cursor({'date': last.date, DOCUMENT_ID: last.id})
+        return events, next_cursor
+
+    def _events_page_from_replica(self, limit, position, date_from, date_to, needs_workers, registered_worker,
+                                  fields=None):
+        """Answer a get_events_page query from the in-memory replica"""
+        def matches(event_id, event_data):
+            if needs_workers and self._stored_open_slots(event_data) <= 0:
+                return False
+            if event_data.get('registration_layout') == SHARDED:
+                # Registrations of sharded events are resolved after the scan
+                return not registered_worker
+            return not registered_worker or registered_worker in (event_data.get('registered_workers') or [])
+
+        after = (position.get('date'), position.get(DOCUMENT_ID)) if position else None
+        return [
+            self._event_from_data(event_id, event_data, fields)
+            for event_id, event_data in self.event_replica.scan(
+                after=after, date_from=date_from, date_to=date_to, predicate=matches, limit=limit
+            )
+        ]
+
+    def iter_events(self, date_from=None, date_to=None, needs_workers=False, fields=None):
+        """
+        Lazily iterate events in (date, id) order for streamed responses.
+        Unlike get_events_page nothing is collected up front: documents are
+        read from the query stream (or the replica) one chunk at a time.
+        :param date_from: Only events on or after this date
+        :param date_to: Only events on or before this date
+        :param needs_workers: Only events with open slots
+        :param fields: Set of API fields to load and serialize, None for all
+        :return: Generator of Event objects
+        """
+        for chunk in self._iter_event_chunks(date_from, date_to, needs_workers, fields):
+            yield from self._hydrate_registrations(chunk)
+
+    def _iter_event_chunks(self, date_from, date_to, needs_workers, fields):
+        """Yield lists of at most STREAM_CHUNK_SIZE unhydrated events"""
+        if self._replica_ready():
+            after = None
+            while True:
+                rows = self.event_replica.scan(
+                    after=after, date_from=date_from, date_to=date_to, limit=STREAM_CHUNK_SIZE,
+                    predicate=lambda event_id, event_data: not needs_workers or self._stored_open_slots(event_data) > 0
+                )
+                if not rows:
+                    return
+                yield [self._event_from_data(event_id, event_data, fields) for event_id, event_data in rows]
+                if len(rows) < STREAM_CHUNK_SIZE:
+                    return
+                after = (rows[-1][1].get('date'), rows[-1][0])
+
+        query = self.db.collection('events')
+        if needs_workers:
+            query = query.where('open_slots', '>', 0)
+        if date_from:
+            query = query.where('date', '>=', date_from)
+        if date_to:
+            query = query.where('date', '<=', date_to)
+        query = query.order_by('date').order_by(DOCUMENT_ID)
+        if fields is not None:
+            query = query.select(self._event_field_paths(fields))
+        chunk = []
+        for event_doc in query.stream():
+            chunk.append(self._event_from_doc(event_doc, fields))
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _merge_sharded_registrations(self, events, user_id, limit, cursor, date_from, date_to, fields=None):
+        """
+        Add the sharded-layout events a worker is registered for to an
+        array_contains page. The worker's own registrations are few, so they
+        are filtered and positioned against the page in Python.
+        """
+        registrations = self.db.collection(REGISTRATIONS).where('user_id', '==', user_id).stream()
+        event_ids = [registration.get('event_id') for registration in registrations]
+        if not event_ids:
+            return events
+
+        after = None
+        if cursor:
+            position = decode_cursor(cursor)
+            after = (position.get('date'), position.get(DOCUMENT_ID))
+        def position_of(event):
+            # Events without a date sort first, as null does in Firestore
+            return date_sort_key(event.date), event.id
+
+        sharded = [
+            event for event in self.get_events_by_ids(event_ids, fields)
+            if event.registration_layout == SHARDED
+            and (not date_from or date_sort_key(event.date) >= date_sort_key(date_from))
+            and (not date_to or date_sort_key(event.date) <= date_sort_key(date_to))
+            and (after is None or position_of(event) > (date_sort_key(after[0]), after[1]))
+        ]
+        merged = sorted(events + sharded, key=position_of)
+        if limit and len(events) == limit:
+            # Don't return sharded events that sort after the last queried one
+            last = position_of(events[-1])
+            merged = [event for event in merged if position_of(event) <= last]
+        return merged[:limit] if limit else merged
+
+    def _hydrate_registrations(self, events):
+        """
+        Fill registered_workers for sharded-layout events from the registrations collection
+        :param events: List of Event objects
+        :return: The same list
+        """
+        sharded = {event.id: event for event in events if event.registration_layout == SHARDED}
+        event_ids = list(sharded)
+        for start in range(0, len(event_ids), FIRESTORE_IN_LIMIT):
+            query = self.db.collection(REGISTRATIONS).where('event_id', 'in', event_ids[start:start + FIRESTORE_IN_LIMIT])
+            for registration in query.stream():
+                sharded[registration.get('event_id')].registered_workers.append(registration.get('user_id'))
+        return events
+
+    @staticmethod
+    def _stored_open_slots(event_data):
+        """open_slots as the needs_workers query sees it, counted for events stored before it was"""
+        if 'open_slots' in event_data:
+            return event_data['open_slots']
+        return event_data.get('required_workers', 0) - len(event_data.get('registered_workers') or [])
+
+    @classmethod
+    def _event_from_doc(cls, event_doc, fields=None) -> Event:
+        """Build an Event from a Firestore document snapshot"""
+        return cls._event_from_data(event_doc.id, event_doc.to_dict(), fields)
+
+    @staticmethod
+    def _event_from_data(event_id, event_data, fields=None) -> Event:
+        """
+        Build an Event from an event ID and its document data
+        :param fields: Set of API fields the event is serialized with, None for all
+        """
+        registered_workers = event_data.get('registered_workers') or []
+        registered_count = None
+        layout = event_data.get('registration_layout', EMBEDDED)
+        if fields is not None and 'registered_workers' not in fields and layout != SHARDED:
+            # Count from the stored field instead of carrying the array
+            registered_count = event_data.get('registered_count', len(registered_workers))
+            registered_workers = []
+        event = Event(
+            id=event_id,
+            title=event_data.get('title'),
+            description=event_data.get('description'),
+            date=event_data.get('date'),
+            required_workers=event_data.get('required_workers', 0),
+            registered_workers=list(registered_workers),
+            registration_layout=layout,
+            registered_count=registered_count
+        )
+        event.created_at = event_data.get('created_at')
+        event.fields = fields
+        return event
+
+    @staticmethod
+    def _event_field_paths(fields):
+        """
+        Firestore projection for a set of event API fields
+        :return: Sorted field paths; date and registration_layout are always
+                 included for ordering, cursors and sharded hydration
+        """
+        paths = {'date', 'registration_layout'}
+        for field in fields:
+            paths.update(EVENT_FIELD_SOURCES[field])
+        return sorted(paths)
+
     def get_event(self, event_id):
         """
         Get an event from Firestore by ID
@@ -99,22 +542,118 @@ class FirebaseService:
         :return: Event object if found, None otherwise
         """
         try:
+            if self._replica_ready():
+                event_data = self.event_replica.get(event_id)
+                if event_data is None:
+                    return None
+                return self._hydrate_registrations([self._event_from_data(event_id, event_data)])[0]
+
             event_doc = self.db.collection('events').document(event_id).get()
             if event_doc.exists:
-                event_data = event_doc.to_dict()
-                return Event(
-                    id=event_id,
-                    title=event_data.get('title'),
-                    description=event_data.get('description'),
-                    date=event_data.get('date'),
-                    required_workers=event_data.get('required_workers', 0),
-                    registered_workers=event_data.get('registered_workers', [])
-                )
+                return self._hydrate_registrations([self._event_from_doc(event_doc)])[0]
             return None
         except Exception as e:
             print(f"Error getting event: {str(e)}")
             return None
 
+    def get_event_versioned(self, event_id, fields=None):
+        """
+        Get an event's version without building the Event, so a conditional
+        request can be answered before hydration
+        :param event_id: The event's ID
+        :param fields: Set of API fields to load and serialize, None for all
+        :return: Tuple of (version ETag or None, whether the version covers the
+                 registrations, callable returning the Event or None)
+        """
+        try:
+            if self._replica_ready():
+                event_data, update_time = self.event_replica.get_with_update_time(event_id)
+            else:
+                field_paths = self._event_field_paths(fields) if fields is not None else None
+                event_doc = self.db.collection('events').document(event_id).get(field_paths=field_paths)
+                event_data = event_doc.to_dict() if event_doc.exists else None
+                update_time = event_doc.update_time if event_doc.exists else None
+        except Exception as e:
+            print(f"Error getting event: {str(e)}")
+            return None, False, lambda: None
+
+        if event_data is None:
+            return None, False, lambda: None
+        # Sharded registrations change without touching the event document
+        covers_registrations = event_data.get('registration_layout') != SHARDED
+        return (
+            version_etag(update_time),
+            covers_registrations,
+            lambda: self._hydrate_registrations([self._event_from_data(event_id, event_data, fields)])[0]
+        )
+
+    def events_list_version(self):
+        """
+        Version of the whole events collection, available when served from the replica
+        :return: Version string, or None if it can't be determined without a query
+        """
+        if self._replica_ready():
+            return self.event_replica.version
+        return None
+
+    def get_events_by_ids(self, event_ids, fields=None):
+        """
+        Get several events in a single batched read
+        :param event_ids: List of event IDs
+        :param fields: Set of API fields to load and serialize, None for all
+        :return: List of Event objects in the order of event_ids, skipping missing events
+        """
+        if not event_ids:
+            return []
+        try:
+            if self._replica_ready():
+                events = {}
+                for event_id in dict.fromkeys(event_ids):
+                    event_data = self.event_replica.get(event_id)
+                    if event_data is not None:
+                        events[event_id] = self._event_from_data(event_id, event_data, fields)
+            else:
+                refs = [self.db.collection('events').document(event_id) for event_id in dict.fromkeys(event_ids)]
+                field_paths = self._event_field_paths(fields) if fields is not None else None
+                events = {
+                    event_doc.id: self._event_from_doc(event_doc, fields)
+                    for event_doc in self.db.get_all(refs, field_paths=field_paths)
+                    if event_doc.exists
+                }
+            self._hydrate_registrations(list(events.values()))
+            return [events[event_id] for event_id in event_ids if event_id in events]
+        except Exception as e:
+            print(f"Error getting events by IDs: {str(e)}")
+            return []
+
+    def embed_workers(self, events, fields=None):
+        """
+        Attach the registered workers' profiles to events, resolving every
+        worker of every event with one batched profile read and batched Auth
+        lookups, no matter how many events or registrations there are
+        :param events: List of Event objects with registered_workers loaded
+        :param fields: Fields the events are serialized with, replacing the
+                       ones they were loaded with
+        :return: The same list
+        """
+        worker_ids = [user_id for event in events for user_id in event.registered_workers]
+        profiles = {user.id: user for user in self.get_users_by_ids(worker_ids, WORKER_PROFILE_FIELDS)}
+        for event in events:
+            event.workers = [profiles[user_id] for user_id in event.registered_workers if user_id in profiles]
+            event.fields = fields
+        return events
+
+    def iter_embedding_workers(self, events, fields=None):
+        """embed_workers for a lazily iterated listing, one STREAM_CHUNK_SIZE chunk at a time"""
+        chunk = []
+        for event in events:
+            chunk.append(event)
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield from self.embed_workers(chunk, fields)
+                chunk = []
+        if chunk:
+            yield from self.embed_workers(chunk, fields)
+
     def create_event(self, event):
         """
         Create a new event in Firestore
@@ -123,128 +662,811 @@ class FirebaseService:
         """
         try:
             event_ref = self.db.collection('events').document()
-            event_ref.set({
-                'title': event.title,
-                'description': event.description,
-                'date': event.date,
-                'required_workers': event.required_workers,
-                'registered_workers': [],
-                'created_at': firestore.SERVER_TIMESTAMP
-            })
+            writes = self._new_event_writes(event_ref, event)
+            if len(writes) == 1:
+                event_ref.set(writes[0][2])
+                return event_ref.id
+
+            # Create the event and its counter shards together
+            batch = self.db.batch()
+            for _, ref, data in writes:
+                batch.set(ref, data)
+            batch.commit()
             return event_ref.id
         except Exception as e:
             print(f"Error creating event: {str(e)}")
             return None
 
-    def update_event(self, event_id, event_data):
+    @staticmethod
+    def _new_event_writes(event_ref, event):
+        """
+        Writes that create an event
+        :param event_ref: Reference of the new event document
+        :param event: Event object
+        :return: List of ('set', reference, data); sharded events include their counter shards
+        """
+        event_data = {
+            'title': event.title,
+            'description': event.description,
+            'date': event.date,
+            'required_workers': event.required_workers,
+            'registered_workers': [],
+            'registered_count': 0,
+            'open_slots': event.required_workers,
+            'registration_layout': event.registration_layout,
+            'created_at': firestore.SERVER_TIMESTAMP,
+            'updated_at': firestore.SERVER_TIMESTAMP
+        }
+        if event.registration_layout != SHARDED:
+            return [('set', event_ref, event_data)]
+
+        shard_count = Config.REGISTRATION_SHARDS
+        writes = [('set', event_ref, {**event_data, 'registration_shards': shard_count})]
+        capacities = shard_capacities([0] * shard_count, event.required_workers)
+        for index, capacity in enumerate(capacities):
+            writes.append(('set', event_ref.collection(SHARDS).document(str(index)), {'count': 0, 'capacity': capacity}))
+        return writes
+
+    def create_events(self, events):
+        """
+        Create many events with batched writes
+        :param events: List of validated Event objects
+        :return: List of result dictionaries in input order, each with the event
+                 'id' and a 'status' of 'created' or 'failed' (with a 'message')
+        """
+        collection = self.db.collection('events')
+        refs = [collection.document() for _ in events]
+        groups = [(index, self._new_event_writes(ref, event)) for index, (ref, event) in enumerate(zip(refs, events))]
+        errors = commit_grouped_writes(self.db, groups, FIRESTORE_BATCH_LIMIT, Config.BULK_WRITE_CONCURRENCY)
+        return [self._bulk_result(ref.id, 'created', errors[index]) for index, ref in enumerate(refs)]
+
+    def update_events(self, updates):
+        """
+        Update many events with batched writes
+        :param updates: List of (event ID, dictionary of fields to update), IDs unique
+        :return: List of result dictionaries in input order, each with the event
+                 'id' and a 'status' of 'updated', 'not_found' or 'failed' (with a 'message')
+        """
+        collection = self.db.collection('events')
+        refs = [collection.document(event_id) for event_id, _ in updates]
+        try:
+            existing = self._existing_ids(refs)
+        except Exception as e:
+            print(f"Error reading events to update: {str(e)}")
+            return [self._bulk_result(event_id, 'updated', str(e)) for event_id, _ in updates]
+        results = [None] * len(updates)
+        groups = []
+        capacity_changes = []
+        for index, (event_id, event_data) in enumerate(updates):
+            if event_id not in existing:
+                results[index] = {'id': event_id, 'status': 'not_found'}
+            elif 'required_workers' in event_data:
+                capacity_changes.append(index)
+            else:
+                groups.append((index, [('update', refs[index], {**event_data, 'updated_at': firestore.SERVER_TIMESTAMP})]))
+
+        errors = commit_grouped_writes(self.db, groups, FIRESTORE_BATCH_LIMIT, Config.BULK_WRITE_CONCURRENCY)
+        for index, error in errors.items():
+            results[index] = self._bulk_result(refs[index].id, 'updated', error)
+
+        # open_slots depends on the current registrations, so capacity changes
+        # still go through one transaction per event, run concurrently
+        def change_capacity(index):
+            try:
+                self._update_event_capacity(refs[index], updates[index][1])
+                return index, None
+            except Exception as e:
+                print(f"Error updating event capacity: {str(e)}")
+                return index, str(e)
+
+        if capacity_changes:
+            with ThreadPoolExecutor(max_workers=min(Config.BULK_WRITE_CONCURRENCY, len(capacity_changes))) as executor:
+                for index, error in executor.map(change_capacity, capacity_changes):
+                    results[index] = self._bulk_result(refs[index].id, 'updated', error)
+        return results
+
+    def delete_events(self, event_ids):
+        """
+        Delete many events with batched writes, leaving tombstones like delete_event
+        :param event_ids: List of unique event IDs
+        :return: Tuple of (list of result dictionaries in input order, each with the event
+                 'id' and a 'status' of 'deleted', 'not_found' or 'failed' (with a 'message'),
+                 ID of the cleanup job or None if nothing was deleted)
+        """
+        collection = self.db.collection('events')
+        refs = [collection.document(event_id) for event_id in event_ids]
+        try:
+            existing = self._existing_ids(refs)
+            if not existing:
+                return [{'id': event_id, 'status': 'not_found'} for event_id in event_ids], None
+            # Recorded before deleting so a crash can't lose the cleanup; the job
+            # skips any event whose delete did not go through
+            job_ref, job_data = self._new_cleanup_job(DELETED_EVENTS, [event_id for event_id in event_ids if event_id in existing])
+            job_ref.set(job_data)
+        except Exception as e:
+            print(f"Error preparing bulk delete: {str(e)}")
+            return [self._bulk_result(event_id, 'deleted', str(e)) for event_id in event_ids], None
+        expire_at = datetime.now(timezone.utc) + timedelta(days=Config.TOMBSTONE_RETENTION_DAYS)
+        groups = [
+            (event_id, [
+                ('delete', ref, None),
+                ('set', self.db.collection(TOMBSTONES).document(event_id), {
+                    'event_id': event_id,
+                    'deleted_at': firestore.SERVER_TIMESTAMP,
+                    'expire_at': expire_at
+                })
+            ])
+            for event_id, ref in zip(event_ids, refs) if event_id in existing
+        ]
+        errors = commit_grouped_writes(self.db, groups, FIRESTORE_BATCH_LIMIT, Config.BULK_WRITE_CONCURRENCY)
+        self._start_cleanup_job(job_ref, job_data)
+        return [
+            self._bulk_result(event_id, 'deleted', errors[event_id]) if event_id in existing
+            else {'id': event_id, 'status': 'not_found'}
+            for event_id in event_ids
+        ], job_ref.id
+
+    def _existing_ids(self, refs, field_path='registration_layout'):
+        """
+        IDs of the referenced documents that exist, checked with one batched read
+        :param field_path: Single field to read, keeping the documents small
+        """
+        if not refs:
+            return set()
+        return {doc.id for doc in self.db.get_all(refs, field_paths=[field_path]) if doc.exists}
+
+    @staticmethod
+    def _bulk_result(document_id, status, error):
+        if error is not None:
+            return {'id': document_id, 'status': 'failed', 'message': error}
+        return {'id': document_id, 'status': status}
+
+    def update_event(self, event_id, event_data, if_match=None):
         """
         Update an event in Firestore
         :param event_id: The event's ID
         :param event_data: Dictionary of fields to update
+        :param if_match: Optional version ETag the event must still have
         :return: True if successful, False otherwise
+        :raises PreconditionFailedError: If the event changed since if_match
         """
+        last_update_time = None
+        if if_match is not None:
+            last_update_time = parse_version_etag(if_match)
+            if last_update_time is None:
+                raise PreconditionFailedError("Malformed If-Match version")
         try:
             event_ref = self.db.collection('events').document(event_id)
+            if 'required_workers' in event_data:
+                # open_slots depends on the current registrations, so read them in a transaction
+                self._update_event_capacity(event_ref, event_data, last_update_time)
+                return True
+            # With a precondition Firestore checks the version as part of the write
+            option = self.db.write_option(last_update_time=last_update_time) if last_update_time else None
             event_ref.update({
                 **event_data,
                 'updated_at': firestore.SERVER_TIMESTAMP
-            })
+            }, option=option)
             return True
+        except PreconditionFailedError:
+            raise
+        except exceptions.FailedPrecondition:
+            raise PreconditionFailedError("Event was modified since it was read")
         except Exception as e:
             print(f"Error updating event: {str(e)}")
             return False
 
+    def _update_event_capacity(self, event_ref, event_data, last_update_time=None):
+        @firestore.transactional
+        def update_in_transaction(transaction):
+            snapshot = event_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                raise ValueError(f"Event {event_ref.id} not found")
+            if (last_update_time is not None
+                    and parse_version_etag(version_etag(snapshot.update_time)) != last_update_time):
+                raise PreconditionFailedError("Event was modified since it was read")
+            current = snapshot.to_dict()
+            if current.get('registration_layout') == SHARDED:
+                # Give the new capacity to the counter shards
+                shard_refs = [
+                    event_ref.collection(SHARDS).document(str(index))
+                    for index in range(current.get('registration_shards', 0))
+                ]
+                shards = {shard.id: shard for shard in transaction.get_all(shard_refs)}
+                counts = [shards[shard_ref.id].get('count') for shard_ref in shard_refs]
+                for shard_ref, count, capacity in zip(shard_refs, counts, shard_capacities(counts, event_data['required_workers'])):
+                    transaction.set(shard_ref, {'count': count, 'capacity': capacity})
+                transaction.update(event_ref, {
+                    **event_data,
+                    'registered_count': sum(counts),
+                    'open_slots': event_data['required_workers'] - sum(counts),
+                    'updated_at': firestore.SERVER_TIMESTAMP
+                })
+                return
+            registered = len(current.get('registered_workers') or [])
+            transaction.update(event_ref, {
+                **event_data,
+                'registered_count': registered,
+                'open_slots': event_data['required_workers'] - registered,
+                'updated_at': firestore.SERVER_TIMESTAMP
+            })
+
+        update_in_transaction(self.db.transaction())
+
+    def backfill_open_slots(self):
+        """
+        Set open_slots, registered_count and updated_at on events created before they were
+        maintained, and a null date where it is missing, since queries ordered by date skip
+        documents without the field. Sharded events are recounted from their shards.
+        :return: Number of events updated
+        """
+        updated = 0
+        pending = 0
+        batch = self.db.batch()
+        for event_doc in self.db.collection('events').stream():
+            event_data = event_doc.to_dict()
+            changes = {}
+            if 'date' not in event_data:
+                changes['date'] = None
+            if event_data.get('registration_layout') == SHARDED:
+                if self.refresh_sharded_counts(event_doc.id) and not changes:
+                    updated += 1
+            else:
+                registered = len(event_data.get('registered_workers') or [])
+                open_slots = event_data.get('required_workers', 0) - registered
+                if (event_data.get('open_slots') != open_slots or event_data.get('registered_count') != registered
+                        or not event_data.get('updated_at')):
+                    changes.update({
+                        'open_slots': open_slots,
+                        'registered_count': registered,
+                        'updated_at': event_data.get('updated_at') or event_data.get('created_at') or firestore.SERVER_TIMESTAMP
+                    })
+            if not changes:
+                continue
+            batch.update(event_doc.reference, changes)
+            updated += 1
+            pending += 1
+            if pending == FIRESTORE_BATCH_LIMIT:
+                batch.commit()
+                batch = self.db.batch()
+                pending = 0
+        if pending:
+            batch.commit()
+        return updated
+
     def delete_event(self, event_id):
         """
-        Delete an event from Firestore
+        Delete an event from Firestore; references to it are removed by a cleanup job
         :param event_id: The event's ID
-        :return: True if successful, False otherwise
+        :return: ID of the cleanup job if successful, None otherwise
         """
         try:
-            self.db.collection('events').document(event_id).delete()
-            return True
+            job_ref, job_data = self._new_cleanup_job(DELETED_EVENTS, [event_id])
+            # Leave a tombstone so delta sync clients learn about the delete
+            batch = self.db.batch()
+            batch.delete(self.db.collection('events').document(event_id))
+            batch.set(self.db.collection(TOMBSTONES).document(event_id), {
+                'event_id': event_id,
+                'deleted_at': firestore.SERVER_TIMESTAMP,
+                'expire_at': datetime.now(timezone.utc) + timedelta(days=Config.TOMBSTONE_RETENTION_DAYS)
+            })
+            batch.set(job_ref, job_data)
+            batch.commit()
+            self._start_cleanup_job(job_ref, job_data)
+            return job_ref.id
         except Exception as e:
             print(f"Error deleting event: {str(e)}")
-            return False
+            return None
+
+    def _new_cleanup_job(self, kind, ids):
+        """
+        Build a cleanup job for deleted users or events
+        :return: Tuple of (job document reference, job data to write)
+        """
+        return self.db.collection(CLEANUP_JOBS).document(), new_job(kind, ids, Config.CLEANUP_JOB_RETENTION_DAYS)
+
+    def _start_cleanup_job(self, job_ref, job_data):
+        """Run a cleanup job that has been written, in the background"""
+        return self.cleanup_runner.submit(job_ref, job_data, self._cleanup_function(job_data['kind']))
+
+    def _cleanup_function(self, kind):
+        return self._cleanup_deleted_user if kind == DELETED_USERS else self._cleanup_deleted_event
+
+    def get_cleanup_job(self, job_id):
+        """
+        Get the progress of a cleanup job
+        :param job_id: The job's ID
+        :return: Dictionary of the job's state without its ID list, None if not found
+        """
+        job_doc = self.db.collection(CLEANUP_JOBS).document(job_id).get()
+        if not job_doc.exists:
+            return None
+        job_data = job_doc.to_dict()
+        job_data.pop('ids', None)
+        return {'id': job_doc.id, **job_data}
+
+    def resume_cleanup_jobs(self):
+        """
+        Run every failed cleanup job, and every queued or running one whose
+        worker stopped saving progress, again in this thread
+        :return: List of (job ID, final status)
+        """
+        query = self.db.collection(CLEANUP_JOBS).where('status', 'in', UNFINISHED_STATUSES)
+        results = []
+        for job_doc in query.stream():
+            job_data = job_doc.to_dict()
+            if not is_abandoned(job_data, Config.CLEANUP_JOB_LEASE_SECONDS):
+                continue
+            try:
+                # Claim the job, unless another worker saved it since we read it
+                job_doc.reference.update(
+                    {'status': 'running', 'updated_at': firestore.SERVER_TIMESTAMP},
+                    option=self.db.write_option(last_update_time=job_doc.update_time)
+                )
+            except Exception as e:
+                print(f"Skipping cleanup job {job_doc.id}: {str(e)}")
+                continue
+            results.append((job_doc.id, run_job(job_doc.reference, job_data, self._cleanup_function(job_data.get('kind')))))
+        return results
+
+    def _cleanup_deleted_user(self, user_id):
+        """
+        Remove a deleted user from event rosters and release their sharded registrations
+        :return: Dictionary of counts of the documents fixed
+        """
+        events = self.db.collection('events')
+
+        def leave_rosters(event_docs):
+            writes = []
+            for event_doc in event_docs:
+                event = self._event_from_doc(event_doc)
+                event.registered_workers = [worker for worker in event.registered_workers if worker != user_id]
+                event.registered_count = len(event.registered_workers)
+                writes.append(('update', event_doc.reference, {
+                    'registered_workers': event.registered_workers,
+                    'registered_count': event.registered_count,
+                    'open_slots': event.open_slots(),
+                    'updated_at': firestore.SERVER_TIMESTAMP
+                }, self.db.write_option(last_update_time=event_doc.update_time)))
+            return writes
+
+        released_events = set()
+
+        def release_registrations(registration_docs):
+            shard_refs = {}
+            for registration in registration_docs:
+                registration_data = registration.to_dict()
+                if registration_data.get('event_id') and registration_data.get('shard') is not None:
+                    released_events.add(registration_data['event_id'])
+                    shard_refs[registration.id] = events.document(registration_data['event_id']) \
+                        .collection(SHARDS).document(str(registration_data['shard']))
+            # Shards of events deleted in the meantime are gone with them
+            existing_shards = {
+                shard.reference.path
+                for shard in self.db.get_all(list(shard_refs.values()), field_paths=['count'])
+                if shard.exists
+            } if shard_refs else set()
+            writes = []
+            for registration in registration_docs:
+                writes.append(('delete', registration.reference, None,
+                               self.db.write_option(last_update_time=registration.update_time)))
+                shard_ref = shard_refs.get(registration.id)
+                if shard_ref is not None and shard_ref.path in existing_shards:
+                    writes.append(('update', shard_ref, {'count': firestore.Increment(-1)}, None))
+            return writes
+
+        counts = {
+            'events_updated': self._drain_query(
+                events.where('registered_workers', 'array_contains', user_id), leave_rosters
+            ),
+            'registrations_deleted': self._drain_query(
+                self.db.collection(REGISTRATIONS).where('user_id', '==', user_id),
+                release_registrations,
+                page_size=FIRESTORE_BATCH_LIMIT // 2
+            )
+        }
+        # The released slots may reopen these events for open_slots queries
+        counts['sharded_events_recounted'] = sum(
+            1 for event_id in released_events if self.refresh_sharded_counts(event_id)
+        )
+        return counts
+
+    def _cleanup_deleted_event(self, event_id):
+        """
+        Remove a deleted event from users' registered_events and delete its
+        registrations and counter shards
+        :return: Dictionary of counts of the documents fixed
+        """
+        event_ref = self.db.collection('events').document(event_id)
+        if event_ref.get(field_paths=['registration_layout']).exists:
+            # The delete did not go through, so its references are still valid
+            return {'events_skipped': 1}
+
+        def leave_users(user_docs):
+            return [
+                ('update', user_doc.reference, {'registered_events': firestore.ArrayRemove([event_id])}, None)
+                for user_doc in user_docs
+            ]
+
+        def invalidate_users(user_docs):
+            for user_doc in user_docs:
+                self.invalidate_user(user_doc.id)
+
+        def delete_all(docs):
+            return [('delete', doc.reference, None, None) for doc in docs]
+
+        return {
+            'users_updated': self._drain_query(
+                self.db.collection('users').where('registered_events', 'array_contains', event_id), leave_users,
+                committed=invalidate_users
+            ),
+            'registrations_deleted': self._drain_query(
+                self.db.collection(REGISTRATIONS).where('event_id', '==', event_id), delete_all
+            ),
+            'shards_deleted': self._drain_query(event_ref.collection(SHARDS), delete_all)
+        }
+
+    def _drain_query(self, query, page_writes, page_size=FIRESTORE_BATCH_LIMIT, committed=None):
+        """
+        Fix every document a query matches, one batch per page, until it matches nothing
+        :param query: Query whose matches drop out of it once their writes are committed
+        :param page_writes: Callable taking a page of snapshots and returning writes, tuples of
+                            ('update' | 'delete', document reference, data or None, write option or None)
+        :param page_size: Documents per page, so that a page's writes fit in one batch
+        :param committed: Optional callable taking a page of snapshots once its batch has committed,
+                          e.g. to invalidate caches without a concurrent read caching the old data
+        :return: Number of documents fixed
+        :raises Exception: The last error once CLEANUP_MAX_ATTEMPTS batches in a row have failed
+        """
+        fixed = 0
+        attempts = 0
+        while True:
+            docs = list(query.limit(page_size).stream())
+            if not docs:
+                return fixed
+            batch = self.db.batch()
+            for operation, ref, data, option in page_writes(docs):
+                if operation == 'delete':
+                    batch.delete(ref, option=option)
+                else:
+                    batch.update(ref, data, option=option)
+            try:
+                batch.commit()
+            except Exception as e:
+                # Usually a precondition failure after a concurrent change; read the page again
+                attempts += 1
+                print(f"Error committing cleanup batch (attempt {attempts}): {str(e)}")
+                if attempts >= Config.CLEANUP_MAX_ATTEMPTS:
+                    raise
+                time.sleep(0.1 * attempts)
+                continue
+            fixed += len(docs)
+            attempts = 0
+            if committed is not None:
+                committed(docs)
+
+    def get_event_changes(self, since=None, limit=None):
+        """
+        Get events created, updated or deleted after a watermark
+        :param since: Watermark returned by a previous call, everything if None
+        :param limit: Maximum number of events and of tombstones to return
+        :return: Tuple of (list of Event objects, list of deleted event IDs,
+                 next watermark, whether more changes remain); the first
+                 three are None if the read failed
+        """
+        since = since or {}
+        try:
+            event_docs, events_position = self._changes_after(
+                self.db.collection('events'), 'updated_at', since.get('events'), limit
+            )
+            tombstone_docs, tombstones_position = self._changes_after(
+                self.db.collection(TOMBSTONES), 'deleted_at', since.get('tombstones'), limit
+            )
+            events = self._hydrate_registrations([self._event_from_doc(event_doc) for event_doc in event_docs])
+        except Exception as e:
+            print(f"Error getting event changes: {str(e)}")
+            return None, None, None, False
+        deleted = [tombstone.get('event_id') for tombstone in tombstone_docs]
+        has_more = bool(limit) and (len(event_docs) == limit or len(tombstone_docs) == limit)
+        return events, deleted, {'events': events_position, 'tombstones': tombstones_position}, has_more
+
+    @staticmethod
+    def _changes_after(collection, timestamp_field, position, limit):
+        """
+        Read documents ordered by (timestamp_field, id) after a position
+        :return: Tuple of (document snapshots, position of the last one)
+        """
+        # Ordering by ID as well keeps documents written in one batch, which
+        # share a commit timestamp, from being skipped or repeated across pages
+        query = collection.order_by(timestamp_field).order_by(DOCUMENT_ID)
+        if position:
+            query = query.start_after({timestamp_field: position[0], DOCUMENT_ID: position[1]})
+        if limit:
+            query = query.limit(limit)
+        docs = list(query.stream())
+        if docs:
+            position = [docs[-1].get(timestamp_field), docs[-1].id]
+        return docs, position
 
     def register_worker(self, event_id, user_id):
         """
-        Register a worker for an event
+        Register a worker for an event, enforcing capacity in a transaction
         :param event_id: The event's ID
         :param user_id: The user's ID
         :return: True if successful, False otherwise
+        :raises EventNotFoundError: If the event does not exist
+        :raises RegistrationError: If the event is full or the worker is already registered
+        :raises TransactionContentionError: If the event stayed contended through all retries
         """
-        try:
-            event_ref = self.db.collection('events').document(event_id)
-            event_ref.update({
-                'registered_workers': firestore.ArrayUnion([user_id])
-            })
-            return True
-        except Exception as e:
-            print(f"Error registering worker: {str(e)}")
-            return False
+        return self._change_registration(event_id, user_id, Event.register_worker)
 
     def unregister_worker(self, event_id, user_id):
         """
-        Unregister a worker from an event
+        Unregister a worker from an event in a transaction
         :param event_id: The event's ID
         :param user_id: The user's ID
         :return: True if successful, False otherwise
+        :raises EventNotFoundError: If the event does not exist
+        :raises RegistrationError: If the worker is not registered
+        :raises TransactionContentionError: If the event stayed contended through all retries
         """
-        try:
-            event_ref = self.db.collection('events').document(event_id)
-            event_ref.update({
-                'registered_workers': firestore.ArrayRemove([user_id])
+        return self._change_registration(event_id, user_id, Event.unregister_worker)
+
+    def _change_registration(self, event_id, user_id, change):
+        event_ref = self.db.collection('events').document(event_id)
+        user_ref = self.db.collection('users').document(user_id)
+        registering = change is Event.register_worker
+
+        def apply(transaction):
+            snapshot = event_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                raise EventNotFoundError(f"Event {event_id} not found")
+            event = self._event_from_doc(snapshot)
+            if event.registration_layout == SHARDED:
+                # The registration goes through the counter shards instead
+                if registering:
+                    self._claim_shard(transaction, snapshot, user_ref)
+                else:
+                    self._release_shard(transaction, snapshot, user_ref)
+                return True
+            try:
+                change(event, user_id)
+            except ValueError as e:
+                raise RegistrationError(str(e))
+            transaction.update(event_ref, {
+                'registered_workers': event.registered_workers,
+                'registered_count': len(event.registered_workers),
+                'open_slots': event.open_slots(),
+                'updated_at': firestore.SERVER_TIMESTAMP
             })
+            self._update_registered_events(transaction, user_ref, event_id, registering)
             return True
+
+        try:
+            result = self._run_registration_transaction(apply)
+            self.invalidate_user(user_id)
+            return result
+        except (EventNotFoundError, RegistrationError, TransactionContentionError):
+            raise
         except Exception as e:
-            print(f"Error unregistering worker: {str(e)}")
+            print(f"Error changing registration for event {event_id}: {str(e)}")
             return False
 
-    def create_user(self, user: User):
+    def _run_registration_transaction(self, fn):
+        return run_transaction(
+            self.db,
+            fn,
+            max_attempts=Config.REGISTRATION_MAX_ATTEMPTS,
+            base_delay=Config.REGISTRATION_BACKOFF_BASE,
+            max_delay=Config.REGISTRATION_BACKOFF_MAX,
+            stats=self.registration_stats
+        )
+
+    @staticmethod
+    def _update_registered_events(transaction, user_ref, event_id, registering):
+        """Mirror a registration change into the user's registered_events index"""
+        change = firestore.ArrayUnion([event_id]) if registering else firestore.ArrayRemove([event_id])
+        transaction.set(user_ref, {'registered_events': change}, merge=True)
+
+    @staticmethod
+    def _shard_refs(event_ref, shard_count):
+        return [event_ref.collection(SHARDS).document(str(index)) for index in range(shard_count)]
+
+    def _claim_shard(self, transaction, event_snapshot, user_ref):
         """
-        Create a new user in Firestore
-        :param user: User object
-        :return: None
+        Claim a slot in a sharded event inside a registration transaction.
+        Shards are read in random order until one has capacity, so only the
+        shards that were read are locked.
         """
-        try:
-            db = firestore.client()
-            user_ref = db.collection('users').document(user.id)
-            user_ref.set({
-                'name': user.name,
-                'email': user.email,
-                'role': user.role,
-                'created_at': firestore.SERVER_TIMESTAMP
-            })
-            
-            # Set custom claims for role-based access
-            auth.set_custom_user_claims(user.id, {'role': user.role})
-            
-        except Exception as e:
-            print(f"Error creating user: {str(e)}")
-            raise
+        event_ref = event_snapshot.reference
+        user_id = user_ref.id
+        registration_ref = self.db.collection(REGISTRATIONS).document(registration_id(event_ref.id, user_id))
+        if registration_ref.get(transaction=transaction).exists:
+            raise RegistrationError("Worker is already registered for this event")
+
+        shard_refs = self._shard_refs(event_ref, event_snapshot.get('registration_shards'))
+        shards = {}
+        claimed = None
+        for index in random.sample(range(len(shard_refs)), len(shard_refs)):
+            shard = shard_refs[index].get(transaction=transaction)
+            shards[index] = shard
+            if shard.exists and shard.get('count') < shard.get('capacity'):
+                claimed = index
+                break
+        if claimed is None:
+            raise RegistrationError("Event is at full capacity")
+
+        shard = shards[claimed]
+        # Filling a shard may close the event, so recount it for open_slots queries
+        refresh = shard.get('count') + 1 >= shard.get('capacity')
+        counts = self._shard_counts(transaction, shard_refs, shards) if refresh else None
 
-    def update_user(self, user: User):
+        transaction.create(registration_ref, {
+            'user_id': user_id,
+            'event_id': event_ref.id,
+            'status': 'confirmed',
+            'shard': claimed,
+            'registration_timestamp': firestore.SERVER_TIMESTAMP
+        })
+        transaction.update(shard_refs[claimed], {'count': firestore.Increment(1)})
+        if refresh:
+            self._update_sharded_open_slots(transaction, event_snapshot, sum(counts) + 1)
+        self._update_registered_events(transaction, user_ref, event_ref.id, True)
+
+    def _release_shard(self, transaction, event_snapshot, user_ref):
+        """Delete a sharded registration and free its slot inside a registration transaction"""
+        event_ref = event_snapshot.reference
+        registration_ref = self.db.collection(REGISTRATIONS).document(registration_id(event_ref.id, user_ref.id))
+        registration = registration_ref.get(transaction=transaction)
+        if not registration.exists:
+            raise RegistrationError("Worker is not registered for this event")
+
+        shard_refs = self._shard_refs(event_ref, event_snapshot.get('registration_shards'))
+        index = registration.get('shard')
+        shard = shard_refs[index].get(transaction=transaction)
+        # Freeing a slot in a full shard may reopen the event
+        refresh = shard.get('count') >= shard.get('capacity')
+        counts = self._shard_counts(transaction, shard_refs, {index: shard}) if refresh else None
+
+        transaction.delete(registration_ref)
+        transaction.update(shard_refs[index], {'count': firestore.Increment(-1)})
+        if refresh:
+            self._update_sharded_open_slots(transaction, event_snapshot, sum(counts) - 1)
+        self._update_registered_events(transaction, user_ref, event_ref.id, False)
+
+    @staticmethod
+    def _shard_counts(transaction, shard_refs, shards):
         """
-        Update a user in Firestore
-        :param user: User object
-        :return: None
+        Counts of all shards of an event, reading the ones not in shards
+        :param shards: Dictionary of shard index to snapshots already read in the transaction
         """
-        try:
-            db = firestore.client()
-            user_ref = db.collection('users').document(user.id)
-            user_ref.update({
-                'name': user.name,
-                'role': user.role,
-                'updated_at': firestore.SERVER_TIMESTAMP
-            })
-            
-            # Update custom claims
-            auth.set_custom_user_claims(user.id, {'role': user.role})
-            
-        except Exception as e:
-            print(f"Error updating user: {str(e)}")
-            raise
+        missing = [shard_ref for index, shard_ref in enumerate(shard_refs) if index not in shards]
+        read = {shard.id: shard for shard in transaction.get_all(missing)} if missing else {}
+        counts = []
+        for index, shard_ref in enumerate(shard_refs):
+            shard = shards[index] if index in shards else read.get(shard_ref.id)
+            counts.append(shard.get('count') if shard is not None and shard.exists else 0)
+        return counts
+
+    @staticmethod
+    def _update_sharded_open_slots(transaction, event_snapshot, registered):
+        """
+        Store a sharded event's count. It is only written when a shard fills
+        up or frees its first slot, so open_slots is stale between those
+        writes but always positive exactly when some shard has capacity.
+        """
+        transaction.update(event_snapshot.reference, {
+            'registered_count': registered,
+            'open_slots': event_snapshot.get('required_workers') - registered,
+            'updated_at': firestore.SERVER_TIMESTAMP
+        })
+
+    def refresh_sharded_counts(self, event_id):
+        """
+        Recount a sharded event from its shards, after shard counts changed
+        outside a registration transaction
+        :return: True if the event was updated, False if it is gone or not sharded
+        """
+        event_ref = self.db.collection('events').document(event_id)
+
+        @firestore.transactional
+        def refresh(transaction):
+            snapshot = event_ref.get(transaction=transaction)
+            if not snapshot.exists or snapshot.get('registration_layout') != SHARDED:
+                return False
+            counts = self._shard_counts(transaction, self._shard_refs(event_ref, snapshot.get('registration_shards')), {})
+            self._update_sharded_open_slots(transaction, snapshot, sum(counts))
+            return True
+
+        return refresh(self.db.transaction())
+
+    def repair_registration_indexes(self):
+        """
+        Rebuild users.registered_events from the event side of each registration
+        :return: Dictionary with the number of users checked and fixed
+        """
+        expected = {}
+        for event_doc in self.db.collection('events').stream():
+            event_data = event_doc.to_dict()
+            if event_data.get('registration_layout') == SHARDED:
+                continue
+            for user_id in event_data.get('registered_workers') or []:
+                expected.setdefault(user_id, []).append(event_doc.id)
+        for registration in self.db.collection(REGISTRATIONS).stream():
+            registration_data = registration.to_dict()
+            if registration.id == registration_id(registration_data.get('event_id'), registration_data.get('user_id')):
+                expected.setdefault(registration_data['user_id'], []).append(registration_data['event_id'])
+
+        checked = fixed = 0
+        for user_doc in self.db.collection('users').stream():
+            checked += 1
+            current = set(user_doc.to_dict().get('registered_events') or [])
+            # Registrations may change while we scan, so only the disagreements
+            # are rechecked and fixed, each in a transaction
+            disagreements = current ^ set(expected.pop(user_doc.id, []))
+            if disagreements and self._repair_registered_events(user_doc.reference, sorted(disagreements)):
+                self.invalidate_user(user_doc.id)
+                fixed += 1
+        if expected:
+            print(f"Registrations reference {len(expected)} users without a profile document")
+        return {'users_checked': checked, 'users_fixed': fixed}
+
+    def _repair_registered_events(self, user_ref, event_ids):
+        """
+        Recheck a user's registration for some events against the events and
+        registrations themselves, and fix registered_events to match
+        :param event_ids: IDs of the events to recheck
+        :return: True if registered_events was changed
+        """
+        user_id = user_ref.id
+        event_refs = [self.db.collection('events').document(event_id) for event_id in event_ids]
+        registration_refs = [
+            self.db.collection(REGISTRATIONS).document(registration_id(event_id, user_id)) for event_id in event_ids
+        ]
+
+        @firestore.transactional
+        def repair(transaction):
+            user_doc = user_ref.get(transaction=transaction)
+            if not user_doc.exists:
+                return False
+            docs = {doc.reference.path: doc for doc in transaction.get_all(event_refs + registration_refs)}
+            registered = set()
+            for event_id, event_ref, registration_ref in zip(event_ids, event_refs, registration_refs):
+                event_doc = docs.get(event_ref.path)
+                if event_doc is None or not event_doc.exists:
+                    continue
+                event_data = event_doc.to_dict()
+                if event_data.get('registration_layout') == SHARDED:
+                    registration = docs.get(registration_ref.path)
+                    if registration is not None and registration.exists:
+                        registered.add(event_id)
+                elif user_id in (event_data.get('registered_workers') or []):
+                    registered.add(event_id)
+
+            current = set(user_doc.to_dict().get('registered_events') or [])
+            wanted = (current - set(event_ids)) | registered
+            if wanted == current:
+                return False
+            transaction.update(user_ref, {'registered_events': sorted(wanted)})
+            return True
+
+        return repair(self.db.transaction())
+
+    def get_registered_count(self, event_id):
+        """
+        Count the registrations of an event without reading the registrations themselves
+        :param event_id: The event's ID
+        :return: Number of registered workers, None if the event does not exist
+        """
+        event_ref = self.db.collection('events').document(event_id)
+        snapshot = event_ref.get()
+        if not snapshot.exists:
+            return None
+        event_data = snapshot.to_dict()
+        if event_data.get('registration_layout') != SHARDED:
+            return event_data.get('registered_count', len(event_data.get('registered_workers') or []))
+        shards = event_ref.collection(SHARDS).stream()
+        return sum(shard.get('count') for shard in shards)
 
     def get_user_by_uid(self, uid):
         """
@@ -285,69 +1507,207 @@ class FirebaseService:
         """
         try:
             auth.set_custom_user_claims(uid, claims)
+            if 'role' in claims:
+                self.record_role_change(uid)
+            else:
+                self.invalidate_user(uid)
             return True
         except Exception as e:
             print(f"Error setting custom claims: {str(e)}")
             return False
 
-    def get_user_by_id(self, user_id: str) -> User:
-        """Get a user by their Firebase UID"""
+    def get_user_by_id(self, user_id: str, fields: set = None) -> User:
+        """
+        Get a user by their Firebase UID
+        :param user_id: The user's UID
+        :param fields: Set of API fields to load and serialize, None for all
+        """
         try:
             # Get user from Firebase Auth
             auth_user = auth.get_user(user_id)
             # Get additional user data from Firestore
-            user_doc = self.db.collection('users').document(user_id).get()
+            user_doc = self.db.collection('users').document(user_id).get(
+                field_paths=self._user_field_paths(fields) if fields is not None else None
+            )
             user_data = user_doc.to_dict() if user_doc.exists else {}
             
             # Merge Auth and Firestore data
-            return User(
-                id=auth_user.uid,
-                email=auth_user.email,
-                name=user_data.get('name', auth_user.display_name or auth_user.email),
-                role=user_data.get('role', 'worker'),
-                created_at=user_data.get('created_at'),
-                last_login=user_data.get('last_login'),
-                registered_events=user_data.get('registered_events', [])
-            )
+            return self._build_user(auth_user, user_data, fields)
         except auth.UserNotFoundError:
             return None
         except Exception as e:
             print(f"Error getting user {user_id}: {str(e)}")
             return None
 
-    def get_all_users(self) -> list:
-        """Get all users from Firebase"""
+    def get_users_by_ids(self, user_ids, fields: set = None) -> list:
+        """
+        Get several users with one batched profile read and batched Auth lookups
+        :param user_ids: List of UIDs, duplicates allowed
+        :param fields: Set of API fields to load and serialize, None for all
+        :return: List of User objects in first-seen order, skipping users missing from Auth
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+        if not unique_ids:
+            return []
         try:
-            users = []
-            # Get all users from Firestore
-            user_docs = self.db.collection('users').stream()
-            
-            for user_doc in user_docs:
-                try:
-                    # Get user from Firebase Auth
-                    auth_user = auth.get_user(user_doc.id)
-                    user_data = user_doc.to_dict()
-                    
-                    # Create User object
-                    user = User(
-                        id=auth_user.uid,
-                        email=auth_user.email,
-                        name=user_data.get('name', auth_user.display_name or auth_user.email),
-                        role=user_data.get('role', 'worker'),
-                        created_at=user_data.get('created_at'),
-                        last_login=user_data.get('last_login'),
-                        registered_events=user_data.get('registered_events', [])
-                    )
-                    users.append(user)
-                except auth.UserNotFoundError:
-                    # Skip users that exist in Firestore but not in Auth
-                    continue
-                    
-            return users
+            refs = [self.db.collection('users').document(user_id) for user_id in unique_ids]
+            field_paths = self._user_field_paths(fields) if fields is not None else None
+            profiles = {
+                user_doc.id: user_doc.to_dict()
+                for user_doc in self.db.get_all(refs, field_paths=field_paths)
+                if user_doc.exists
+            }
+            users = {}
+            for start in range(0, len(unique_ids), AUTH_LOOKUP_BATCH_SIZE):
+                identifiers = [auth.UidIdentifier(user_id) for user_id in unique_ids[start:start + AUTH_LOOKUP_BATCH_SIZE]]
+                for auth_user in auth.get_users(identifiers).users:
+                    users[auth_user.uid] = self._build_user(auth_user, profiles.get(auth_user.uid, {}), fields)
+            return [users[user_id] for user_id in unique_ids if user_id in users]
         except Exception as e:
-            print(f"Error getting all users: {str(e)}")
+            print(f"Error getting users by IDs: {str(e)}")
             return []
 
+    def get_cached_user(self, user_id: str) -> User:
+        """Get a user through the profile cache, loading it on a miss"""
+        user = self.user_cache.get(user_id)
+        if user is None:
+            user = self.get_user_by_id(user_id)
+            if user is not None:
+                self.user_cache.set(user_id, user)
+        return user
+
+    def invalidate_user(self, user_id: str):
+        """Drop a user from the profile and auth state caches after it has been changed"""
+        self.user_cache.invalidate(user_id)
+        self.auth_states.invalidate(user_id)
+
+    def record_role_change(self, user_id: str):
+        """
+        Stamp the profile with the time its role changed, so every instance
+        stops trusting the role claim of tokens issued before it. Call after
+        the new claims are set.
+        """
+        try:
+            self.db.collection('users').document(user_id).update({'role_changed_at': firestore.SERVER_TIMESTAMP})
+        except exceptions.NotFound:
+            # No profile, so no token of this user is accepted anyway
+            pass
+        self.invalidate_user(user_id)
+
+    def get_auth_state(self, user_id: str):
+        """
+        Check that a user's profile exists and when its role last changed,
+        with one projected read per user every AUTH_STATE_TTL seconds
+        :return: Dictionary with 'role_changed_at' (Unix time or None), or None
+                 if the profile is gone or could not be read
+        """
+        state = self.auth_states.get(user_id)
+        if state is not None:
+            return state
+        try:
+            user_doc = self.db.collection('users').document(user_id).get(field_paths=['role_changed_at'])
+        except Exception as e:
+            print(f"Error getting auth state of user {user_id}: {str(e)}")
+            return None
+        if not user_doc.exists:
+            return None
+        changed_at = (user_doc.to_dict() or {}).get('role_changed_at')
+        state = {'role_changed_at': changed_at.timestamp() if changed_at is not None else None}
+        self.auth_states.set(user_id, state)
+        return state
+
+    def get_all_users(self, limit: int = None, page_token: str = None, fields: set = None):
+        """
+        Get users from Firebase, ordered by UID
+        :param limit: Maximum number of users to return, all users if None
+        :param page_token: UID of the last user of the previous page
+        :param fields: Set of API fields to load and serialize, None for all
+        :return: Tuple of (list of User objects, next page token or None)
+        """
+        try:
+            query = self.db.collection('users').order_by(DOCUMENT_ID)
+            if fields is not None:
+                query = query.select(self._user_field_paths(fields))
+            if page_token:
+                query = query.start_after({DOCUMENT_ID: page_token})
+            if limit:
+                query = query.limit(limit)
+
+            doc_ids = []
+            users = list(self._iter_users(query, doc_ids, fields))
+
+            next_page_token = doc_ids[-1] if limit and len(doc_ids) == limit else None
+            return users, next_page_token
+        except Exception as e:
+            print(f"Error getting all users: {str(e)}")
+            return [], None
+
+    def iter_users(self, fields: set = None):
+        """
+        Lazily iterate all users ordered by UID for streamed responses
+        :param fields: Set of API fields to load and serialize, None for all
+        :return: Generator of User objects
+        """
+        query = self.db.collection('users').order_by(DOCUMENT_ID)
+        if fields is not None:
+            query = query.select(self._user_field_paths(fields))
+        return self._iter_users(query, fields=fields)
+
+    def _iter_users(self, query, doc_ids=None, fields=None):
+        """
+        Resolve Auth records in batches while streaming the profiles
+        :param query: Query over the users collection
+        :param doc_ids: Optional list collecting every profile ID read, including skipped ones
+        :param fields: Set of API fields the users are serialized with
+        """
+        batch = []
+        for user_doc in query.stream():
+            if doc_ids is not None:
+                doc_ids.append(user_doc.id)
+            batch.append(user_doc)
+            if len(batch) == AUTH_LOOKUP_BATCH_SIZE:
+                yield from self._merge_auth_users(batch, fields)
+                batch = []
+        if batch:
+            yield from self._merge_auth_users(batch, fields)
+
+    def _merge_auth_users(self, user_docs, fields=None) -> list:
+        """Look up Auth records for a batch of profile documents in one call"""
+        result = auth.get_users([auth.UidIdentifier(doc.id) for doc in user_docs])
+        auth_users = {auth_user.uid: auth_user for auth_user in result.users}
+        users = []
+        for user_doc in user_docs:
+            auth_user = auth_users.get(user_doc.id)
+            if auth_user is None:
+                # Skip users that exist in Firestore but not in Auth
+                continue
+            users.append(self._build_user(auth_user, user_doc.to_dict(), fields))
+        return users
+
+    @staticmethod
+    def _build_user(auth_user, user_data: dict, fields: set = None) -> User:
+        """Merge an Auth record and a Firestore profile into a User"""
+        user = User(
+            id=auth_user.uid,
+            email=auth_user.email,
+            name=user_data.get('name', auth_user.display_name or auth_user.email),
+            role=user_data.get('role', 'worker'),
+            created_at=user_data.get('created_at'),
+            last_login=user_data.get('last_login'),
+            registered_events=user_data.get('registered_events', [])
+        )
+        user.fields = fields
+        return user
+
+    @staticmethod
+    def _user_field_paths(fields):
+        """Firestore projection for a set of user API fields"""
+        # An empty projection would return every field, so always read the role
+        paths = {'role'}
+        for field in fields:
+            paths.update(USER_FIELD_SOURCES[field])
+        return sorted(paths)
+
     def create_user(self, email: str, password: str, name: str, role: str = 'worker') -> User:
         """Create a new user in Firebase"""
         try:
@@ -366,6 +1726,7 @@ class FirebaseService:
                 'registered_events': []
             }
             self.db.collection('users').document(auth_user.uid).set(user_data)
+            self.invalidate_user(auth_user.uid)
             
             # Return new user
             return self.get_user_by_id(auth_user.uid)
@@ -385,22 +1746,189 @@ class FirebaseService:
             
             # Update Firestore document
             self.db.collection('users').document(user_id).update(data)
+            if 'role' in data:
+                # Keep the token claims in step with the stored role
+                auth.set_custom_user_claims(user_id, {'role': data['role']})
+                self.record_role_change(user_id)
+            else:
+                self.invalidate_user(user_id)
             return True
         except Exception as e:
             print(f"Error updating user {user_id}: {str(e)}")
             return False
 
-    def delete_user(self, user_id: str) -> bool:
-        """Delete a user from Firebase"""
+    def import_users(self, rows) -> list:
+        """
+        Provision many users with auth.import_users and batched profile writes
+        :param rows: List of rows checked with validate_import_row, emails unique
+        :return: List of result dictionaries in input order, each with the 'email',
+                 the user 'id' and a 'status' of 'created', 'exists' or 'failed' (with a 'message')
+        """
+        results = []
+        for start in range(0, len(rows), AUTH_IMPORT_BATCH_SIZE):
+            results.extend(self._import_user_chunk(rows[start:start + AUTH_IMPORT_BATCH_SIZE]))
+        return results
+
+    def _import_user_chunk(self, rows) -> list:
+        """Import up to AUTH_IMPORT_BATCH_SIZE users; rows imported earlier are only completed"""
+        uids = [provisioned_uid(row['email']) for row in rows]
+        results = [{'email': row['email'], 'id': uid} for row, uid in zip(rows, uids)]
+
+        try:
+            accounts = set()
+            for start in range(0, len(uids), AUTH_LOOKUP_BATCH_SIZE):
+                identifiers = [auth.UidIdentifier(uid) for uid in uids[start:start + AUTH_LOOKUP_BATCH_SIZE]]
+                accounts.update(auth_user.uid for auth_user in auth.get_users(identifiers).users)
+            # import_users doesn't enforce unique emails, so find the rows whose
+            # email already belongs to another account, e.g. a self-signup
+            emails = [row['email'] for row, uid in zip(rows, uids) if uid not in accounts]
+            email_owners = {}
+            for start in range(0, len(emails), AUTH_LOOKUP_BATCH_SIZE):
+                identifiers = [auth.EmailIdentifier(email) for email in emails[start:start + AUTH_LOOKUP_BATCH_SIZE]]
+                email_owners.update(
+                    (auth_user.email.lower(), auth_user.uid) for auth_user in auth.get_users(identifiers).users
+                )
+            refs = [self.db.collection('users').document(uid) for uid in uids]
+            profiles = self._existing_ids(refs, field_path='role')
+        except Exception as e:
+            print(f"Error checking imported users: {str(e)}")
+            for result in results:
+                result.update(status='failed', message=str(e))
+            return results
+
+        for index, row in enumerate(rows):
+            owner = email_owners.get(row['email'].lower())
+            if owner is not None:
+                results[index].update(id=owner, status='exists')
+
+        # Create the Auth accounts, with the role claim set in the same call
+        pending = [index for index, uid in enumerate(uids) if uid not in accounts and 'status' not in results[index]]
+        records = []
+        for index in pending:
+            row = rows[index]
+            password_hash = password_salt = None
+            if row['password']:
+                password_hash, password_salt = hash_password(row['password'], Config.USER_IMPORT_HASH_ROUNDS)
+            records.append(auth.ImportUserRecord(
+                uid=uids[index],
+                email=row['email'],
+                display_name=row['name'],
+                custom_claims={'role': row['role']},
+                password_hash=password_hash,
+                password_salt=password_salt
+            ))
+        if records:
+            hash_alg = None
+            if any(record.password_hash for record in records):
+                hash_alg = auth.UserImportHash.pbkdf2_sha256(rounds=Config.USER_IMPORT_HASH_ROUNDS)
+            try:
+                import_result = auth.import_users(records, hash_alg=hash_alg)
+                for error in import_result.errors:
+                    results[pending[error.index]].update(status='failed', message=error.reason)
+            except Exception as e:
+                print(f"Error importing users: {str(e)}")
+                for index in pending:
+                    results[index].update(status='failed', message=str(e))
+
+        # Write the missing profiles for every account that now exists
+        groups = []
+        for index, (row, ref) in enumerate(zip(rows, refs)):
+            if 'status' in results[index]:
+                continue
+            if uids[index] in profiles:
+                # Keep existing profiles, with their registrations, as they are
+                results[index]['status'] = 'exists' if uids[index] in accounts else 'created'
+                continue
+            groups.append((index, [('set', ref, {
+                'name': row['name'],
+                'role': row['role'],
+                'created_at': firestore.SERVER_TIMESTAMP,
+                'registered_events': []
+            })]))
+        errors = commit_grouped_writes(self.db, groups, FIRESTORE_BATCH_LIMIT, Config.BULK_WRITE_CONCURRENCY)
+        for index, error in errors.items():
+            if error is not None:
+                results[index].update(status='failed', message=error)
+            else:
+                results[index]['status'] = 'created'
+                self.invalidate_user(uids[index])
+        return results
+
+    def delete_user(self, user_id: str):
+        """
+        Delete a user from Firebase; references to it are removed by a cleanup job
+        :return: ID of the cleanup job if successful, None otherwise
+        """
         try:
             # Delete from Auth
-            auth.delete_user(user_id)
-            # Delete from Firestore
-            self.db.collection('users').document(user_id).delete()
-            return True
+            try:
+                auth.delete_user(user_id)
+            except auth.UserNotFoundError:
+                # Deleted by an earlier attempt that failed before the batch below
+                pass
+            # Delete from Firestore, recording the cleanup in the same batch
+            job_ref, job_data = self._new_cleanup_job(DELETED_USERS, [user_id])
+            batch = self.db.batch()
+            batch.delete(self.db.collection('users').document(user_id))
+            batch.set(job_ref, job_data)
+            batch.commit()
+            self.invalidate_user(user_id)
+            self._start_cleanup_job(job_ref, job_data)
+            return job_ref.id
         except Exception as e:
             print(f"Error deleting user {user_id}: {str(e)}")
-            return False
+            return None
+
+    def delete_users(self, user_ids):
+        """
+        Delete many users with auth.delete_users and batched profile deletes
+        :param user_ids: List of unique UIDs
+        :return: Tuple of (list of result dictionaries in input order, each with the user
+                 'id' and a 'status' of 'deleted' or 'failed' (with a 'message'),
+                 ID of the cleanup job or None if nothing was deleted)
+        """
+        results = [{'id': user_id} for user_id in user_ids]
+        for start in range(0, len(user_ids), AUTH_IMPORT_BATCH_SIZE):
+            try:
+                delete_result = auth.delete_users(user_ids[start:start + AUTH_IMPORT_BATCH_SIZE])
+                for error in delete_result.errors:
+                    results[start + error.index].update(status='failed', message=error.reason)
+            except Exception as e:
+                print(f"Error deleting users: {str(e)}")
+                for result in results[start:start + AUTH_IMPORT_BATCH_SIZE]:
+                    result.update(status='failed', message=str(e))
+
+        deleted = [result['id'] for result in results if 'status' not in result]
+        if not deleted:
+            return results, None
+        try:
+            job_ref, job_data = self._new_cleanup_job(DELETED_USERS, deleted)
+            job_ref.set(job_data)
+        except Exception as e:
+            # The Auth accounts are gone; deleting them again is a no-op, so a retry finishes the job
+            print(f"Error recording user cleanup: {str(e)}")
+            for result in results:
+                result.setdefault('status', 'failed')
+                result.setdefault('message', str(e))
+            return results, None
+
+        users = self.db.collection('users')
+        groups = [(user_id, [('delete', users.document(user_id), None)]) for user_id in deleted]
+        errors = commit_grouped_writes(self.db, groups, FIRESTORE_BATCH_LIMIT, Config.BULK_WRITE_CONCURRENCY)
+        for result in results:
+            if 'status' not in result:
+                result.update(self._bulk_result(result['id'], 'deleted', errors[result['id']]))
+                self.invalidate_user(result['id'])
+        self._start_cleanup_job(job_ref, job_data)
+        return results, job_ref.id
+
+class LazyFirebaseService:
+    """
+    Module-level handle on the FirebaseService singleton for the blueprints,
+    creating it on first use instead of when the app is imported
+    """
+    def __getattr__(self, name):
+        return getattr(FirebaseService(), name)
 
 def firebase_token_required(f):
     @wraps(f)
@@ -0,0 +1,310 @@
+"""
+Process-wide Firestore client backed by a pool of gRPC channels.
+
+A single channel multiplexes every RPC over one HTTP/2 connection, which
+caps concurrent streams and leaves long-lived ones (snapshot listeners,
+large queries) competing with short reads. ``ChannelPool`` owns several
+channels, each with its own connection and keepalive settings, and sends
+every call to the least busy one. ``PooledFirestoreClient`` is a regular
+``firestore.Client`` whose transport uses the pool, so references, batches
+and transactions work unchanged.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import grpc
+from google.cloud import firestore as gcloud_firestore
+from google.cloud.firestore_v1.services.firestore import client as firestore_client
+from google.cloud.firestore_v1.services.firestore.transports import grpc as firestore_grpc_transport
+
+
+class _PooledMultiCallable:
+    """Multi-callable that picks a channel of the pool on every call"""
+
+    kind = None
+
+    def __init__(self, pool, method, args, kwargs):
+        self._pool = pool
+        self._method = method
+        self._args = args
+        self._kwargs = kwargs
+
+    def _target(self):
+        index = self._pool._acquire()
+        return index, self._pool._multicallable(index, self.kind, self._method, self._args, self._kwargs)
+
+
+class _PooledUnaryResponse(_PooledMultiCallable):
+    """Calls with a single response hold their channel until it arrives"""
+
+    def __call__(self, *args, **kwargs):
+        index, multicallable = self._target()
+        try:
+            return multicallable(*args, **kwargs)
+        finally:
+            self._pool._release(index)
+
+    def with_call(self, *args, **kwargs):
+        index, multicallable = self._target()
+        try:
+            return multicallable.with_call(*args, **kwargs)
+        finally:
+            self._pool._release(index)
+
+    def future(self, *args, **kwargs):
+        index, multicallable = self._target()
+        try:
+            future = multicallable.future(*args, **kwargs)
+        except Exception:
+            self._pool._release(index)
+            raise
+        future.add_done_callback(lambda _: self._pool._release(index))
+        return future
+
+
+class _PooledStreamResponse(_PooledMultiCallable):
+    """Streams stay in flight until the server or client ends them"""
+
+    def __call__(self, *args, **kwargs):
+        index, multicallable = self._target()
+        try:
+            call = multicallable(*args, **kwargs)
+        except Exception:
+            self._pool._release(index)
+            raise
+        if not call.add_callback(lambda: self._pool._release(index)):
+            self._pool._release(index)
+        return call
+
+
+# Subclassing grpc's multi-callable types matters: api_core's wrap_errors
+# only maps errors raised while iterating a stream for instances of the
+# streaming ones, so a failed query would otherwise surface as a raw RpcError
+class _PooledUnaryUnary(_PooledUnaryResponse, grpc.UnaryUnaryMultiCallable):
+    kind = 'unary_unary'
+
+
+class _PooledUnaryStream(_PooledStreamResponse, grpc.UnaryStreamMultiCallable):
+    kind = 'unary_stream'
+
+
+class _PooledStreamUnary(_PooledUnaryResponse, grpc.StreamUnaryMultiCallable):
+    kind = 'stream_unary'
+
+
+class _PooledStreamStream(_PooledStreamResponse, grpc.StreamStreamMultiCallable):
+    kind = 'stream_stream'
+
+
+class ChannelPool(grpc.Channel):
+    """
+    gRPC channel that spreads calls over several underlying channels,
+    choosing the one with the fewest calls in flight
+    """
+
+    def __init__(self, channels):
+        if not channels:
+            raise ValueError('A channel pool needs at least one channel')
+        self._channels = list(channels)
+        self._lock = threading.Lock()
+        self._multicallables = {}
+        self._next = 0
+        self._pinned = threading.local()
+        size = len(self._channels)
+        self.calls = [0] * size
+        self.in_flight = [0] * size
+        self.peak_in_flight = [0] * size
+        self.warm_up_ms = [None] * size
+
+    def __len__(self):
+        return len(self._channels)
+
+    def _acquire(self):
+        with self._lock:
+            index = getattr(self._pinned, 'index', None)
+            if index is None:
+                # Rotate the starting point so idle channels share the load
+                size = len(self._channels)
+                start = self._next
+                self._next = (start + 1) % size
+                index = min(((start + offset) % size for offset in range(size)), key=lambda i: self.in_flight[i])
+            self.calls[index] += 1
+            self.in_flight[index] += 1
+            self.peak_in_flight[index] = max(self.peak_in_flight[index], self.in_flight[index])
+            return index
+
+    def _release(self, index):
+        with self._lock:
+            self.in_flight[index] -= 1
+
+    def _multicallable(self, index, kind, method, args, kwargs):
+        key = (index, kind, method)
+        multicallable = self._multicallables.get(key)
+        if multicallable is None:
+            multicallable = getattr(self._channels[index], kind)(method, *args, **kwargs)
+            self._multicallables[key] = multicallable
+        return multicallable
+
+    @contextmanager
+    def pinned(self, index):
+        """Send the calls made in this thread inside the block to one channel"""
+        self._pinned.index = index
+        try:
+            yield
+        finally:
+            self._pinned.index = None
+
+    def warm_up(self, read, timeout=10.0):
+        """
+        Connect every channel and run a cheap read on it, so the first
+        requests don't pay for TCP, TLS and token setup
+        :param read: Callable making one Firestore call
+        :param timeout: Seconds to wait for each channel to connect
+        :return: Number of channels warmed
+        """
+        warmed = 0
+        for index, channel in enumerate(self._channels):
+            started = time.perf_counter()
+            try:
+                grpc.channel_ready_future(channel).result(timeout=timeout)
+                with self.pinned(index):
+                    read()
+                self.warm_up_ms[index] = round(1000 * (time.perf_counter() - started), 1)
+                warmed += 1
+            except Exception as e:
+                print(f"Error warming up Firestore channel {index}: {str(e)}")
+        return warmed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'channels': len(self._channels),
+                'in_flight': sum(self.in_flight),
+                'calls': sum(self.calls),
+                'per_channel': [
+                    {
+                        'calls': self.calls[index],
+                        'in_flight': self.in_flight[index],
+                        'peak_in_flight': self.peak_in_flight[index],
+                        'warm_up_ms': self.warm_up_ms[index]
+                    }
+                    for index in range(len(self._channels))
+                ]
+            }
+
+    def unary_unary(self, method, *args, **kwargs):
+        return _PooledUnaryUnary(self, method, args, kwargs)
+
+    def unary_stream(self, method, *args, **kwargs):
+        return _PooledUnaryStream(self, method, args, kwargs)
+
+    def stream_unary(self, method, *args, **kwargs):
+        return _PooledStreamUnary(self, method, args, kwargs)
+
+    def stream_stream(self, method, *args, **kwargs):
+        return _PooledStreamStream(self, method, args, kwargs)
+
+    def subscribe(self, callback, try_to_connect=False):
+        for channel in self._channels:
+            channel.subscribe(callback, try_to_connect=try_to_connect)
+
+    def unsubscribe(self, callback):
+        for channel in self._channels:
+            channel.unsubscribe(callback)
+
+    def close(self):
+        for channel in self._channels:
+            channel.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class PooledFirestoreClient(gcloud_firestore.Client):
+    """Firestore client whose RPCs go through a ChannelPool"""
+
+    def __init__(self, channels=1, keepalive_time_ms=30000, keepalive_timeout_ms=10000, **kwargs):
+        super().__init__(**kwargs)
+        self._channel_count = channels
+        self._channel_options = [
+            ('grpc.keepalive_time_ms', keepalive_time_ms),
+            ('grpc.keepalive_timeout_ms', keepalive_timeout_ms),
+            ('grpc.keepalive_permit_without_calls', 1),
+            ('grpc.max_send_message_length', -1),
+            ('grpc.max_receive_message_length', -1),
+            # Give each channel its own connection instead of a shared subchannel
+            ('grpc.use_local_subchannel_pool', 1),
+        ]
+        self.channel_pool = None
+        self._api_lock = threading.Lock()
+
+    @property
+    def _firestore_api(self):
+        if self._firestore_api_internal is None and self._emulator_host is None:
+            # Request threads and the warm-up thread may get here together;
+            # only one of them may open the channels
+            with self._api_lock:
+                if self._firestore_api_internal is None:
+                    self._build_firestore_api()
+        # The emulator gets the library's own single insecure channel
+        return super()._firestore_api
+
+    def _build_firestore_api(self):
+        transport = firestore_grpc_transport.FirestoreGrpcTransport
+        self.channel_pool = ChannelPool([
+            transport.create_channel(self._target, credentials=self._credentials, options=self._channel_options)
+            for _ in range(self._channel_count)
+        ])
+        self._transport = transport(host=self._target, channel=self.channel_pool)
+        self._firestore_api_internal = firestore_client.FirestoreClient(
+            transport=self._transport, client_options=self._client_options
+        )
+        firestore_client._client_info = self._client_info
+
+    def warm_up(self, read, timeout=10.0):
+        """
+        Open every channel of the pool with a cheap read
+        :param read: Callable taking this client and making one Firestore call
+        :return: Number of channels warmed
+        """
+        # Builds the channels
+        self._firestore_api
+        if self.channel_pool is None:
+            read(self)
+            return 1
+        return self.channel_pool.warm_up(lambda: read(self), timeout=timeout)
+
+    def pool_stats(self):
+        """Utilization of the channel pool, empty until the first call"""
+        if self.channel_pool is None:
+            return {'channels': 0}
+        return self.channel_pool.stats()
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_firestore_client(app, **kwargs):
+    """
+    Get the process-wide Firestore client, creating it on first use
+    :param app: Initialized firebase_admin App providing credentials and project
+    :param kwargs: Channel settings passed to PooledFirestoreClient
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            project = app.project_id
+            if not project:
+                raise ValueError('Project ID is required to access Firestore')
+            _shared_client = PooledFirestoreClient(
+                credentials=app.credential.get_credential(),
+                project=project,
+                **kwargs
+            )
+        return _shared_client
@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, (list, tuple)):
+        return [_encode_value(item) for item in value]
+    if isinstance(value, dict):
+        return {k: _encode_value(v) for k, v in value.items()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if set(value) == {'dt'}:
+            return datetime.fromisoformat(value['dt'])
+        return {k: _decode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_value(item) for item in value]
+    return value
+
+
+def encode_cursor(values: dict) -> str:
+    """
+    Turn the order-by values of the last document of a page into an opaque cursor
+    :param values: Mapping of order-by field path to value
+    :return: URL-safe cursor string
+    """
+    payload = json.dumps({k: _encode_value(v) for k, v in values.items()}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Reverse encode_cursor
+    :param cursor: Cursor string received from a client
+    :return: Mapping of order-by field path to value, usable with start_after
+    :raises InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f'Invalid cursor: {str(e)}')
+    if not isinstance(values, dict):
+        raise InvalidCursorError('Invalid cursor')
+    return {k: _decode_value(v) for k, v in values.items()}
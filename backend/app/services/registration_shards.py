@@ -0,0 +1,38 @@
+"""
+Helpers for the sharded registration layout.
+
+In this layout an event document does not hold its registrations. Each
+registration is a document in the top-level ``registrations`` collection
+(the shape ``scripts/init_db.py`` seeds) with the ID ``{event_id}_{user_id}``,
+and filled slots are counted in ``events/{id}/registration_shards/{n}``.
+Every shard owns part of the event's capacity, so a signup only locks one
+shard and capacity is still enforced exactly.
+"""
+
+EMBEDDED = 'embedded'
+SHARDED = 'sharded'
+LAYOUTS = (EMBEDDED, SHARDED)
+
+REGISTRATIONS = 'registrations'
+SHARDS = 'registration_shards'
+
+
+def registration_id(event_id: str, user_id: str) -> str:
+    """Document ID of a registration in the registrations collection"""
+    return f"{event_id}_{user_id}"
+
+
+def shard_capacities(counts: list, required_workers: int) -> list:
+    """
+    Split an event's capacity across its shards
+    :param counts: Current number of registrations in each shard
+    :param required_workers: The event's total capacity
+    :return: Capacity for each shard. Every shard keeps room for its current
+             registrations and the spare slots are spread evenly.
+    """
+    shard_count = len(counts)
+    spare = max(0, (required_workers or 0) - sum(counts))
+    return [
+        count + spare // shard_count + (1 if index < spare % shard_count else 0)
+        for index, count in enumerate(counts)
+    ]
@@ -0,0 +1,280 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+import requests
+from cryptography import x509
+
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+ISSUER_PREFIX = 'https://securetoken.google.com/'
+DEFAULT_MAX_AGE = 3600
+
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+class TokenVerificationError(Exception):
+    """Raised when an ID token fails local verification"""
+
+
+def parse_max_age(cache_control, default=DEFAULT_MAX_AGE):
+    """
+    Extract max-age from a Cache-Control header
+    :param cache_control: The raw header value (may be None)
+    :param default: Value to use when the header carries no max-age
+    :return: max-age in seconds
+    """
+    if cache_control:
+        match = _MAX_AGE_RE.search(cache_control)
+        if match:
+            return int(match.group(1))
+    return default
+
+
+def fetch_google_certs(url=GOOGLE_CERTS_URL, timeout=5):
+    """
+    Download the Firebase token signing certificates
+    :return: Tuple of ({kid: pem}, max_age_seconds)
+    """
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.json(), parse_max_age(response.headers.get('Cache-Control'))
+
+
+class SigningKeyCache:
+    """
+    Process-wide cache of the public keys used to sign Firebase ID tokens.
+
+    Keys are kept for the max-age advertised by the key server. Once an entry
+    is within ``refresh_margin`` seconds of expiring, a single background
+    refresh is started while requests keep using the current keys, so no
+    request has to wait on the fetch unless the keys have fully expired.
+    """
+
+    def __init__(self, fetcher=fetch_google_certs, refresh_margin=300, min_refresh_interval=30):
+        self._fetcher = fetcher
+        self._refresh_margin = refresh_margin
+        self._min_refresh_interval = min_refresh_interval
+        self._keys = None
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.fetches = 0
+        self.background_refreshes = 0
+        self.fetch_errors = 0
+
+    def get_key(self, kid):
+        """
+        Get the public key for a key id
+        :param kid: The ``kid`` header of the token
+        :return: Public key object, or None if the kid is unknown
+        """
+        keys = self._current_keys()
+        key = keys.get(kid)
+        if key is None and time.time() - self._fetched_at >= self._min_refresh_interval:
+            # Unknown kid usually means the keys were rotated early
+            keys = self._refresh(force=True)
+            key = keys.get(kid)
+        return key
+
+    def _current_keys(self):
+        now = time.time()
+        if self._keys is None or now >= self._expires_at:
+            return self._refresh()
+        if now >= self._expires_at - self._refresh_margin:
+            self._refresh_in_background()
+        return self._keys
+
+    def _refresh(self, force=False):
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if force:
+                if time.time() - self._fetched_at < self._min_refresh_interval:
+                    return self._keys
+            elif self._keys is not None and time.time() < self._expires_at - self._refresh_margin:
+                return self._keys
+            try:
+                return self._load()
+            except Exception:
+                self.fetch_errors += 1
+                if self._keys is not None and time.time() < self._expires_at:
+                    return self._keys
+                raise
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                with self._lock:
+                    self._load()
+                self.background_refreshes += 1
+            except Exception as e:
+                self.fetch_errors += 1
+                print(f"Background signing key refresh failed: {str(e)}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name='signing-key-refresh', daemon=True).start()
+
+    def _load(self):
+        certs, max_age = self._fetcher()
+        keys = {
+            kid: x509.load_pem_x509_certificate(pem.encode('utf-8')).public_key()
+            for kid, pem in certs.items()
+        }
+        now = time.time()
+        self._keys = keys
+        self._fetched_at = now
+        self._expires_at = now + max_age
+        self.fetches += 1
+        return keys
+
+    def stats(self):
+        return {
+            'keys': len(self._keys or {}),
+            'expires_in': max(0, int(self._expires_at - time.time())),
+            'fetches': self.fetches,
+            'background_refreshes': self.background_refreshes,
+            'fetch_errors': self.fetch_errors
+        }
+
+
+class DecodedTokenCache:
+    """Bounded LRU of decoded claims keyed by token digest, valid until the token's exp"""
+
+    def __init__(self, max_size=10000):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims
+
+    def put(self, digest, claims, expires_at):
+        if self._max_size <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = (claims, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+_shared_key_cache = None
+_shared_key_cache_lock = threading.Lock()
+
+
+def get_signing_key_cache(**kwargs):
+    """Get the process-wide signing key cache, creating it on first use"""
+    global _shared_key_cache
+    with _shared_key_cache_lock:
+        if _shared_key_cache is None:
+            _shared_key_cache = SigningKeyCache(**kwargs)
+        return _shared_key_cache
+
+
+class TokenVerifier:
+    """
+    Verifies Firebase ID tokens locally, applying the same checks as
+    ``auth.verify_id_token``: RS256 signature from a current Google key,
+    audience and issuer for the project, a non-empty subject and sane
+    iat/auth_time values.
+    """
+
+    def __init__(self, project_id, key_cache=None, cache_size=10000, leeway=0):
+        if not project_id:
+            raise ValueError('A Firebase project ID is required for local token verification')
+        self.project_id = project_id
+        self.issuer = ISSUER_PREFIX + project_id
+        self.key_cache = key_cache or get_signing_key_cache()
+        self.decoded_cache = DecodedTokenCache(cache_size)
+        self.leeway = leeway
+
+    def verify(self, id_token):
+        """
+        Verify an ID token
+        :param id_token: The encoded Firebase ID token
+        :return: Dictionary of decoded claims, including ``uid``
+        :raises TokenVerificationError: If the token is not valid
+        """
+        if not id_token or not isinstance(id_token, str):
+            raise TokenVerificationError('ID token must be a non-empty string')
+
+        digest = hashlib.sha256(id_token.encode('utf-8')).digest()
+        claims = self.decoded_cache.get(digest)
+        if claims is not None:
+            return dict(claims)
+
+        claims = self._decode(id_token)
+        self.decoded_cache.put(digest, claims, claims['exp'] + self.leeway)
+        return dict(claims)
+
+    def _decode(self, id_token):
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except jwt.InvalidTokenError as e:
+            raise TokenVerificationError(f'Malformed ID token: {str(e)}')
+
+        if header.get('alg') != 'RS256':
+            raise TokenVerificationError('ID token has incorrect algorithm')
+        kid = header.get('kid')
+        if not kid:
+            raise TokenVerificationError('ID token has no "kid" header')
+
+        key = self.key_cache.get_key(kid)
+        if key is None:
+            raise TokenVerificationError('ID token signed with an unknown key')
+
+        try:
+            claims = jwt.decode(
+                id_token,
+                key,
+                algorithms=['RS256'],
+                audience=self.project_id,
+                issuer=self.issuer,
+                leeway=self.leeway,
+                options={'require': ['exp', 'iat', 'sub']}
+            )
+        except jwt.InvalidTokenError as e:
+            raise TokenVerificationError(str(e))
+
+        sub = claims.get('sub')
+        if not isinstance(sub, str) or not sub or len(sub) > 128:
+            raise TokenVerificationError('ID token has an invalid subject')
+        auth_time = claims.get('auth_time')
+        if auth_time is not None and auth_time > time.time() + self.leeway:
+            raise TokenVerificationError('ID token has an auth_time in the future')
+
+        claims['uid'] = sub
+        return claims
+
+    def stats(self):
+        return {'decoded': self.decoded_cache.stats(), 'keys': self.key_cache.stats()}
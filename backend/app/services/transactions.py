@@ -0,0 +1,89 @@
+import random
+import threading
+import time
+
+from ..utils.lazy_import import lazy_import
+
+exceptions = lazy_import('google.api_core.exceptions')
+firestore = lazy_import('firebase_admin.firestore')
+
+
+class TransactionContentionError(Exception):
+    """Raised when a transaction keeps conflicting after all retries"""
+
+
+class TransactionStats:
+    """Thread-safe counters describing transaction contention"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.committed = 0
+        self.conflicts = 0
+        self.exhausted = 0
+        self.max_attempts_used = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record_commit(self, attempts, latency):
+        with self._lock:
+            self.committed += 1
+            self.max_attempts_used = max(self.max_attempts_used, attempts)
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def record_conflict(self):
+        with self._lock:
+            self.conflicts += 1
+
+    def record_exhausted(self):
+        with self._lock:
+            self.exhausted += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'committed': self.committed,
+                'conflicts': self.conflicts,
+                'exhausted': self.exhausted,
+                'max_attempts_used': self.max_attempts_used,
+                'avg_latency_ms': round(1000 * self.total_latency / self.committed, 2) if self.committed else 0.0,
+                'max_latency_ms': round(1000 * self.max_latency, 2)
+            }
+
+
+def run_transaction(db, fn, max_attempts=5, base_delay=0.02, max_delay=0.5, stats=None):
+    """
+    Run fn(transaction) in a Firestore transaction, retrying conflicts with
+    capped exponential backoff and full jitter.
+    :param db: Firestore client
+    :param fn: Callable taking the transaction; its return value is returned
+    :param max_attempts: Attempts before giving up
+    :param base_delay: Backoff before the first retry, in seconds
+    :param max_delay: Upper bound for a single backoff, in seconds
+    :param stats: Optional TransactionStats to record contention in
+    :return: Result of fn
+    :raises TransactionContentionError: If every attempt conflicted
+    """
+    transactional_fn = firestore.transactional(fn)
+    started = time.monotonic()
+    for attempt in range(1, max_attempts + 1):
+        try:
+            # One attempt per Firestore transaction so we control the backoff
+            result = transactional_fn(db.transaction(max_attempts=1))
+        except (exceptions.Aborted, ValueError):
+            # The client reports a failed commit as ValueError. Callers must
+            # not let their own ValueErrors escape fn, or they count as conflicts.
+            if stats is not None:
+                stats.record_conflict()
+            if attempt == max_attempts:
+                break
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1))))
+            continue
+        if stats is not None:
+            stats.record_commit(attempt, time.monotonic() - started)
+        return result
+
+    if stats is not None:
+        stats.record_exhausted()
+    print(f"Transaction gave up after {max_attempts} conflicting attempts")
+    raise TransactionContentionError(f'Transaction conflicted {max_attempts} times')
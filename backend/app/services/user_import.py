@@ -0,0 +1,54 @@
+"""
+Helpers for provisioning many users at once with ``auth.import_users``.
+
+Imported users get a UID derived from their email address, so importing
+the same row twice targets the same account. That makes a partially
+failed import safe to run again: rows whose account and profile already
+exist are reported as ``exists``, and rows whose account was imported
+but whose profile write failed only get the profile.
+"""
+import hashlib
+import os
+
+ROLES = ('admin', 'worker')
+
+# Shortest password Firebase Auth accepts
+MIN_PASSWORD_LENGTH = 6
+
+
+def provisioned_uid(email: str) -> str:
+    """UID of an imported user, stable for a given email address"""
+    return hashlib.sha256(email.strip().lower().encode('utf-8')).hexdigest()[:28]
+
+
+def hash_password(password: str, rounds: int):
+    """
+    Hash a password for import with UserImportHash.pbkdf2_sha256
+    :return: Tuple of (password hash, salt)
+    """
+    salt = os.urandom(16)
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, rounds), salt
+
+
+def validate_import_row(row) -> dict:
+    """
+    Check one row of a user import
+    :param row: Dictionary with email, name, optional role (default worker) and optional password
+    :return: Normalized row
+    :raises ValueError: If the row is invalid
+    """
+    if not isinstance(row, dict):
+        raise ValueError('Expected an object')
+    email = row.get('email')
+    if not isinstance(email, str) or '@' not in email:
+        raise ValueError('Missing or invalid email')
+    name = row.get('name')
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError('Missing name')
+    role = row.get('role') or 'worker'
+    if role not in ROLES:
+        raise ValueError('Invalid role')
+    password = row.get('password') or None
+    if password is not None and (not isinstance(password, str) or len(password) < MIN_PASSWORD_LENGTH):
+        raise ValueError(f'Password must be at least {MIN_PASSWORD_LENGTH} characters')
+    return {'email': email.strip(), 'name': name.strip(), 'role': role, 'password': password}
@@ -0,0 +1,61 @@
+from flask import current_app, jsonify, request
+from .streaming import NDJSON_MIMETYPE, stream_json, wants_stream
+
+
+def read_bulk_items(max_items):
+    """
+    Read the items of a bulk request, either an array in the request format
+    (JSON, msgpack or CBOR) or NDJSON read line by line
+    :param max_items: Maximum number of items accepted
+    :return: List of items
+    :raises ValueError: If the body is malformed or has too many items
+    """
+    if request.mimetype == NDJSON_MIMETYPE:
+        items = []
+        for line_number, line in enumerate(request.stream, 1):
+            if not line.strip():
+                continue
+            if len(items) == max_items:
+                raise ValueError(f'At most {max_items} items per request')
+            try:
+                items.append(current_app.json.loads(line))
+            except ValueError:
+                raise ValueError(f'Line {line_number} is not valid JSON')
+        return items
+
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        raise ValueError('Expected an array or NDJSON body')
+    if len(items) > max_items:
+        raise ValueError(f'At most {max_items} items per request')
+    return items
+
+
+def bulk_validation_error(errors):
+    """Response for a bulk request with invalid items; nothing has been written"""
+    return jsonify({
+        'message': 'Invalid items, nothing was written',
+        'errors': [{'index': index, 'message': message} for index, message in errors]
+    }), 400
+
+
+def bulk_response(results, success_statuses, cleanup_job=None):
+    """
+    Per-item results of a bulk request, as NDJSON if the client asked for it
+    :param results: List of result dictionaries with a 'status'
+    :param success_statuses: Statuses that count as succeeded
+    :param cleanup_job: ID of the cleanup job started by a bulk delete, sent in
+                        the X-Cleanup-Job header
+    """
+    if wants_stream():
+        response = stream_json(results)
+    else:
+        failed = sum(1 for result in results if result['status'] not in success_statuses)
+        response = jsonify({
+            'succeeded': len(results) - failed,
+            'failed': failed,
+            'results': results
+        })
+    if cleanup_job:
+        response.headers['X-Cleanup-Job'] = cleanup_job
+    return response
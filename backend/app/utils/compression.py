@@ -0,0 +1,171 @@
+"""
+Response compression chosen by Accept-Encoding.
+
+Buffered responses are compressed in one go once they reach the size
+threshold. Streamed responses are compressed as they are produced: the SSE
+event stream is flushed after every message so it reaches the client at
+once, while exports (NDJSON, ?stream=true) are only flushed every
+STREAM_FLUSH_BYTES of input, which keeps the ratio close to a buffered body.
+"""
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Media types worth compressing; images and already-compressed bodies are skipped
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/msgpack',
+    'application/cbor',
+    'text/event-stream',
+    'text/html',
+    'text/plain',
+}
+
+
+# Streams that must reach the client message by message
+FLUSH_EVERY_CHUNK_MIMETYPES = {'text/event-stream'}
+
+# Uncompressed bytes between flushes of other streamed responses
+STREAM_FLUSH_BYTES = 64 * 1024
+
+
+class _GzipCompressor:
+    def __init__(self, level):
+        # wbits=31 writes the gzip header and trailer
+        self._compressor = zlib.compressobj(min(max(level, 1), 9), zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=min(max(level, 0), 11))
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=min(max(level, 1), 22)).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+CODECS = {'gzip': _GzipCompressor}
+if brotli is not None:
+    CODECS['br'] = _BrotliCompressor
+if zstandard is not None:
+    CODECS['zstd'] = _ZstdCompressor
+
+
+def _compress_stream(chunks, compressor, flush_bytes=STREAM_FLUSH_BYTES):
+    """
+    Compress a streamed body
+    :param flush_bytes: Flush once this many uncompressed bytes went in since
+                        the last flush; 0 flushes after every chunk
+    """
+    try:
+        pending = 0
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk)
+            pending += len(chunk)
+            if pending >= flush_bytes:
+                data += compressor.flush()
+                pending = 0
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response, encodings, min_size, level):
+    """
+    Compress a response if the client accepts one of the encodings
+    :param response: The outgoing response
+    :param encodings: Enabled encodings in order of preference
+    :param min_size: Buffered bodies smaller than this many bytes are sent as is
+    :param level: Compression level, clamped to each codec's range
+    :return: The same response, compressed in place when worthwhile
+    """
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if request.method == 'HEAD':
+        return response
+    encoding = request.accept_encodings.best_match(encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        flush_bytes = 0 if response.mimetype in FLUSH_EVERY_CHUNK_MIMETYPES else STREAM_FLUSH_BYTES
+        response.response = _compress_stream(response.response, CODECS[encoding](level), flush_bytes)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+        compressor = CODECS[encoding](level)
+        response.set_data(compressor.compress(body) + compressor.finish())
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The encoded bytes differ from the identity representation
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Compress responses using the COMPRESSION_* settings"""
+    encodings = [
+        encoding.strip() for encoding in app.config['COMPRESSION_ENCODINGS'].split(',')
+        if encoding.strip() in CODECS
+    ]
+    min_size = app.config['COMPRESSION_MIN_SIZE']
+    level = app.config['COMPRESSION_LEVEL']
+    if not encodings:
+        return
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, encodings, min_size, level)
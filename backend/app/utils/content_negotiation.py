@@ -0,0 +1,134 @@
+"""
+Binary wire formats negotiated per request.
+
+Clients that send ``Accept: application/msgpack`` (or ``application/cbor``)
+get every ``jsonify`` response encoded in that format instead of JSON, and
+request bodies sent with one of those content types are decoded by
+``request.json`` / ``request.get_json()`` as usual, so routes don't change.
+JSON stays the default; a format is only used when the client ranks it
+above JSON and its library is installed.
+"""
+from datetime import date, datetime
+from flask import Request, has_request_context, request
+from flask.json.provider import JSONProvider
+from .json_provider import firestore_default
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+JSON_MIMETYPE = 'application/json'
+
+
+class WireFormat:
+    """A binary representation of JSON-compatible data"""
+
+    def __init__(self, name, mimetype, encode, decode, aliases=()):
+        self.name = name
+        self.mimetype = mimetype
+        self.encode = encode
+        self.decode = decode
+        self.mimetypes = (mimetype,) + tuple(aliases)
+
+
+def _cbor_default(encoder, value):
+    encoder.encode(firestore_default(value))
+
+
+def _cbor_iso(encoder, value):
+    encoder.encode(value.isoformat())
+
+
+# cbor2 would otherwise write datetimes as tag 0/1 values; send the ISO
+# strings JSON and msgpack use instead. Subclasses such as Firestore's
+# DatetimeWithNanoseconds reach _cbor_default, which does the same.
+_CBOR_ENCODERS = {datetime: _cbor_iso, date: _cbor_iso}
+
+
+WIRE_FORMATS = []
+if msgpack is not None:
+    WIRE_FORMATS.append(WireFormat(
+        'msgpack',
+        'application/msgpack',
+        # Datetimes go through firestore_default as ISO strings, like in JSON
+        lambda obj: msgpack.packb(obj, default=firestore_default, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False),
+        aliases=('application/x-msgpack',)
+    ))
+if cbor2 is not None:
+    WIRE_FORMATS.append(WireFormat(
+        'cbor',
+        'application/cbor',
+        lambda obj: cbor2.dumps(obj, encoders=_CBOR_ENCODERS, default=_cbor_default),
+        cbor2.loads
+    ))
+
+_FORMATS_BY_MIMETYPE = {mimetype: wire_format for wire_format in WIRE_FORMATS for mimetype in wire_format.mimetypes}
+
+
+def negotiated_format():
+    """
+    Pick the response format for the current request
+    :return: WireFormat the client prefers over JSON, or None for JSON
+    """
+    if not has_request_context() or not _FORMATS_BY_MIMETYPE:
+        return None
+    # JSON is listed first so it wins ties such as */*
+    best = request.accept_mimetypes.best_match([JSON_MIMETYPE, *_FORMATS_BY_MIMETYPE])
+    return _FORMATS_BY_MIMETYPE.get(best)
+
+
+class NegotiatingRequest(Request):
+    """Request whose get_json also decodes binary bodies"""
+
+    def get_json(self, force=False, silent=False, cache=True):
+        wire_format = _FORMATS_BY_MIMETYPE.get(self.mimetype)
+        if wire_format is None:
+            return super().get_json(force=force, silent=silent, cache=cache)
+        try:
+            return wire_format.decode(self.get_data(cache=cache))
+        except Exception as e:
+            if silent:
+                return None
+            return self.on_json_loading_failed(ValueError(f"Invalid {wire_format.name} body: {str(e)}"))
+
+
+class NegotiatingProvider(JSONProvider):
+    """
+    Wraps the app's JSON provider; response() encodes in the negotiated
+    format, everything else (dumps, loads, streaming) stays JSON
+    """
+
+    def __init__(self, app, json_provider):
+        super().__init__(app)
+        self.json_provider = json_provider
+
+    def dumps(self, obj, **kwargs):
+        return self.json_provider.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return self.json_provider.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        wire_format = negotiated_format()
+        if wire_format is None:
+            return self.json_provider.response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(wire_format.encode(obj), mimetype=wire_format.mimetype)
+
+
+def init_content_negotiation(app):
+    """Install binary request and response handling on an app whose JSON provider is already set"""
+    app.request_class = NegotiatingRequest
+    app.json = NegotiatingProvider(app, app.json)
+
+    @app.after_request
+    def vary_on_accept(response):
+        response.vary.add('Accept')
+        return response
@@ -0,0 +1,33 @@
+from flask import request
+
+
+def requested_fields(allowed):
+    """
+    Read the ?fields= query parameter, e.g. ?fields=title,date,registered_count
+    :param allowed: Field names the resource can be serialized with
+    :return: frozenset of field names including 'id', or None when all fields are wanted
+    :raises ValueError: If an unknown field is requested
+    """
+    value = request.args.get('fields')
+    if not value:
+        return None
+    fields = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = fields.difference(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return frozenset(fields | {'id'})
+
+
+def requested_includes(allowed):
+    """
+    Read the ?include= query parameter, e.g. ?include=workers
+    :param allowed: Relationships the resource can embed
+    :return: frozenset of relationship names, empty when none were requested
+    :raises ValueError: If an unknown relationship is requested
+    """
+    value = request.args.get('include', '')
+    includes = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = includes.difference(allowed)
+    if unknown:
+        raise ValueError(f"Unknown include: {', '.join(sorted(unknown))}")
+    return frozenset(includes)
@@ -0,0 +1,89 @@
+import hashlib
+import re
+from flask import Response, jsonify, request
+from .content_negotiation import negotiated_format
+from .lazy_import import lazy_import
+
+timestamp_pb2 = lazy_import('google.protobuf.timestamp_pb2')
+
+
+def version_etag(update_time):
+    """
+    Strong ETag for a single document, derived from its update time
+    :param update_time: The snapshot's update_time (DatetimeWithNanoseconds)
+    :return: ETag value (unquoted), or None if the time is unknown
+    """
+    if update_time is None:
+        return None
+    seconds = int(update_time.timestamp())
+    nanos = getattr(update_time, 'nanosecond', 0) or update_time.microsecond * 1000
+    return f"{seconds}.{nanos:09d}"
+
+
+def parse_version_etag(etag):
+    """
+    Reverse version_etag
+    :param etag: ETag value sent in If-Match
+    :return: protobuf Timestamp usable as a last_update_time precondition, None if malformed
+    """
+    # Ignore format and projection qualifiers added to the version
+    match = re.match(r'(\d+)\.(\d{9})(?!\d)', etag or '')
+    if match is None:
+        return None
+    return timestamp_pb2.Timestamp(seconds=int(match.group(1)), nanos=int(match.group(2)))
+
+
+def hashed_etag(*parts):
+    """ETag value for arbitrary parts, e.g. a collection version plus the query"""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def projection_etag(etag, fields):
+    """Qualify a version ETag with the ?fields= projection the response was built with"""
+    if etag is None or fields is None:
+        return etag
+    return f"{etag}-{hashed_etag(*sorted(fields))[:8]}"
+
+
+def representation_etag(etag):
+    """
+    Qualify an ETag with the negotiated wire format, since a strong ETag
+    must differ between the JSON and binary encodings of the same version
+    """
+    wire_format = negotiated_format()
+    if etag is None or wire_format is None:
+        return etag
+    return f"{etag}+{wire_format.name}"
+
+
+def is_not_modified(etag):
+    """Check the request's If-None-Match against an ETag before building the response"""
+    # Weak comparison, since compressed responses carry weakened ETags
+    return etag is not None and request.if_none_match.contains_weak(representation_etag(etag))
+
+
+def not_modified(etag):
+    """Build a 304 response for an ETag"""
+    response = Response(status=304)
+    response.set_etag(representation_etag(etag))
+    response.vary.add('Accept')
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def conditional_json(payload, etag=None, version=None):
+    """
+    jsonify a payload with a strong ETag, answering 304 when If-None-Match matches
+    :param payload: Data to serialize
+    :param etag: Precomputed ETag value; defaults to a hash of the body
+    :param version: Optional version ETag to prefix a body hash with, so the
+                    ETag can still be sent back as an If-Match precondition
+    """
+    response = jsonify(payload)
+    if etag:
+        response.set_etag(representation_etag(etag))
+    else:
+        body_hash = hashlib.sha1(response.get_data()).hexdigest()
+        response.set_etag(f"{version}-{body_hash}" if version else body_hash)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
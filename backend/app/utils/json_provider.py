@@ -0,0 +1,83 @@
+"""
+JSON providers that understand Firestore values and our models.
+
+Both providers serialize ``datetime`` (including Firestore's
+``DatetimeWithNanoseconds``) as ISO 8601, ``SERVER_TIMESTAMP`` and other
+write sentinels as null, and any object with a ``to_json`` method (Event,
+User, LazyUser) through that method, so routes can hand model objects
+straight to ``jsonify`` without building ``{'id': ..., **to_dict()}`` copies.
+``OrjsonProvider`` does the encoding in orjson and is used when orjson is
+installed; ``FirestoreJSONProvider`` is the pure-Python fallback.
+"""
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+from .lazy_import import lazy_import
+
+transforms = lazy_import('google.cloud.firestore_v1.transforms')
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def firestore_default(value):
+    """Encode values the JSON encoder doesn't handle natively"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    to_json = getattr(value, 'to_json', None)
+    if to_json is not None:
+        return to_json()
+    if isinstance(value, transforms.Sentinel):
+        # e.g. SERVER_TIMESTAMP echoed back before the write resolved it
+        return None
+    return DefaultJSONProvider.default(value)
+
+
+class FirestoreJSONProvider(DefaultJSONProvider):
+    """The standard library encoder with Firestore and model support"""
+    default = staticmethod(firestore_default)
+
+
+class OrjsonProvider(FirestoreJSONProvider):
+    """
+    orjson-backed provider. orjson encodes plain datetimes itself but not
+    subclasses, so Firestore's DatetimeWithNanoseconds still goes through
+    firestore_default, which produces the same ISO 8601 text.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.pop('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.pop('indent', None):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=firestore_default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        # Skip the bytes -> str -> bytes round trip of dumps()
+        return self._app.response_class(
+            orjson.dumps(obj, default=firestore_default, option=option),
+            mimetype=self.mimetype
+        )
+
+
+def create_json_provider(app, name):
+    """
+    Build the JSON provider selected by the JSON_PROVIDER setting
+    :param app: The Flask app
+    :param name: 'orjson' or 'default'
+    :return: Provider instance; falls back to the standard library encoder if orjson is missing
+    """
+    if name == 'orjson':
+        if orjson is not None:
+            return OrjsonProvider(app)
+        print("orjson is not installed, using the default JSON provider")
+    return FirestoreJSONProvider(app)
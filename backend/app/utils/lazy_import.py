@@ -0,0 +1,43 @@
+"""
+Deferred imports for heavy dependencies.
+
+firebase_admin, google-cloud-firestore and gRPC take around half a second
+to import. Modules that only need them once a request reaches Firestore
+bind them with ``lazy_import`` instead, so importing the app (and starting
+the WSGI server) doesn't pay for them; the real import happens on first
+attribute access.
+"""
+import importlib
+import threading
+
+
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self._name)
+            return self._module
+
+    def __getattr__(self, attribute):
+        module = self._module or self._load()
+        return getattr(module, attribute)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """
+    Bind a module without importing it yet
+    :param name: Absolute module name, e.g. 'firebase_admin.firestore'
+    :return: LazyModule
+    """
+    return LazyModule(name)
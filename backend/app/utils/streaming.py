@@ -0,0 +1,51 @@
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_stream():
+    """
+    Check whether the client asked for a streamed listing, either NDJSON
+    through the Accept header or a JSON array with ?stream=true
+    """
+    if request.args.get('stream', '').lower() == 'true':
+        return True
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_json(items, serialize=None):
+    """
+    Stream a listing item by item with chunked transfer encoding, so only
+    one item is held in memory at a time regardless of the listing's size
+    :param items: Iterable (usually a generator) of model objects
+    :param serialize: Optional callable turning one item into a JSON-serializable
+                      value; model objects are handled by the app's JSON provider
+    :return: NDJSON response if the client accepts it, otherwise a JSON array
+    """
+    ndjson = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+    dumps = current_app.json.dumps
+    serialize = serialize or (lambda item: item)
+
+    def generate():
+        try:
+            if ndjson:
+                for item in items:
+                    yield dumps(serialize(item)) + '\n'
+                return
+
+            yield '['
+            separator = ''
+            for item in items:
+                yield separator + dumps(serialize(item))
+                separator = ','
+            yield ']'
+        except Exception as e:
+            # Headers are already sent; ending the body early tells the client it is incomplete
+            print(f"Error streaming response: {str(e)}")
+            raise
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=NDJSON_MIMETYPE if ndjson else 'application/json'
+    )
@@ -8,6 +8,86 @@ class Config:
     """Base configuration."""
     SECRET_KEY = os.getenv('JWT_SECRET')
     FIREBASE_CREDENTIALS_PATH = os.getenv('FIREBASE_CREDENTIALS_PATH')
+    FIREBASE_PROJECT_ID = os.getenv('FIREBASE_PROJECT_ID')
+
+    # ID token verification. Tokens from the Auth emulator are unsigned, so
+    # local verification is off by default when the emulator is in use
+    LOCAL_TOKEN_VERIFICATION = os.getenv(
+        'LOCAL_TOKEN_VERIFICATION', 'false' if os.getenv('FIREBASE_AUTH_EMULATOR_HOST') else 'true'
+    ).lower() == 'true'
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+    TOKEN_KEY_REFRESH_MARGIN = int(os.getenv('TOKEN_KEY_REFRESH_MARGIN', '300'))
+
+    # User profile cache used by the auth decorators
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '5000'))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '60'))
+
+    # Authorization: 'claims' reads the role from the verified token, 'datastore' loads the profile
+    AUTH_ROLE_SOURCE = os.getenv('AUTH_ROLE_SOURCE', 'claims')
+    # Load the profile when a token has no role claim or predates a role change
+    AUTH_CLAIMS_FALLBACK = os.getenv('AUTH_CLAIMS_FALLBACK', 'true').lower() == 'true'
+    # Seconds a user's profile existence and last role change are cached, i.e.
+    # how long other instances keep trusting a token after a demotion or delete
+    AUTH_STATE_TTL = int(os.getenv('AUTH_STATE_TTL', '30'))
+
+    # When to initialize Firebase: 'background' when the app is created, or
+    # 'lazy' on the first request that needs it (or the first /readyz probe)
+    FIREBASE_INIT = os.getenv('FIREBASE_INIT', 'background')
+
+    # Firestore client: gRPC channels in the pool, keepalive ping interval and
+    # timeout, and whether to open every channel with a read at startup
+    FIRESTORE_CHANNELS = int(os.getenv('FIRESTORE_CHANNELS', '4'))
+    FIRESTORE_KEEPALIVE_TIME_MS = int(os.getenv('FIRESTORE_KEEPALIVE_TIME_MS', '30000'))
+    FIRESTORE_KEEPALIVE_TIMEOUT_MS = int(os.getenv('FIRESTORE_KEEPALIVE_TIMEOUT_MS', '10000'))
+    FIRESTORE_WARM_UP = os.getenv('FIRESTORE_WARM_UP', 'true').lower() == 'true'
+
+    # Shift registration transactions
+    REGISTRATION_MAX_ATTEMPTS = int(os.getenv('REGISTRATION_MAX_ATTEMPTS', '5'))
+    REGISTRATION_BACKOFF_BASE = float(os.getenv('REGISTRATION_BACKOFF_BASE', '0.02'))
+    REGISTRATION_BACKOFF_MAX = float(os.getenv('REGISTRATION_BACKOFF_MAX', '0.5'))
+    # Default layout for new events: 'embedded' or 'sharded' (for high-demand shifts)
+    REGISTRATION_LAYOUT = os.getenv('REGISTRATION_LAYOUT', 'embedded')
+    REGISTRATION_SHARDS = int(os.getenv('REGISTRATION_SHARDS', '10'))
+
+    # Serve event reads from an in-memory replica fed by a snapshot listener
+    EVENT_REPLICA = os.getenv('EVENT_REPLICA', 'false').lower() == 'true'
+    EVENT_REPLICA_MAX_LAG = float(os.getenv('EVENT_REPLICA_MAX_LAG', '5'))
+    # Seconds without the listener confirming it is current before the replica
+    # counts as stalled; Firestore confirms idle listeners periodically
+    EVENT_REPLICA_MAX_IDLE = float(os.getenv('EVENT_REPLICA_MAX_IDLE', '300'))
+
+    # Server-Sent Events stream of event changes
+    EVENT_STREAM_QUEUE_SIZE = int(os.getenv('EVENT_STREAM_QUEUE_SIZE', '100'))
+    EVENT_STREAM_HISTORY_SIZE = int(os.getenv('EVENT_STREAM_HISTORY_SIZE', '1000'))
+    EVENT_STREAM_HEARTBEAT = int(os.getenv('EVENT_STREAM_HEARTBEAT', '15'))
+
+    # Delta sync: how long deleted events are remembered
+    TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', '30'))
+
+    # Response JSON encoder: 'orjson' or 'default' (standard library)
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+
+    # Bulk event endpoints: items per request and batches committed in parallel
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '10000'))
+    BULK_WRITE_CONCURRENCY = int(os.getenv('BULK_WRITE_CONCURRENCY', '8'))
+
+    # Cleanup of references to deleted users and events: background workers,
+    # failed batches in a row before giving up, and how long jobs are kept
+    CLEANUP_JOB_WORKERS = int(os.getenv('CLEANUP_JOB_WORKERS', '1'))
+    CLEANUP_MAX_ATTEMPTS = int(os.getenv('CLEANUP_MAX_ATTEMPTS', '5'))
+    CLEANUP_JOB_RETENTION_DAYS = int(os.getenv('CLEANUP_JOB_RETENTION_DAYS', '7'))
+    # A queued or running job not saved for this long is taken over by run_cleanup_jobs.py;
+    # keep it above the time cleaning up after one ID takes
+    CLEANUP_JOB_LEASE_SECONDS = int(os.getenv('CLEANUP_JOB_LEASE_SECONDS', '600'))
+
+    # PBKDF2-SHA256 rounds for passwords hashed before a bulk user import
+    USER_IMPORT_HASH_ROUNDS = int(os.getenv('USER_IMPORT_HASH_ROUNDS', '10000'))
+
+    # Response compression: encodings in order of preference ('' disables),
+    # smallest body worth compressing in bytes, and compression level
+    COMPRESSION_ENCODINGS = os.getenv('COMPRESSION_ENCODINGS', 'zstd,br,gzip')
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '5'))
     
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.firebase_service import FirebaseService
+
+if __name__ == '__main__':
+    updated = FirebaseService().backfill_open_slots()
+    print(f"Backfilled open_slots and date on {updated} events")
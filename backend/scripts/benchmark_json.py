@@ -0,0 +1,92 @@
+"""
+Compare JSON serialization throughput of the response encoders on a
+large events payload.
+
+    python scripts/benchmark_json.py [--events 10000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta, timezone
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from app.models.event import Event
+from app.utils.json_provider import FirestoreJSONProvider, OrjsonProvider, orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+def build_events(count):
+    start = DatetimeWithNanoseconds(2025, 1, 1, 8, 0, tzinfo=timezone.utc)
+    return [
+        Event(
+            id=f"event-{index:06d}",
+            title=f"Shift {index}",
+            description='Front desk and check-in for the evening session',
+            date=start + timedelta(hours=index),
+            required_workers=5,
+            registered_workers=[f"user-{index + offset}" for offset in range(index % 5)]
+        )
+        for index in range(count)
+    ]
+
+
+def measure(label, encode, repeat):
+    best = None
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(encode())
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{label:<44} {best * 1000:8.1f} ms  {size / best / 1e6:8.1f} MB/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    events = build_events(args.events)
+    print(f"Serializing {len(events)} events, best of {args.repeat}")
+
+    with app.app_context():
+        default = DefaultJSONProvider(app)
+        baseline = measure(
+            'stdlib, {id, **to_dict()} copies (before)',
+            lambda: default.response([{'id': event.id, **event.to_dict()} for event in events]).get_data(),
+            args.repeat
+        )
+        firestore_provider = FirestoreJSONProvider(app)
+        measure(
+            'stdlib, models passed directly',
+            lambda: firestore_provider.response(events).get_data(),
+            args.repeat
+        )
+        if orjson is None:
+            print('orjson is not installed, skipping')
+            return
+        orjson_provider = OrjsonProvider(app)
+        best = measure(
+            'orjson, models passed directly',
+            lambda: orjson_provider.response(events).get_data(),
+            args.repeat
+        )
+        orjson_provider.sort_keys = False
+        unsorted = measure(
+            'orjson, models passed directly, unsorted keys',
+            lambda: orjson_provider.response(events).get_data(),
+            args.repeat
+        )
+        print(f"orjson speedup: {baseline / best:.1f}x ({baseline / unsorted:.1f}x without sorting)")
+
+
+if __name__ == '__main__':
+    main()
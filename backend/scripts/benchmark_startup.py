@@ -0,0 +1,123 @@
+"""
+Measure cold start: app import, create_app, first requests and time until
+/readyz reports the Firestore channels warm. Each run is a fresh process.
+
+    python scripts/benchmark_startup.py [--runs 5] [--init background|lazy] [--token ID_TOKEN] [--imports 10]
+
+With --token, the first authenticated request (GET /api/events?limit=1) is
+timed as well.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child process and writes one JSON object of timings in ms to RESULT_PATH
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+def elapsed():
+    return round(1000 * (time.perf_counter() - started), 1)
+def timed(fn):
+    before = time.perf_counter()
+    result = fn()
+    return result, round(1000 * (time.perf_counter() - before), 1)
+
+sys.path.insert(0, BACKEND_DIR)
+from app import create_app
+result = {'import_ms': elapsed()}
+app, result['create_app_ms'] = timed(create_app)
+client = app.test_client()
+response, result['first_healthz_ms'] = timed(lambda: client.get('/healthz'))
+result['listening_ms'] = elapsed()
+
+deadline = time.perf_counter() + TIMEOUT
+while True:
+    response = client.get('/readyz')
+    if response.status_code == 200 or time.perf_counter() > deadline:
+        break
+    time.sleep(0.01)
+result['ready'] = response.status_code == 200
+result['ready_ms'] = elapsed()
+if not result['ready']:
+    result['readyz'] = response.get_json()
+
+if TOKEN:
+    response, result['first_request_ms'] = timed(
+        lambda: client.get('/api/events/?limit=1', headers={'Authorization': 'Bearer ' + TOKEN})
+    )
+    result['first_request_status'] = response.status_code
+    _, result['second_request_ms'] = timed(
+        lambda: client.get('/api/events/?limit=1', headers={'Authorization': 'Bearer ' + TOKEN})
+    )
+with open(RESULT_PATH, 'w') as f:
+    json.dump(result, f)
+'''
+
+TIMINGS = ['import_ms', 'create_app_ms', 'first_healthz_ms', 'listening_ms', 'ready_ms',
+           'first_request_ms', 'second_request_ms']
+
+
+def run_child(args):
+    with tempfile.TemporaryDirectory() as directory:
+        result_path = os.path.join(directory, 'result.json')
+        settings = {'BACKEND_DIR': BACKEND_DIR, 'TIMEOUT': args.timeout, 'TOKEN': args.token, 'RESULT_PATH': result_path}
+        code = ''.join(f"{name} = {value!r}\n" for name, value in settings.items()) + CHILD
+        env = dict(os.environ, FIREBASE_INIT=args.init)
+        completed = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env,
+                                   capture_output=True, text=True)
+        if completed.returncode != 0 or not os.path.exists(result_path):
+            print(completed.stdout + completed.stderr)
+            sys.exit(f"Run failed with exit code {completed.returncode}")
+        with open(result_path) as f:
+            return json.load(f)
+
+
+def heaviest_imports(count):
+    """Modules with the largest cumulative import time when importing the app"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--init', choices=['background', 'lazy'], default='background',
+                        help='FIREBASE_INIT for the measured processes')
+    parser.add_argument('--token', help='Firebase ID token for timing the first API request')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Seconds to wait for /readyz')
+    parser.add_argument('--imports', type=int, default=10, help='Show the N heaviest imports (0 to skip)')
+    args = parser.parse_args()
+
+    results = [run_child(args) for _ in range(args.runs)]
+    print(f"Cold start over {args.runs} runs, FIREBASE_INIT={args.init}")
+    print(f"{'step':<20} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+    for name in TIMINGS:
+        values = [result[name] for result in results if name in result]
+        if values:
+            print(f"{name:<20} {statistics.median(values):>10.1f} {min(values):>10.1f} {max(values):>10.1f}")
+    not_ready = [result for result in results if not result['ready']]
+    if not_ready:
+        print(f"{len(not_ready)} runs never became ready: {not_ready[0].get('readyz')}")
+
+    if args.imports:
+        print("\nHeaviest imports of the app module (cumulative):")
+        for micros, module in heaviest_imports(args.imports):
+            print(f"{micros / 1000:>8.1f} ms  {module}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Compare payload size and encode/decode time of JSON and the negotiated
+binary formats on a large events payload.
+
+    python scripts/benchmark_wire_formats.py [--events 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.content_negotiation import WIRE_FORMATS
+from app.utils.json_provider import firestore_default, orjson
+from benchmark_json import build_events
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Compare encoders on the same plain data the response providers see
+    payload = [event.to_json() for event in build_events(args.events)]
+    print(f"Encoding {len(payload)} events, best of {args.repeat}")
+
+    codecs = [('json (stdlib)', lambda obj: json.dumps(obj, default=firestore_default).encode('utf-8'), json.loads)]
+    if orjson is not None:
+        codecs.append(('json (orjson)', lambda obj: orjson.dumps(obj, default=firestore_default), orjson.loads))
+    codecs.extend((wire_format.name, wire_format.encode, wire_format.decode) for wire_format in WIRE_FORMATS)
+
+    print(f"{'format':<16} {'bytes':>10} {'vs json':>8} {'encode ms':>10} {'decode ms':>10}")
+    json_size = None
+    for name, encode, decode in codecs:
+        body = encode(payload)
+        json_size = json_size or len(body)
+        encode_time = best_time(lambda: encode(payload), args.repeat)
+        decode_time = best_time(lambda: decode(body), args.repeat)
+        print(f"{name:<16} {len(body):>10} {len(body) / json_size:>7.0%} {encode_time * 1000:>10.1f} {decode_time * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
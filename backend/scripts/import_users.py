@@ -0,0 +1,88 @@
+"""
+Provision users from a CSV (email,name,role,password columns) or NDJSON file.
+
+    python scripts/import_users.py workers.csv [--report workers.csv.report.ndjson] [--resume]
+
+Every row is validated before anything is written. Results are appended to
+the report one chunk at a time, so an interrupted or partially failed run
+can be continued with --resume, which skips rows already created.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.firebase_service import FirebaseService, AUTH_IMPORT_BATCH_SIZE
+from app.services.user_import import validate_import_row
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def reported_emails(path):
+    """Emails the report already lists as created or existing"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as f:
+        results = [json.loads(line) for line in f if line.strip()]
+    return {result['email'].lower() for result in results if result['status'] in ('created', 'exists')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('input')
+    parser.add_argument('--report', help='NDJSON report file (default: <input>.report.ndjson)')
+    parser.add_argument('--resume', action='store_true', help='Skip rows the report lists as done')
+    parser.add_argument('--chunk-size', type=int, default=AUTH_IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    report_path = args.report or f"{args.input}.report.ndjson"
+
+    rows = []
+    seen = set()
+    errors = 0
+    for line_number, item in enumerate(read_rows(args.input), 1):
+        try:
+            row = validate_import_row(item)
+            if row['email'].lower() in seen:
+                raise ValueError('Duplicate email')
+        except ValueError as e:
+            print(f"Row {line_number}: {e}")
+            errors += 1
+            continue
+        seen.add(row['email'].lower())
+        rows.append(row)
+    if errors:
+        print(f"{errors} invalid rows, nothing was imported")
+        sys.exit(1)
+
+    if args.resume:
+        done = reported_emails(report_path)
+        rows = [row for row in rows if row['email'].lower() not in done]
+        print(f"Resuming: {len(done)} rows already done")
+
+    firebase_service = FirebaseService()
+    counts = {}
+    with open(report_path, 'a' if args.resume else 'w', encoding='utf-8') as report:
+        for start in range(0, len(rows), args.chunk_size):
+            for result in firebase_service.import_users(rows[start:start + args.chunk_size]):
+                counts[result['status']] = counts.get(result['status'], 0) + 1
+                report.write(json.dumps(result) + '\n')
+            report.flush()
+            print(f"Processed {min(start + args.chunk_size, len(rows))}/{len(rows)} rows")
+
+    print(', '.join(f"{status}: {count}" for status, count in sorted(counts.items())) or 'Nothing to import')
+    print(f"Report written to {report_path}")
+    if counts.get('failed'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
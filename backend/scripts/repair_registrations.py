@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.firebase_service import FirebaseService
+
+if __name__ == '__main__':
+    report = FirebaseService().repair_registration_indexes()
+    print(f"Checked {report['users_checked']} users, fixed {report['users_fixed']}")
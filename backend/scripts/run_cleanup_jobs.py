@@ -0,0 +1,13 @@
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.firebase_service import FirebaseService
+
+if __name__ == '__main__':
+    results = FirebaseService().resume_cleanup_jobs()
+    for job_id, status in results:
+        print(f"Cleanup job {job_id}: {status}")
+    print(f"Ran {len(results)} unfinished cleanup jobs")
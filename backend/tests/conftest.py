@@ -0,0 +1,70 @@
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app import create_app
+from app.services import transactions
+from app.services.cache import TTLCache
+from app.services.cleanup_jobs import run_job
+from app.services.firebase_service import FirebaseService
+from app.services.transactions import TransactionStats
+from firestore_fake import FakeFirestore, transactional
+
+
+class InlineJobRunner:
+    """CleanupJobRunner that runs each job before submit returns"""
+
+    def __init__(self):
+        self.statuses = []
+
+    def submit(self, job_ref, job_data, cleanup):
+        self.statuses.append(run_job(job_ref, job_data, cleanup))
+
+
+@pytest.fixture
+def db():
+    return FakeFirestore()
+
+
+@pytest.fixture
+def service(db, monkeypatch):
+    """FirebaseService on the in-memory Firestore, without starting Firebase"""
+    monkeypatch.setattr(transactions, 'firestore', SimpleNamespace(transactional=transactional))
+    monkeypatch.setattr(transactions.time, 'sleep', lambda seconds: None)
+    service = object.__new__(FirebaseService)
+    service.db = db
+    service.token_verifier = None
+    service.user_cache = TTLCache(max_size=100, ttl=60)
+    service.auth_states = TTLCache(max_size=100, ttl=60)
+    service.registration_stats = TransactionStats()
+    service.event_replica = None
+    service.event_broadcaster = None
+    service._broadcaster_lock = threading.Lock()
+    service.cleanup_runner = InlineJobRunner()
+    return service
+
+
+@pytest.fixture
+def client(service, db, monkeypatch):
+    """
+    Test client of the app on the fake-backed service. The bearer tokens
+    'admin-token' and 'worker-token' sign in as admin1 and worker1.
+    """
+    monkeypatch.setattr(FirebaseService, '_instance', service)
+    issued_at = int(time.time())
+    tokens = {
+        'admin-token': {'uid': 'admin1', 'role': 'admin', 'iat': issued_at},
+        'worker-token': {'uid': 'worker1', 'role': 'worker', 'iat': issued_at},
+    }
+    service.verify_token = tokens.get
+    db.put('users/admin1', {'name': 'Admin', 'role': 'admin', 'registered_events': []})
+    db.put('users/worker1', {'name': 'Worker', 'role': 'worker', 'registered_events': []})
+    return create_app('testing').test_client()
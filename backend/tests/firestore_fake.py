@@ -0,0 +1,344 @@
+"""
+In-memory stand-ins for the Firestore client and firebase_admin.auth.
+
+They implement the subset of the API the services use, with Firestore's
+semantics where tests depend on them: batches and transactions apply all
+their writes or none, update() and create() check existence, write options
+check the document's update time, and a transaction whose reads changed
+before its commit fails with Aborted.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+
+DOCUMENT_ID = '__name__'
+
+_MISSING = object()
+
+
+def _sort_key(value):
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, value.timestamp())
+    return (4, str(value))
+
+
+class Snapshot:
+    def __init__(self, reference, data, update_time, field_paths=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self.update_time = update_time
+        if data is not None and field_paths is not None:
+            data = {key: value for key, value in data.items() if key in field_paths}
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field):
+        if self._data is None or field not in self._data:
+            raise KeyError(field)
+        return self._data[field]
+
+
+class DocumentReference:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+
+    def collection(self, name):
+        return CollectionReference(self._db, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None):
+        snapshot = self._db._snapshot(self, field_paths)
+        if transaction is not None:
+            transaction._record_read(snapshot)
+        return snapshot
+
+    def set(self, data, merge=False):
+        self._db._commit([('set', self, data, merge)])
+
+    def create(self, data):
+        self._db._commit([('create', self, data, None)])
+
+    def update(self, data, option=None):
+        self._db._commit([('update', self, data, option)])
+
+    def delete(self, option=None):
+        self._db._commit([('delete', self, None, option)])
+
+
+class Query:
+    def __init__(self, db, path, filters=(), orders=(), after=None, max_results=None, field_paths=None):
+        self._db = db
+        self._path = path
+        self._filters = list(filters)
+        self._orders = list(orders)
+        self._after = after
+        self._limit = max_results
+        self._field_paths = field_paths
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, orders=self._orders, after=self._after,
+                     max_results=self._limit, field_paths=self._field_paths)
+        state.update(changes)
+        return Query(self._db, self._path, **state)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self._filters + [(field, op, value)])
+
+    def order_by(self, field):
+        return self._copy(orders=self._orders + [field])
+
+    def start_after(self, values):
+        return self._copy(after=values)
+
+    def limit(self, count):
+        return self._copy(max_results=count)
+
+    def select(self, field_paths):
+        return self._copy(field_paths=list(field_paths))
+
+    def _matches(self, data):
+        for field, op, value in self._filters:
+            current = data.get(field, _MISSING)
+            if current is _MISSING:
+                return False
+            if op == '==' and current != value:
+                return False
+            if op == 'in' and current not in value:
+                return False
+            if op == 'array_contains' and not (isinstance(current, list) and value in current):
+                return False
+            if op in ('<', '<=', '>', '>='):
+                if _sort_key(current)[0] != _sort_key(value)[0]:
+                    return False
+                left, right = _sort_key(current), _sort_key(value)
+                if not {'<': left < right, '<=': left <= right, '>': left > right, '>=': left >= right}[op]:
+                    return False
+        return True
+
+    def _position(self, doc_id, data):
+        orders = self._orders or [DOCUMENT_ID]
+        return tuple(_sort_key(doc_id if field == DOCUMENT_ID else data.get(field)) for field in orders)
+
+    def stream(self):
+        with self._db._lock:
+            rows = [
+                (path.rsplit('/', 1)[-1], path, data, update_time)
+                for path, (data, update_time) in self._db._documents.items()
+                if path.rsplit('/', 1)[0] == self._path and self._matches(data)
+            ]
+        rows.sort(key=lambda row: self._position(row[0], row[2]) + (row[0],))
+        if self._after is not None:
+            orders = self._orders or [DOCUMENT_ID]
+            after = tuple(_sort_key(self._after.get(field)) for field in orders)
+            rows = [row for row in rows if self._position(row[0], row[2]) > after]
+        if self._limit:
+            rows = rows[:self._limit]
+        return iter([
+            Snapshot(DocumentReference(self._db, path), dict(data), update_time, self._field_paths)
+            for _, path, data, update_time in rows
+        ])
+
+
+class CollectionReference(Query):
+    def __init__(self, db, path):
+        super().__init__(db, path)
+        self.id = path.rsplit('/', 1)[-1]
+
+    def document(self, document_id=None):
+        if document_id is None:
+            document_id = f"auto{next(self._db._ids)}"
+        return DocumentReference(self._db, f"{self._path}/{document_id}")
+
+
+class WriteBatch:
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(('set', reference, data, merge))
+
+    def create(self, reference, data):
+        self._writes.append(('create', reference, data, None))
+
+    def update(self, reference, data, option=None):
+        self._writes.append(('update', reference, data, option))
+
+    def delete(self, reference, option=None):
+        self._writes.append(('delete', reference, None, option))
+
+    def commit(self):
+        self._db._commit(self._writes)
+
+
+class Transaction(WriteBatch):
+    def __init__(self, db):
+        super().__init__(db)
+        self._reads = {}
+
+    def _record_read(self, snapshot):
+        self._reads.setdefault(snapshot.reference.path, snapshot.update_time)
+
+    def get_all(self, references):
+        snapshots = [reference.get() for reference in references]
+        for snapshot in snapshots:
+            self._record_read(snapshot)
+        return snapshots
+
+    def commit(self):
+        self._db._commit(self._writes, reads=self._reads)
+
+
+def transactional(fn):
+    """Stand-in for firestore.transactional with a single attempt"""
+    def run(transaction):
+        result = fn(transaction)
+        transaction.commit()
+        return result
+    return run
+
+
+class FakeFirestore:
+    def __init__(self):
+        self._documents = {}
+        self._lock = threading.RLock()
+        self._ids = iter(range(1, 10 ** 9))
+        self._clock = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        # Callables run before each commit, e.g. to simulate a concurrent writer
+        self.before_commit = []
+
+    def collection(self, name):
+        return CollectionReference(self, name)
+
+    def document(self, path):
+        return DocumentReference(self, path)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def transaction(self, max_attempts=1):
+        return Transaction(self)
+
+    def get_all(self, references, field_paths=None):
+        return [reference.get(field_paths=field_paths) for reference in references]
+
+    def write_option(self, last_update_time):
+        return SimpleNamespace(last_update_time=last_update_time)
+
+    def data(self, path):
+        """Stored data of a document, None if it doesn't exist"""
+        entry = self._documents.get(path)
+        return dict(entry[0]) if entry is not None else None
+
+    def put(self, path, data):
+        """Write a document directly, outside any batch"""
+        self._commit([('set', DocumentReference(self, path), data, False)])
+
+    def _snapshot(self, reference, field_paths=None):
+        with self._lock:
+            data, update_time = self._documents.get(reference.path, (None, None))
+            return Snapshot(reference, dict(data) if data is not None else None, update_time, field_paths)
+
+    def _tick(self):
+        self._clock += timedelta(microseconds=1)
+        return self._clock
+
+    def _commit(self, writes, reads=None):
+        for hook in list(self.before_commit):
+            hook()
+        with self._lock:
+            for path, update_time in (reads or {}).items():
+                current = self._documents.get(path)
+                if (current[1] if current else None) != update_time:
+                    raise exceptions.Aborted(f"{path} changed during the transaction")
+            for operation, reference, _, option in writes:
+                current = self._documents.get(reference.path)
+                if operation == 'create' and current is not None:
+                    raise exceptions.AlreadyExists(reference.path)
+                if operation == 'update' and current is None:
+                    raise exceptions.NotFound(reference.path)
+                if operation in ('update', 'delete') and option is not None and (current is None or current[1] != option.last_update_time):
+                    raise exceptions.FailedPrecondition(f"{reference.path} was changed")
+
+            update_time = self._tick()
+            now = datetime.now(timezone.utc)
+            for operation, reference, data, merge in writes:
+                if operation == 'delete':
+                    self._documents.pop(reference.path, None)
+                    continue
+                current = self._documents.get(reference.path)
+                stored = dict(current[0]) if current is not None and operation in ('update', 'set') else {}
+                if operation == 'set' and not merge:
+                    stored = {}
+                for key, value in data.items():
+                    self._apply(stored, key.split('.'), value, now)
+                self._documents[reference.path] = (stored, update_time)
+
+    def _apply(self, stored, keys, value, now):
+        for key in keys[:-1]:
+            stored = stored.setdefault(key, {})
+        key = keys[-1]
+        old = stored.get(key)
+        if value is transforms.DELETE_FIELD:
+            stored.pop(key, None)
+        elif value is transforms.SERVER_TIMESTAMP:
+            stored[key] = now
+        elif isinstance(value, transforms.Increment):
+            stored[key] = (old or 0) + value.value
+        elif isinstance(value, transforms.ArrayUnion):
+            stored[key] = list(old or []) + [item for item in value.values if item not in (old or [])]
+        elif isinstance(value, transforms.ArrayRemove):
+            stored[key] = [item for item in (old or []) if item not in value.values]
+        else:
+            stored[key] = value
+
+
+class UserNotFoundError(Exception):
+    pass
+
+
+class FakeAuth:
+    """firebase_admin.auth with accounts kept in memory"""
+
+    UserNotFoundError = UserNotFoundError
+    UidIdentifier = staticmethod(lambda uid: ('uid', uid))
+    EmailIdentifier = staticmethod(lambda email: ('email', email))
+    ImportUserRecord = staticmethod(lambda **fields: SimpleNamespace(**fields))
+    UserImportHash = SimpleNamespace(pbkdf2_sha256=lambda rounds: ('pbkdf2_sha256', rounds))
+
+    def __init__(self):
+        self.accounts = {}
+
+    def add(self, uid, email, **fields):
+        self.accounts[uid] = SimpleNamespace(uid=uid, email=email.lower(), **fields)
+
+    def get_users(self, identifiers):
+        users = []
+        for kind, value in identifiers:
+            for account in self.accounts.values():
+                if (kind == 'uid' and account.uid == value) or (kind == 'email' and account.email == value.lower()):
+                    users.append(account)
+        return SimpleNamespace(users=users)
+
+    def import_users(self, records, hash_alg=None):
+        # Like Firebase, imports don't check that emails are unique
+        for record in records:
+            self.add(record.uid, record.email, display_name=record.display_name, custom_claims=record.custom_claims)
+        return SimpleNamespace(errors=[])
+
+    def delete_user(self, uid):
+        if self.accounts.pop(uid, None) is None:
+            raise UserNotFoundError(uid)
@@ -0,0 +1,70 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import jwt
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from app.services.token_verifier import DEFAULT_MAX_AGE, ISSUER_PREFIX
+
+
+class FakeKeyServer:
+    """
+    Offline stand-in for the Google signing-key endpoint.
+
+    Pass ``server.fetch`` as the fetcher of a SigningKeyCache and use
+    ``mint_token`` to produce tokens that a TokenVerifier for the same
+    project accepts.
+    """
+
+    def __init__(self, project_id='shiftease-test', max_age=DEFAULT_MAX_AGE):
+        self.project_id = project_id
+        self.max_age = max_age
+        self.requests = 0
+        self.rotate()
+
+    def rotate(self):
+        """Replace the signing key, as Google does periodically"""
+        self.kid = uuid.uuid4().hex
+        self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'securetoken.system.gserviceaccount.com')])
+        now = datetime.utcnow()
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(self._private_key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - timedelta(days=1))
+            .not_valid_after(now + timedelta(days=1))
+            .sign(self._private_key, hashes.SHA256())
+        )
+        self._cert_pem = cert.public_bytes(serialization.Encoding.PEM).decode('utf-8')
+
+    def fetch(self):
+        self.requests += 1
+        return {self.kid: self._cert_pem}, self.max_age
+
+    def mint_token(self, uid, claims=None, expires_in=3600, issued_at=None):
+        """
+        Create a signed ID token
+        :param uid: Subject of the token
+        :param claims: Extra claims, e.g. ``{'role': 'admin'}``
+        :param expires_in: Lifetime in seconds
+        :param issued_at: Unix time the token was issued, defaults to now
+        :return: Encoded token string
+        """
+        iat = int(issued_at if issued_at is not None else time.time())
+        payload = {
+            'iss': ISSUER_PREFIX + self.project_id,
+            'aud': self.project_id,
+            'sub': uid,
+            'iat': iat,
+            'auth_time': iat,
+            'exp': iat + expires_in,
+            **(claims or {})
+        }
+        return jwt.encode(payload, self._private_key, algorithm='RS256', headers={'kid': self.kid})
@@ -0,0 +1,68 @@
+import time
+
+from app.models.user import LazyUser, User
+from app.services.auth_service import resolve_user
+
+
+class FakeFirebaseService:
+    def __init__(self, profiles, role_changed_at=None):
+        self.profiles = profiles
+        self.role_changed_at = role_changed_at or {}
+        self.loads = 0
+
+    def get_auth_state(self, user_id):
+        if user_id not in self.profiles:
+            return None
+        return {'role_changed_at': self.role_changed_at.get(user_id)}
+
+    def get_cached_user(self, user_id):
+        self.loads += 1
+        return self.profiles.get(user_id)
+
+
+def claims(uid, role, issued_at=None):
+    return {'uid': uid, 'role': role, 'iat': int(issued_at if issued_at is not None else time.time())}
+
+
+def test_trusts_role_claim_without_loading_profile():
+    service = FakeFirebaseService({'u1': User('u1', 'a@example.com', 'A', role='admin')})
+
+    user = resolve_user(service, claims('u1', 'admin'))
+
+    assert isinstance(user, LazyUser)
+    assert user.role == 'admin'
+    assert service.loads == 0
+    assert user.email == 'a@example.com'
+    assert service.loads == 1
+
+
+def test_rejects_user_whose_profile_is_gone():
+    service = FakeFirebaseService({})
+
+    assert resolve_user(service, claims('u1', 'admin')) is None
+
+
+def test_loads_profile_for_token_issued_before_role_change():
+    issued_at = time.time() - 60
+    service = FakeFirebaseService(
+        {'u1': User('u1', 'a@example.com', 'A', role='worker')},
+        role_changed_at={'u1': issued_at + 30}
+    )
+
+    user = resolve_user(service, claims('u1', 'admin', issued_at))
+
+    assert isinstance(user, User)
+    assert user.role == 'worker'
+
+
+def test_trusts_token_issued_after_role_change():
+    issued_at = time.time()
+    service = FakeFirebaseService(
+        {'u1': User('u1', 'a@example.com', 'A', role='worker')},
+        role_changed_at={'u1': issued_at - 30}
+    )
+
+    user = resolve_user(service, claims('u1', 'worker', issued_at))
+
+    assert isinstance(user, LazyUser)
+    assert service.loads == 0
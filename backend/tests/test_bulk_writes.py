@@ -0,0 +1,78 @@
+import pytest
+
+from app.services.bulk_writes import commit_grouped_writes, pack_batches
+
+ADMIN = {'Authorization': 'Bearer admin-token'}
+
+
+def writes(count):
+    return [('delete', None, None)] * count
+
+
+@pytest.mark.parametrize('sizes, expected', [
+    ([2, 2, 2], [['a', 'b'], ['c']]),
+    # A group larger than the limit still gets a batch of its own
+    ([1, 5, 1], [['a'], ['b'], ['c']]),
+    ([4, 1], [['a'], ['b']]),
+    ([], []),
+])
+def test_pack_batches_keeps_groups_whole(sizes, expected):
+    groups = list(zip('abc', [writes(size) for size in sizes]))
+
+    batches = pack_batches(groups, batch_limit=4)
+
+    assert [[key for key, _ in batch] for batch in batches] == expected
+
+
+def test_failed_batch_only_fails_its_own_groups(db):
+    events = db.collection('events')
+    db.put('events/e1', {'title': 'A'})
+    groups = [
+        ('e1', [('update', events.document('e1'), {'title': 'B'})]),
+        ('missing', [('update', events.document('missing'), {'title': 'B'})]),
+        ('e3', [('set', events.document('e3'), {'title': 'C'})]),
+    ]
+
+    errors = commit_grouped_writes(db, groups, batch_limit=1, max_workers=2)
+
+    assert errors['e1'] is None and errors['e3'] is None
+    assert 'missing' in errors['missing']
+    assert db.data('events/e1') == {'title': 'B'}
+    assert db.data('events/e3') == {'title': 'C'}
+
+
+def test_bulk_create_rejects_every_invalid_item(client, db):
+    items = [
+        {'title': 'A', 'description': 'A', 'date': '2026-01-01', 'required_workers': 2},
+        {'title': 'B', 'description': 'B', 'date': '2026-01-01', 'required_workers': '5'},
+        {'title': 'C', 'date': '2026-01-01', 'required_workers': 1},
+    ]
+
+    response = client.post('/api/events/bulk', json=items, headers=ADMIN)
+
+    assert response.status_code == 400
+    assert [error['index'] for error in response.get_json()['errors']] == [1, 2]
+    assert list(db.collection('events').stream()) == []
+
+
+def test_bulk_update_reports_each_item(client, db):
+    db.put('events/e1', {'title': 'A', 'required_workers': 1, 'registered_workers': []})
+
+    response = client.put('/api/events/bulk', json=[
+        {'id': 'e1', 'title': 'B', 'registered_workers': ['w1']},
+        {'id': 'missing', 'title': 'B'},
+    ], headers=ADMIN)
+
+    assert response.get_json()['results'] == [
+        {'id': 'e1', 'status': 'updated'},
+        {'id': 'missing', 'status': 'not_found'},
+    ]
+    # Fields outside UPDATABLE_FIELDS are dropped
+    assert db.data('events/e1')['registered_workers'] == []
+    assert db.data('events/e1')['title'] == 'B'
+
+
+def test_bulk_routes_require_an_admin(client):
+    response = client.post('/api/events/bulk', json=[], headers={'Authorization': 'Bearer worker-token'})
+
+    assert response.status_code == 403
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services import firebase_service as firebase_service_module
+from app.services.cleanup_jobs import is_abandoned, run_job
+
+
+def job(status='running', ids=('a', 'b', 'c'), processed=0, failed=(), age=timedelta(0)):
+    return {
+        'kind': 'events', 'ids': list(ids), 'status': status, 'total': len(ids), 'processed': processed,
+        'counts': {}, 'failed': [{'id': item_id, 'message': 'error'} for item_id in failed],
+        'updated_at': datetime.now(timezone.utc) - age
+    }
+
+
+class Cleanup:
+    """Cleanup function recording the IDs it was called with"""
+
+    def __init__(self, failing=()):
+        self.calls = []
+        self.failing = set(failing)
+
+    def __call__(self, item_id):
+        self.calls.append(item_id)
+        if item_id in self.failing:
+            raise RuntimeError(f'cannot clean up {item_id}')
+        return {'events': 1}
+
+
+def test_run_job_retries_failed_ids_before_continuing(db):
+    db.put('cleanup_jobs/j1', job(processed=2, failed=['a']))
+    cleanup = Cleanup()
+
+    status = run_job(db.document('cleanup_jobs/j1'), db.data('cleanup_jobs/j1'), cleanup)
+
+    assert status == 'done'
+    assert cleanup.calls == ['a', 'c']
+    stored = db.data('cleanup_jobs/j1')
+    assert (stored['status'], stored['processed'], stored['failed'], stored['counts']) == ('done', 3, [], {'events': 2})
+
+
+def test_run_job_records_failures_and_keeps_going(db):
+    db.put('cleanup_jobs/j1', job(status='queued'))
+
+    status = run_job(db.document('cleanup_jobs/j1'), db.data('cleanup_jobs/j1'), Cleanup(failing=['b']))
+
+    assert status == 'failed'
+    stored = db.data('cleanup_jobs/j1')
+    assert stored['processed'] == 3
+    assert stored['failed'] == [{'id': 'b', 'message': 'cannot clean up b'}]
+
+
+@pytest.mark.parametrize('job_data, abandoned', [
+    (job(status='failed'), True),
+    (job(age=timedelta(seconds=30)), False),
+    (job(status='queued', age=timedelta(minutes=20)), True),
+    ({**job(), 'updated_at': None}, True),
+])
+def test_is_abandoned(job_data, abandoned):
+    assert is_abandoned(job_data, lease_seconds=600) is abandoned
+
+
+@pytest.fixture
+def cleanup(service, monkeypatch):
+    monkeypatch.setattr(firebase_service_module.Config, 'CLEANUP_JOB_LEASE_SECONDS', 600)
+    cleanup = Cleanup()
+    service._cleanup_function = lambda kind: cleanup
+    return cleanup
+
+
+def test_resume_skips_jobs_that_are_still_running(service, db, cleanup):
+    db.put('cleanup_jobs/fresh', job(age=timedelta(seconds=30)))
+    db.put('cleanup_jobs/stale', job(ids=['s'], age=timedelta(minutes=20)))
+    db.put('cleanup_jobs/failed', job(status='failed', ids=['f'], processed=1, failed=['f']))
+    db.put('cleanup_jobs/done', job(status='done', ids=['d']))
+
+    results = service.resume_cleanup_jobs()
+
+    assert sorted(results) == [('failed', 'done'), ('stale', 'done')]
+    assert sorted(cleanup.calls) == ['f', 's']
+    assert db.data('cleanup_jobs/fresh')['status'] == 'running'
+
+
+def test_resume_skips_a_job_claimed_by_another_worker(service, db, cleanup):
+    db.put('cleanup_jobs/stale', job(age=timedelta(minutes=20)))
+
+    def other_worker_claims():
+        db.before_commit.clear()
+        db.put('cleanup_jobs/stale', {**db.data('cleanup_jobs/stale'), 'updated_at': datetime.now(timezone.utc)})
+
+    db.before_commit.append(other_worker_claims)
+
+    assert service.resume_cleanup_jobs() == []
+    assert cleanup.calls == []
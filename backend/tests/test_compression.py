@@ -0,0 +1,23 @@
+import json
+import zlib
+
+from app.utils.compression import CODECS, _compress_stream
+
+LINES = [json.dumps({'id': f'e{i}', 'title': 'Shift', 'open_slots': i % 3}) + '\n' for i in range(400)]
+
+
+def test_export_stream_compresses_like_a_buffered_body():
+    streamed = b''.join(_compress_stream(iter(LINES), CODECS['gzip'](6)))
+    compressor = CODECS['gzip'](6)
+    buffered = compressor.compress(''.join(LINES).encode('utf-8')) + compressor.finish()
+
+    assert zlib.decompress(streamed, 31) == ''.join(LINES).encode('utf-8')
+    assert len(streamed) < 2 * len(buffered)
+
+
+def test_event_stream_flushes_every_message():
+    decompressor = zlib.decompressobj(31)
+    chunks = _compress_stream(iter(['data: a\n\n', 'data: b\n\n']), CODECS['gzip'](6), flush_bytes=0)
+
+    assert decompressor.decompress(next(chunks)) == b'data: a\n\n'
+    assert decompressor.decompress(next(chunks)) == b'data: b\n\n'
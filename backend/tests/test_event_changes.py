@@ -0,0 +1,79 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.routes.event_routes import decode_watermark
+from app.services.pagination import InvalidCursorError, encode_cursor
+
+UPDATED_AT = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_decode_watermark_round_trips():
+    watermark = {'issued_at': time.time(), 'events': [UPDATED_AT, 'e1'], 'tombstones': None}
+
+    assert decode_watermark(encode_cursor(watermark)) == watermark
+
+
+@pytest.mark.parametrize('watermark', [
+    {'events': None, 'tombstones': None},
+    {'issued_at': True},
+    {'issued_at': time.time() + 3600},
+    {'issued_at': time.time(), 'events': ['2026-01-01', 'e1']},
+    {'issued_at': time.time(), 'tombstones': [UPDATED_AT]},
+])
+def test_decode_watermark_rejects_malformed_values(watermark):
+    with pytest.raises(InvalidCursorError):
+        decode_watermark(encode_cursor(watermark))
+
+
+@pytest.fixture
+def events(db):
+    # e1 and e2 share a commit timestamp, like events written in one batch
+    for index, event_id in enumerate(('e1', 'e2', 'e3')):
+        db.put(f'events/{event_id}', {
+            'title': event_id, 'date': '2026-01-01', 'required_workers': 1, 'registered_workers': [],
+            'updated_at': UPDATED_AT + timedelta(seconds=index // 2)
+        })
+    return ['e1', 'e2', 'e3']
+
+
+def test_changes_page_through_events_and_tombstones(service, events):
+    service.delete_events(['e1', 'e2'])
+
+    changed, deleted, watermark, has_more = service.get_event_changes(limit=1)
+    assert [event.id for event in changed] == ['e3']
+    assert deleted == ['e1']
+    assert has_more
+
+    changed, deleted, watermark, has_more = service.get_event_changes(since=watermark, limit=1)
+    assert changed == []
+    assert deleted == ['e2']
+    assert has_more, 'a full page of tombstones may have more behind it'
+
+    changed, deleted, final, has_more = service.get_event_changes(since=watermark, limit=1)
+    assert (changed, deleted, has_more) == ([], [], False)
+    # An empty page keeps the positions reached so far
+    assert final == watermark
+
+
+def test_changes_route_resumes_from_watermark(client, db, events):
+    response = client.get('/api/events/changes?limit=2', headers={'Authorization': 'Bearer worker-token'})
+    assert [event['id'] for event in response.get_json()['events']] == ['e1', 'e2']
+    assert response.get_json()['has_more']
+
+    db.put('events/e4', {**db.data('events/e1'), 'title': 'e4', 'updated_at': UPDATED_AT + timedelta(days=1)})
+    response = client.get(
+        '/api/events/changes', query_string={'since': response.get_json()['since']},
+        headers={'Authorization': 'Bearer worker-token'}
+    )
+    assert [event['id'] for event in response.get_json()['events']] == ['e3', 'e4']
+    assert not response.get_json()['has_more']
+
+
+def test_changes_route_rejects_expired_and_malformed_watermarks(client):
+    headers = {'Authorization': 'Bearer worker-token'}
+    expired = encode_cursor({'issued_at': time.time() - 400 * 24 * 3600, 'events': None, 'tombstones': None})
+
+    assert client.get('/api/events/changes', query_string={'since': expired}, headers=headers).status_code == 410
+    assert client.get('/api/events/changes?since=not-a-watermark', headers=headers).status_code == 400
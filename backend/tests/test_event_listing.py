@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import firebase_service as firebase_service_module
+from app.services.event_replica import EventReplica
+from app.services.firebase_service import FirebaseService
+
+EVENTS = {
+    'full': {'title': 'Full', 'date': '2026-01-01', 'required_workers': 1, 'registered_count': 1, 'open_slots': 0},
+    'open': {'title': 'Open', 'date': '2026-01-02', 'required_workers': 2, 'registered_count': 1, 'open_slots': 1},
+    # Stored before open_slots existed
+    'legacy': {'title': 'Legacy', 'date': '2026-01-03', 'required_workers': 2, 'registered_workers': ['w1']},
+}
+
+
+class FakeCollection:
+    def on_snapshot(self, callback):
+        changes = [
+            SimpleNamespace(
+                document=SimpleNamespace(id=event_id, to_dict=lambda data=data: dict(data), update_time=None),
+                type=SimpleNamespace(name='ADDED')
+            )
+            for event_id, data in EVENTS.items()
+        ]
+        callback([], changes, datetime.now(timezone.utc))
+        return SimpleNamespace(is_active=True, push=lambda read_time, next_resume_token: None)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(firebase_service_module.Config, 'EVENT_REPLICA', True)
+    service = object.__new__(FirebaseService)
+    service.event_replica = EventReplica(FakeCollection()).start()
+    return service
+
+
+@pytest.mark.parametrize('fields', [None, {'title'}, {'id', 'open_slots'}])
+def test_needs_workers_page_is_independent_of_fields(service, fields):
+    events, _ = service.get_events_page(needs_workers=True, fields=fields)
+
+    assert [event.id for event in events] == ['open', 'legacy']
+
+
+@pytest.mark.parametrize('fields', [None, {'title'}])
+def test_needs_workers_stream_is_independent_of_fields(service, fields):
+    events = list(service.iter_events(needs_workers=True, fields=fields))
+
+    assert [event.id for event in events] == ['open', 'legacy']
+    if fields == {'title'}:
+        assert [event.to_json() for event in events] == [{'title': 'Open'}, {'title': 'Legacy'}]
+
+
+def test_page_limit_counts_only_matching_events(service):
+    events, cursor = service.get_events_page(limit=1, needs_workers=True, fields={'title'})
+
+    assert [event.id for event in events] == ['open']
+    events, _ = service.get_events_page(limit=1, cursor=cursor, needs_workers=True, fields={'title'})
+    assert [event.id for event in events] == ['legacy']
+
+
+def test_projected_created_at_is_the_stored_value():
+    created_at = datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+    event = FirebaseService._event_from_data('e1', {'title': 'A', 'created_at': created_at}, {'created_at'})
+
+    assert event.to_json() == {'created_at': created_at}
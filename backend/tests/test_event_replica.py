@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.services import event_replica
+from app.services.event_replica import EventReplica
+
+
+class FakeWatch:
+    """Calls back only for snapshots with changes, like the Firestore listener"""
+
+    def __init__(self, callback):
+        self._callback = callback
+        self.has_pushed = False
+        self.is_active = True
+        self.pending = []
+
+    def push(self, read_time, next_resume_token):
+        if not self.has_pushed or self.pending:
+            self._callback([], self.pending, read_time)
+            self.has_pushed = True
+        self.pending = []
+
+
+class FakeCollection:
+    def on_snapshot(self, callback):
+        self.watch = FakeWatch(callback)
+        return self.watch
+
+
+def change(event_id, data, update_time):
+    document = SimpleNamespace(id=event_id, to_dict=lambda: dict(data), update_time=update_time)
+    return SimpleNamespace(document=document, type=SimpleNamespace(name='ADDED'))
+
+
+def at(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc)
+
+
+def test_redelivered_change_does_not_leave_replica_lagging(monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr(event_replica.time, 'time', lambda: now)
+    collection = FakeCollection()
+    replica = EventReplica(collection, max_lag=5, max_idle=60).start()
+    collection.watch.push(at(now), b'1')
+    assert replica.ready
+
+    # After a reconnect an old change is delivered again in a fresh snapshot
+    collection.watch.pending = [change('e1', {'date': '2026-01-01'}, at(now - 600))]
+    collection.watch.push(at(now - 0.1), b'2')
+    assert replica.lag < 1
+    assert replica.ready
+
+
+def test_late_snapshot_recovers_on_next_empty_snapshot(monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr(event_replica.time, 'time', lambda: now)
+    collection = FakeCollection()
+    replica = EventReplica(collection, max_lag=5, max_idle=60).start()
+    collection.watch.push(at(now), b'1')
+
+    collection.watch.pending = [change('e1', {'date': '2026-01-01'}, at(now - 30))]
+    collection.watch.push(at(now - 30), b'2')
+    assert not replica.ready
+
+    collection.watch.push(at(now), b'3')
+    assert replica.ready
+
+
+def test_stalled_listener_is_detected(monkeypatch):
+    clock = [1_000_000.0]
+    monkeypatch.setattr(event_replica.time, 'time', lambda: clock[0])
+    collection = FakeCollection()
+    replica = EventReplica(collection, max_lag=5, max_idle=60).start()
+    collection.watch.push(at(clock[0]), b'1')
+    assert replica.ready
+
+    clock[0] += 61
+    assert not replica.ready
+    collection.watch.push(at(clock[0]), b'2')
+    assert replica.ready
@@ -0,0 +1,99 @@
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.services.event_replica import EventReplica
+from app.services.event_stream import EventBroadcaster, build_delta, stream_messages
+
+
+def message_data(message):
+    return json.loads(message.rsplit('data: ', 1)[1])
+
+
+def test_publishes_each_change_to_every_client():
+    broadcaster = EventBroadcaster()
+    first, second = broadcaster.subscribe(), broadcaster.subscribe()
+
+    broadcaster.publish([('e1', {'title': 'A', 'open_slots': 2}, {'title': 'A', 'open_slots': 1})])
+
+    for client in (first, second):
+        assert message_data(client.next(timeout=0)) == {
+            'id': 'e1', 'type': 'modified', 'open_slots': 1, 'changed': {'open_slots': 1}
+        }
+    assert broadcaster.stats()['published'] == 1
+
+
+def test_skips_changes_clients_dont_see():
+    assert build_delta('e1', {'title': 'A', 'updated_at': 1}, {'title': 'A', 'updated_at': 2}) is None
+    assert build_delta('e1', {'title': 'A'}, None) == {'id': 'e1', 'type': 'removed'}
+
+
+def test_reconnecting_client_gets_missed_messages():
+    broadcaster = EventBroadcaster()
+    client = broadcaster.subscribe()
+    broadcaster.publish([('e1', None, {'title': 'A'})])
+    last_event_id = client.next(timeout=0).split('\n')[0][len('id: '):]
+    broadcaster.unsubscribe(client)
+
+    broadcaster.publish([('e2', None, {'title': 'B'})])
+    client = broadcaster.subscribe(last_event_id)
+
+    assert message_data(client.next(timeout=0))['id'] == 'e2'
+    assert client.next(timeout=0) is None
+
+
+def test_unknown_last_event_id_resets_the_client():
+    broadcaster = EventBroadcaster()
+
+    client = broadcaster.subscribe('another-process-5')
+
+    assert client.next(timeout=0).startswith('event: reset')
+
+
+def test_slow_client_is_reset_and_unsubscribed():
+    broadcaster = EventBroadcaster(max_queue=2)
+    client = broadcaster.subscribe()
+    broadcaster.publish([(f'e{index}', None, {'title': str(index)}) for index in range(3)])
+
+    messages = list(stream_messages(broadcaster, client, heartbeat_interval=0))
+
+    assert messages[-1].startswith('event: reset')
+    assert broadcaster.stats() == {'clients': 0, 'published': 3, 'overflows': 1}
+
+
+def test_replica_changes_reach_subscribers():
+    class Collection:
+        def on_snapshot(self, callback):
+            self.callback = callback
+            return SimpleNamespace(is_active=True, push=lambda read_time, next_resume_token: None)
+
+    def added(event_id, data):
+        document = SimpleNamespace(id=event_id, to_dict=lambda: dict(data), update_time=None)
+        return SimpleNamespace(document=document, type=SimpleNamespace(name='ADDED'))
+
+    collection = Collection()
+    replica = EventReplica(collection).start()
+    broadcaster = EventBroadcaster()
+    replica.add_subscriber(broadcaster.publish)
+    client = broadcaster.subscribe()
+
+    now = datetime.now(timezone.utc)
+    collection.callback([], [added('e1', {'title': 'A'})], now)
+    assert client.next(timeout=0) is None, 'the initial load is not a change'
+    collection.callback([], [added('e2', {'title': 'B', 'open_slots': 3})], now)
+    assert message_data(client.next(timeout=0))['id'] == 'e2'
+
+
+def test_stream_route_accepts_token_in_query(client, service):
+    service.event_broadcaster = EventBroadcaster()
+
+    response = client.get('/api/events/stream?access_token=worker-token', buffered=False)
+    assert response.status_code == 200
+    service.event_broadcaster.publish([('e1', None, {'title': 'A'})])
+    body = iter(response.response)
+    assert next(body).startswith(b'retry:')
+    assert b'"id": "e1"' in next(body)
+    response.close()
+
+    assert client.get('/api/events/stream?access_token=forged').status_code == 401
+    assert client.get('/api/events/?access_token=worker-token').status_code == 401
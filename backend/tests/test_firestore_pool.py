@@ -0,0 +1,42 @@
+import grpc
+import pytest
+from google.api_core import exceptions
+from google.auth.credentials import AnonymousCredentials
+
+from app.services.firestore_pool import PooledFirestoreClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.delenv('FIRESTORE_EMULATOR_HOST', raising=False)
+    # Nothing listens on port 1, so every call fails with UNAVAILABLE
+    return PooledFirestoreClient(
+        channels=2,
+        project='test-project',
+        credentials=AnonymousCredentials(),
+        client_options={'api_endpoint': 'localhost:1'}
+    )
+
+
+def test_multicallables_are_grpc_multicallables(client):
+    client._firestore_api
+    pool = client.channel_pool
+
+    assert isinstance(pool.unary_unary('/m'), grpc.UnaryUnaryMultiCallable)
+    assert isinstance(pool.unary_stream('/m'), grpc.UnaryStreamMultiCallable)
+    assert isinstance(pool.stream_unary('/m'), grpc.StreamUnaryMultiCallable)
+    assert isinstance(pool.stream_stream('/m'), grpc.StreamStreamMultiCallable)
+
+
+def test_stream_errors_are_mapped_to_api_exceptions(client):
+    with pytest.raises(exceptions.ServiceUnavailable):
+        list(client.collection('events').stream(retry=None, timeout=5))
+
+    assert client.pool_stats()['in_flight'] == 0
+
+
+def test_unary_errors_are_mapped_to_api_exceptions(client):
+    with pytest.raises(exceptions.ServiceUnavailable):
+        client.collection('events').document('e1').set({'title': 'a'}, retry=None, timeout=5)
+
+    assert client.pool_stats()['in_flight'] == 0
@@ -0,0 +1,104 @@
+import pytest
+from google.api_core import exceptions
+
+from app.models.event import Event
+from app.services import firebase_service as firebase_service_module
+from app.services.firebase_service import RegistrationError
+from app.services.registration_shards import shard_capacities
+from app.services.transactions import TransactionContentionError, TransactionStats, run_transaction
+
+
+@pytest.mark.parametrize('counts, required_workers, expected', [
+    ([0, 0, 0], 7, [3, 2, 2]),
+    ([2, 0, 0], 5, [3, 1, 1]),
+    # Shards keep their registrations when the capacity drops below them
+    ([3, 1], 2, [3, 1]),
+    ([0, 0], 0, [0, 0]),
+])
+def test_shard_capacities(counts, required_workers, expected):
+    assert shard_capacities(counts, required_workers) == expected
+
+
+def test_run_transaction_retries_conflicts(service, db):
+    stats = TransactionStats()
+    attempts = []
+
+    def fn(transaction):
+        attempts.append(transaction)
+        if len(attempts) < 3:
+            raise exceptions.Aborted('contended')
+        return 'committed'
+
+    assert run_transaction(db, fn, max_attempts=5, stats=stats) == 'committed'
+    assert len(attempts) == 3
+    assert stats.conflicts == 2
+    assert stats.max_attempts_used == 3
+
+
+def test_run_transaction_gives_up_after_max_attempts(service, db):
+    stats = TransactionStats()
+
+    def fn(transaction):
+        raise exceptions.Aborted('contended')
+
+    with pytest.raises(TransactionContentionError):
+        run_transaction(db, fn, max_attempts=3, stats=stats)
+    assert stats.conflicts == 3
+    assert stats.exhausted == 1
+
+
+@pytest.fixture
+def sharded_event(service, db, monkeypatch):
+    monkeypatch.setattr(firebase_service_module.Config, 'REGISTRATION_SHARDS', 3)
+    for user_id in ('u1', 'u2', 'u3', 'u4', 'u5'):
+        db.put(f'users/{user_id}', {'name': user_id, 'role': 'worker', 'registered_events': []})
+    event = Event('Shift', 'Sharded', '2026-01-01', 4, registration_layout='sharded')
+    return service.create_event(event)
+
+
+def shard_counts(db, event_id):
+    return [db.data(f'events/{event_id}/registration_shards/{index}')['count'] for index in range(3)]
+
+
+def test_claims_every_slot_exactly_once(service, db, sharded_event):
+    for user_id in ('u1', 'u2', 'u3', 'u4'):
+        assert service.register_worker(sharded_event, user_id)
+
+    with pytest.raises(RegistrationError, match='full capacity'):
+        service.register_worker(sharded_event, 'u5')
+    assert sum(shard_counts(db, sharded_event)) == 4
+    # Filling the last shard closed the event for open_slots queries
+    assert db.data(f'events/{sharded_event}')['open_slots'] == 0
+    assert db.data('users/u1')['registered_events'] == [sharded_event]
+
+
+def test_rejects_duplicate_registration(service, sharded_event):
+    service.register_worker(sharded_event, 'u1')
+
+    with pytest.raises(RegistrationError, match='already registered'):
+        service.register_worker(sharded_event, 'u1')
+
+
+def test_unregistering_from_a_full_event_reopens_it(service, db, sharded_event):
+    for user_id in ('u1', 'u2', 'u3', 'u4'):
+        service.register_worker(sharded_event, user_id)
+
+    assert service.unregister_worker(sharded_event, 'u2')
+    assert db.data(f'events/{sharded_event}')['open_slots'] == 1
+    assert db.data(f'registrations/{sharded_event}_u2') is None
+    assert db.data('users/u2')['registered_events'] == []
+    assert service.register_worker(sharded_event, 'u5')
+
+
+def test_claim_is_retried_when_a_shard_changes_concurrently(service, db, sharded_event):
+    def concurrent_signup():
+        db.before_commit.clear()
+        for index in range(3):
+            path = f'events/{sharded_event}/registration_shards/{index}'
+            db.put(path, {**db.data(path), 'count': db.data(path)['count']})
+
+    db.before_commit.append(concurrent_signup)
+    assert service.register_worker(sharded_event, 'u1')
+
+    assert service.registration_stats.conflicts == 1
+    assert sum(shard_counts(db, sharded_event)) == 1
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+from app.services import token_verifier
+from app.services.token_verifier import SigningKeyCache, TokenVerificationError, TokenVerifier
+from key_server import FakeKeyServer
+
+
+@pytest.fixture
+def server():
+    return FakeKeyServer()
+
+
+@pytest.fixture
+def verifier(server):
+    key_cache = SigningKeyCache(fetcher=server.fetch, refresh_margin=0, min_refresh_interval=0)
+    return TokenVerifier(server.project_id, key_cache=key_cache)
+
+
+def test_accepts_token_and_caches_claims(server, verifier):
+    token = server.mint_token('worker-1', {'role': 'admin'})
+
+    claims = verifier.verify(token)
+    assert claims['uid'] == 'worker-1'
+    assert claims['role'] == 'admin'
+
+    verifier.verify(token)
+    assert verifier.decoded_cache.hits == 1
+    assert server.requests == 1
+
+
+def test_refetches_keys_after_rotation(server, verifier):
+    verifier.verify(server.mint_token('worker-1'))
+    old_token = server.mint_token('worker-2')
+
+    server.rotate()
+    claims = verifier.verify(server.mint_token('worker-1'))
+
+    assert claims['uid'] == 'worker-1'
+    assert server.requests == 2
+    # The old key is gone from the key server
+    with pytest.raises(TokenVerificationError):
+        verifier.verify(old_token)
+
+
+def test_unknown_kid_refetch_is_rate_limited(server):
+    key_cache = SigningKeyCache(fetcher=server.fetch, refresh_margin=0, min_refresh_interval=60)
+    verifier = TokenVerifier(server.project_id, key_cache=key_cache)
+    verifier.verify(server.mint_token('worker-1'))
+
+    server.rotate()
+    with pytest.raises(TokenVerificationError, match='unknown key'):
+        verifier.verify(server.mint_token('worker-1'))
+    assert server.requests == 1
+
+
+def test_keys_expire_after_max_age(server, verifier, monkeypatch):
+    server.max_age = 60
+    verifier.verify(server.mint_token('worker-1'))
+    assert server.requests == 1
+
+    now = time.time()
+    monkeypatch.setattr(token_verifier.time, 'time', lambda: now + 30)
+    verifier.key_cache.get_key(server.kid)
+    assert server.requests == 1
+
+    monkeypatch.setattr(token_verifier.time, 'time', lambda: now + 61)
+    verifier.key_cache.get_key(server.kid)
+    assert server.requests == 2
+
+
+def test_expired_keys_are_not_used_when_key_server_fails(server, verifier, monkeypatch):
+    server.max_age = 60
+    verifier.verify(server.mint_token('worker-1'))
+
+    def fail():
+        raise ConnectionError('key server unreachable')
+
+    now = time.time()
+    monkeypatch.setattr(token_verifier.time, 'time', lambda: now + 61)
+    monkeypatch.setattr(verifier.key_cache, '_fetcher', fail)
+    with pytest.raises(ConnectionError):
+        verifier.key_cache.get_key(server.kid)
+    assert verifier.key_cache.fetch_errors == 1
+
+
+@pytest.mark.parametrize('claims, message', [
+    ({'aud': 'another-project'}, '(?i)audience'),
+    ({'iss': 'https://securetoken.google.com/another-project'}, '(?i)issuer'),
+    ({'sub': ''}, '(?i)subject'),
+])
+def test_rejects_invalid_claims(server, verifier, claims, message):
+    with pytest.raises(TokenVerificationError, match=message):
+        verifier.verify(server.mint_token('worker-1', claims))
+
+
+def test_rejects_expired_token(server, verifier):
+    token = server.mint_token('worker-1', issued_at=time.time() - 7200, expires_in=3600)
+
+    with pytest.raises(TokenVerificationError, match='(?i)expired'):
+        verifier.verify(token)
+
+
+def test_rejects_token_signed_by_another_key(server, verifier):
+    verifier.verify(server.mint_token('worker-1'))
+    forger = FakeKeyServer(project_id=server.project_id)
+    forger.kid = server.kid
+
+    with pytest.raises(TokenVerificationError, match='(?i)signature'):
+        verifier.verify(forger.mint_token('worker-1', {'role': 'admin'}))
@@ -0,0 +1,49 @@
+import pytest
+
+from app.services import firebase_service as firebase_service_module
+from app.services.user_import import provisioned_uid, validate_import_row
+from firestore_fake import FakeAuth
+
+
+@pytest.fixture
+def fake_auth(monkeypatch):
+    fake_auth = FakeAuth()
+    monkeypatch.setattr(firebase_service_module, 'auth', fake_auth)
+    monkeypatch.setattr(firebase_service_module.Config, 'USER_IMPORT_HASH_ROUNDS', 1)
+    return fake_auth
+
+
+def rows(*emails):
+    return [validate_import_row({'email': email, 'name': email.split('@')[0], 'password': 'secret1234'}) for email in emails]
+
+
+def test_imports_new_users_with_profiles(service, db, fake_auth):
+    uid = provisioned_uid('ann@example.com')
+
+    results = service.import_users(rows('ann@example.com'))
+
+    assert results == [{'email': 'ann@example.com', 'id': uid, 'status': 'created'}]
+    assert fake_auth.accounts[uid].custom_claims == {'role': 'worker'}
+    assert db.data(f'users/{uid}')['role'] == 'worker'
+
+
+def test_email_of_another_account_is_reported_not_imported(service, db, fake_auth):
+    fake_auth.add('self-signup', 'Bob@Example.com')
+
+    results = service.import_users(rows('bob@example.com', 'cat@example.com'))
+
+    assert results[0] == {'email': 'bob@example.com', 'id': 'self-signup', 'status': 'exists'}
+    assert results[1]['status'] == 'created'
+    assert provisioned_uid('bob@example.com') not in fake_auth.accounts
+    assert db.data(f"users/{provisioned_uid('bob@example.com')}") is None
+
+
+def test_reimport_completes_missing_profiles(service, db, fake_auth):
+    service.import_users(rows('ann@example.com', 'dan@example.com'))
+    db.document(f"users/{provisioned_uid('dan@example.com')}").delete()
+
+    results = service.import_users(rows('ann@example.com', 'dan@example.com'))
+
+    assert [result['status'] for result in results] == ['exists', 'created']
+    assert db.data(f"users/{provisioned_uid('dan@example.com')}") is not None
+    assert len(fake_auth.accounts) == 2